@@ -1,6 +1,15 @@
 # Guessing and loss calculation based on manual calculation (weights and bias)
+# Vectorized NumPy version for large datasets: regression_numpy.py
 
 import math
+import matplotlib
+
+# Save the plot to a file (PNG/SVG) instead of showing it, e.g. on machines without a display.
+# For large datasets use regression_plot.py, which aggregates the points instead of annotating each of them.
+PLOT_OUTPUT = None # e.g. 'manual.png'
+if PLOT_OUTPUT:
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
 
 # Training data (optimal outcome: y=2x-1)
@@ -84,15 +93,14 @@ plt.text(0.02, 0.98, f'Model: y = {w}x + {b}',
          verticalalignment='top',
          bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.8))
 
-# Add error statistics
-differences = [y_pred[i] - y[i] for i in range(len(x))]
-mse_plot = sum(error**2 for error in differences) / len(differences)
-rmse_plot = math.sqrt(mse_plot)
-
-plt.text(0.02, 0.85, f'RMSE: {rmse_plot:.2f}',
+# Add error statistics (RMSE calculated above)
+plt.text(0.02, 0.85, f'RMSE: {rmse:.2f}',
          transform=plt.gca().transAxes,
          fontsize=11,
          bbox=dict(boxstyle='round,pad=0.3', facecolor='lightcoral', alpha=0.7))
 
 plt.tight_layout()
-plt.show()
\ No newline at end of file
+if PLOT_OUTPUT:
+    plt.savefig(PLOT_OUTPUT)
+else:
+    plt.show()
\ No newline at end of file
@@ -1,4 +1,5 @@
 # Guessing and loss calculation based on Tensorflow and GradientTape
+# Compiled mini-batch version for large datasets: regression_tf.py
 
 import tensorflow as tf
 import matplotlib.pyplot as plt
@@ -55,6 +56,6 @@ for epoch in range(epochs):
     list_w.append(model.w.numpy())
     list_b.append(model.b.numpy())
     current_loss = train(model, xs, ys, learning_rate=LEARNING_RATE)
-    losses.append(current_loss)
+    losses.append(float(current_loss))
     print('Epoch %2d: w=%.2f b=%.2f, loss=%.2f' %
           (epoch, list_w[-1], list_b[-1], current_loss))
@@ -6,10 +6,14 @@ from tensorflow import keras
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+from letters_data import load_mnist, make_dataset, to_float32, SHUFFLE_BUFFER
+from letters_tflite import TFLiteEvaluator
+from letters_quantize import export_variants, report as quantization_report
+
+QUANTIZE = False # opt-in: also export quantized TFLite variants and compare them in the accuracy section
 
 # Load training data
-data = tf.keras.datasets.mnist
-(training_images, training_labels), (val_images, val_labels) = data.load_data() # split data to training and validation
+(training_images, training_labels), (val_images, val_labels) = load_mnist() # split data to training and validation
 
 print("Shape of training images:", training_images.shape)
 print("Shape of training labels:", training_labels.shape)
@@ -27,10 +31,13 @@ print("Label:",training_labels[0]) # produces "5"
 
 # Each of 28 nested array contains 28 values represent color from white to black (0-255).
 # Normalise the data. Instead of 0-255, convert values to 0-1.
-training_images = training_images / 255.0
-val_images = val_images / 255.0
+# The training images are normalised in float32 batch by batch inside the tf.data pipeline (see letters_data.py),
+# so we never hold a float64 copy of all 60k images. Validation images are converted once, we predict on them below.
+train_ds = make_dataset(training_images, training_labels, shuffle_buffer=SHUFFLE_BUFFER)
+val_ds = make_dataset(val_images, val_labels)
+val_images = to_float32(val_images)
 
-print("Training normalised:",training_images[0]) # sample line: [0 ... 0.21568627 0.6745098 ... ]
+print("Training normalised:",to_float32(training_images[0])) # sample line: [0 ... 0.21568627 0.6745098 ... ]
 
 # Plot the first item from the training set using color map - transform 0-1 to grayscale.
 # plt.imshow(training_images[0], cmap='gray')
@@ -57,10 +64,10 @@ model.compile(optimizer= OPT,
 
 # Train the model
 # Images are inputs (like X). Labels are outputs (like Y). We count loss, but also accuracy.
-model.fit(training_images, training_labels, epochs=20, validation_data=(val_images, val_labels))
+model.fit(train_ds, epochs=20, validation_data=val_ds)
 
 # Validate the model
-model.evaluate(val_images, val_labels) # Run validation again on any further validation data sets
+model.evaluate(val_ds) # Run validation again on any further validation data sets
 
 # Validate single item form the validation set (number 7).
 classifications = model.predict(val_images)
@@ -110,36 +117,20 @@ print(f"Size reduction: {((keras_size - tflite_size) / keras_size * 100):.1f}%")
 print("\n=== Model Accuracy Comparison ===")
 
 # Test Keras model accuracy
-keras_predictions = model.predict(val_images)
+keras_predictions = classifications # the same model.predict(val_images) as above, no need to run it again
 keras_predicted_classes = np.argmax(keras_predictions, axis=1)
 keras_accuracy = np.mean(keras_predicted_classes == val_labels)
 print(f"Keras model accuracy: {keras_accuracy:.4f} ({keras_accuracy*100:.2f}%)")
 
 # Test TFLite model accuracy
-interpreter = tf.lite.Interpreter(model_path=tflite_path)
-interpreter.allocate_tensors()
-
-# Get input and output tensors
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+# Batched evaluation: the interpreter input is resized to 256 images per invoke() (see letters_tflite.py)
+evaluator = TFLiteEvaluator(tflite_path, batch_size=256)
 
-print(f"TFLite input shape: {input_details[0]['shape']}")
-print(f"TFLite output shape: {output_details[0]['shape']}")
+print(f"TFLite input shape: {evaluator.input_details['shape']} (resized to {evaluator.input_shape})")
+print(f"TFLite output shape: {evaluator.output_details['shape']}")
 
 # Run predictions on TFLite model
-tflite_predictions = []
-for i in range(len(val_images)):
-    # Set input tensor
-    interpreter.set_tensor(input_details[0]['index'], val_images[i:i+1].astype(np.float32))
-
-    # Run inference
-    interpreter.invoke()
-
-    # Get output
-    output_data = interpreter.get_tensor(output_details[0]['index'])
-    tflite_predictions.append(output_data[0])
-
-tflite_predictions = np.array(tflite_predictions)
+tflite_predictions = evaluator.predict(val_images)
 tflite_predicted_classes = np.argmax(tflite_predictions, axis=1)
 tflite_accuracy = np.mean(tflite_predicted_classes == val_labels)
 print(f"TFLite model accuracy: {tflite_accuracy:.4f} ({tflite_accuracy*100:.2f}%)")
@@ -158,6 +149,14 @@ elif accuracy_diff < 0.05:
 else:
     print("❌ Warning: Significant accuracy difference (> 5%)")
 
+# Post-training quantization: dynamic-range, float16 and full-int8 variants (see letters_quantize.py)
+if QUANTIZE:
+    print("\n=== Quantized Variants ===")
+    # fp32 was converted above, only the quantized variants are new
+    quantized_paths = {"fp32": tflite_path,
+                       **export_variants(model, training_images, ["dynamic", "float16", "int8"], tflite_path)}
+    quantization_report(quantized_paths, val_images, val_labels, keras_accuracy)
+
 # Test on a few individual samples for detailed comparison
 print(f"\n=== Sample Predictions Comparison (first 5 validation samples) ===")
 for i in range(5):
@@ -4,56 +4,25 @@
 
 import os
 import numpy as np
-import torch
-from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
 import librosa
 import glob
+from kws_model import load_model, SAMPLE_RATE
 
-def load_audio(file_path, target_sr=16000):
+def load_audio(file_path, target_sr=SAMPLE_RATE):
     """Load audio file and resample to target sampling rate."""
     audio, sr = librosa.load(file_path, sr=target_sr)
     return audio
 
-def predict_audio(model, feature_extractor, audio_data, device):
-    """Make prediction on audio data."""
-    # Process the audio
-    inputs = feature_extractor(audio_data, sampling_rate=16000, return_tensors="pt", padding=True)
-    inputs = {k: v.to(device) for k, v in inputs.items()}
-
-    # Make prediction
-    with torch.no_grad():
-        outputs = model(**inputs)
-        predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-
-    return predictions.cpu().numpy()
-
 def main():
     print("Loading wav2vec2 keyword spotting model from Hugging Face...")
 
-    # Model from Hugging Face: https://huggingface.co/anton-l/wav2vec2-base-ft-keyword-spotting
-    model_name = "anton-l/wav2vec2-base-ft-keyword-spotting"
-
-    # Load feature extractor and model
-    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name)
-    model = Wav2Vec2ForSequenceClassification.from_pretrained(model_name)
+    # Load feature extractor and model (shared loader, see kws_model.py)
+    kws = load_model()
 
-    # Set device
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
-    model.eval()
-
-    print(f"Model loaded on device: {device}")
-    print(f"Model config: {model.config}")
-    print(f"Number of labels: {model.config.num_labels}")
-
-    # Get label mappings if available
-    if hasattr(model.config, 'id2label'):
-        id2label = model.config.id2label
-        label2id = model.config.label2id
-        print(f"Labels: {list(id2label.values())}")
-    else:
-        print("No label mapping found in model config")
-        id2label = {i: f"class_{i}" for i in range(model.config.num_labels)}
+    print(f"Model loaded on device: {kws.device}")
+    print(f"Model config: {kws.model.config}")
+    print(f"Number of labels: {kws.num_labels}")
+    print(f"Labels: {list(kws.labels)}")
 
     # Test directories
     sample_dirs = {
@@ -82,15 +51,15 @@ def main():
             # Load audio
             try:
                 audio_data = load_audio(wav_file)
-                audio_duration = len(audio_data) / 16000  # duration in seconds
+                audio_duration = len(audio_data) / SAMPLE_RATE  # duration in seconds
 
                 # Make prediction
-                predictions = predict_audio(model, feature_extractor, audio_data, device)
+                predictions = kws.predict(audio_data)
 
                 # Get top prediction
                 predicted_class_id = np.argmax(predictions[0])
                 confidence = predictions[0][predicted_class_id]
-                predicted_label = id2label.get(predicted_class_id, f"class_{predicted_class_id}")
+                predicted_label = kws.label(predicted_class_id)
 
                 # Display results
                 print(f"File: {filename}")
@@ -102,7 +71,7 @@ def main():
                 top_3_indices = np.argsort(predictions[0])[-3:][::-1]
                 print(f"  Top 3 predictions:")
                 for i, idx in enumerate(top_3_indices):
-                    label = id2label.get(idx, f"class_{idx}")
+                    label = kws.label(idx)
                     conf = predictions[0][idx]
                     print(f"    {i+1}. {label}: {conf:.4f}")
 
@@ -3,18 +3,17 @@
 # Reacts on microphone input and detects yes/no
 
 import numpy as np
-import torch
-from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
 import sounddevice as sd
 import queue
 import threading
 import time
 from collections import deque
+from kws_model import load_model, MODEL_NAME, SAMPLE_RATE
 
 class RealTimeKeywordSpotter:
-    def __init__(self, model_name="anton-l/wav2vec2-base-ft-keyword-spotting"):
+    def __init__(self, model_name=MODEL_NAME):
         self.model_name = model_name
-        self.sample_rate = 16000
+        self.sample_rate = SAMPLE_RATE
         self.chunk_duration = 1.0  # seconds
         self.chunk_size = int(self.sample_rate * self.chunk_duration)
         self.overlap_duration = 0.5  # seconds overlap between chunks
@@ -30,6 +29,7 @@ class RealTimeKeywordSpotter:
         self.audio_queue = queue.Queue()
 
         # Model components
+        self.kws = None
         self.device = None
         self.model = None
         self.feature_extractor = None
@@ -46,28 +46,17 @@ class RealTimeKeywordSpotter:
         """Load the wav2vec2 model and feature extractor."""
         print("Loading wav2vec2 keyword spotting model...")
 
-        # Load feature extractor and model
-        self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(self.model_name)
-        self.model = Wav2Vec2ForSequenceClassification.from_pretrained(self.model_name)
-
-        # Set device
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.model.eval()
+        # Load feature extractor and model (shared loader, see kws_model.py)
+        self.kws = load_model(self.model_name)
+        self.feature_extractor = self.kws.feature_extractor
+        self.model = self.kws.model
+        self.device = self.kws.device
 
         print(f"Model loaded on device: {self.device}")
         print(f"Target keyword: 'yes' (threshold: {self.yes_threshold})")
 
         # Get label mappings
-        self.id2label = self.model.config.id2label
-        self.yes_class_id = None
-        for class_id, label in self.id2label.items():
-            if label.lower() == "yes":
-                self.yes_class_id = int(class_id)
-                break
-
-        if self.yes_class_id is None:
-            raise ValueError("'yes' class not found in model labels")
+        self.yes_class_id = self.kws.class_id("yes")
 
         print(f"'yes' class ID: {self.yes_class_id}")
 
@@ -113,21 +102,8 @@ class RealTimeKeywordSpotter:
             audio_data = audio_data[:self.chunk_size]
 
         try:
-            # Process the audio
-            inputs = self.feature_extractor(
-                audio_data,
-                sampling_rate=self.sample_rate,
-                return_tensors="pt",
-                padding=True
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
             # Make prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-
-            return predictions.cpu().numpy()[0]
+            return self.kws.predict(audio_data)[0]
         except Exception as e:
             print(f"Prediction error: {e}")
             return None
@@ -162,7 +138,7 @@ class RealTimeKeywordSpotter:
                         # Get top prediction for monitoring
                         top_class_id = np.argmax(predictions)
                         top_confidence = predictions[top_class_id]
-                        top_label = self.id2label.get(str(top_class_id), f"class_{top_class_id}")
+                        top_label = self.kws.label(top_class_id)
 
                         # Print current prediction (only if confidence > 0.3)
                         if top_confidence > 0.3:
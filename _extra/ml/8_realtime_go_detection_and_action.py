@@ -3,19 +3,18 @@
 # Reacts on microphone input and detects the word "go"
 
 import numpy as np
-import torch
-from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
 import sounddevice as sd
 import queue
 import threading
 import time
-import subprocess
 from collections import deque
+from kws_model import load_model, MODEL_NAME, SAMPLE_RATE
+from action_launcher import ActionLauncher, action_command
 
 class RealTimeKeywordSpotter:
-    def __init__(self, model_name="anton-l/wav2vec2-base-ft-keyword-spotting"):
+    def __init__(self, model_name=MODEL_NAME):
         self.model_name = model_name
-        self.sample_rate = 16000
+        self.sample_rate = SAMPLE_RATE
         self.chunk_duration = 1.0  # seconds
         self.chunk_size = int(self.sample_rate * self.chunk_duration)
         self.overlap_duration = 0.5  # seconds overlap between chunks
@@ -31,6 +30,7 @@ class RealTimeKeywordSpotter:
         self.audio_queue = queue.Queue()
 
         # Model components
+        self.kws = None
         self.device = None
         self.model = None
         self.feature_extractor = None
@@ -40,6 +40,10 @@ class RealTimeKeywordSpotter:
         self.processing_thread = None
         self.stop_event = threading.Event()
 
+        # Actions run through a helper process started before the model is loaded,
+        # so a detection does not fork this (large) process or wait for the command to finish
+        self.launcher = ActionLauncher()
+
         # Load model
         self._load_model()
 
@@ -47,28 +51,17 @@ class RealTimeKeywordSpotter:
         """Load the wav2vec2 model and feature extractor."""
         print("Loading wav2vec2 keyword spotting model...")
 
-        # Load feature extractor and model
-        self.feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(self.model_name)
-        self.model = Wav2Vec2ForSequenceClassification.from_pretrained(self.model_name)
-
-        # Set device
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.model.eval()
+        # Load feature extractor and model (shared loader, see kws_model.py)
+        self.kws = load_model(self.model_name)
+        self.feature_extractor = self.kws.feature_extractor
+        self.model = self.kws.model
+        self.device = self.kws.device
 
         print(f"Model loaded on device: {self.device}")
         print(f"Target keyword: 'go' (threshold: {self.go_threshold})")
 
         # Get label mappings
-        self.id2label = self.model.config.id2label
-        self.go_class_id = None
-        for class_id, label in self.id2label.items():
-            if label.lower() == "go": # this is the word we want to detect
-                self.go_class_id = int(class_id)
-                break
-
-        if self.go_class_id is None:
-            raise ValueError("'go' class not found in model labels")
+        self.go_class_id = self.kws.class_id("go") # this is the word we want to detect
 
         print(f"'go' class ID: {self.go_class_id}")
 
@@ -114,21 +107,8 @@ class RealTimeKeywordSpotter:
             audio_data = audio_data[:self.chunk_size]
 
         try:
-            # Process the audio
-            inputs = self.feature_extractor(
-                audio_data,
-                sampling_rate=self.sample_rate,
-                return_tensors="pt",
-                padding=True
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
             # Make prediction
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-
-            return predictions.cpu().numpy()[0]
+            return self.kws.predict(audio_data)[0]
         except Exception as e:
             print(f"Prediction error: {e}")
             return None
@@ -163,7 +143,7 @@ class RealTimeKeywordSpotter:
                         # Get top prediction for monitoring
                         top_class_id = np.argmax(predictions)
                         top_confidence = predictions[top_class_id]
-                        top_label = self.id2label.get(str(top_class_id), f"class_{top_class_id}")
+                        top_label = self.kws.label(top_class_id)
 
                         # Print current prediction (only if confidence > 0.3)
                         if top_confidence > 0.3:
@@ -180,7 +160,7 @@ class RealTimeKeywordSpotter:
                             self.last_detection_time = current_time
 
                             # Optional: Play a sound or trigger an action
-                            self._on_go_detected(go_confidence)
+                            self._on_go_detected(go_confidence, time.monotonic())
 
                     # Remove overlap amount from buffer to create sliding window
                     if len(self.audio_buffer) > self.overlap_size:
@@ -191,34 +171,43 @@ class RealTimeKeywordSpotter:
                 print(f"Processing error: {e}")
                 time.sleep(0.1)
 
-    def _on_go_detected(self, confidence):
-        """Called when 'go' is detected. Executes macOS command."""
+    def _on_go_detected(self, confidence, detected_at):
+        """Called when 'go' is detected. Opens Chrome (macOS) or the default browser (Linux)."""
         try:
             print("🌐 Opening Chrome browser...")
-
-            # macOS command to open Chrome browser
-            subprocess.run(["open", "-a", "Google Chrome"], check=True)
-
-            print("✅ Chrome opened successfully!")
-
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to open Chrome: {e}")
-
-            # Fallback: try alternative Chrome names or open any browser
-            try:
-                print("🔄 Trying fallback: opening default browser...")
-                subprocess.run(["open", "https://google.com"], check=True)
-                print("✅ Default browser opened!")
-            except subprocess.CalledProcessError as fallback_e:
-                print(f"❌ Fallback failed too: {fallback_e}")
+            handle = self.launcher.launch(action_command("open_browser"))
+            handle.exit_code.add_done_callback(
+                lambda exit_code: self._on_action_done(exit_code, handle, detected_at, fallback=True))
 
         except Exception as e:
             print(f"❌ Unexpected error: {e}")
 
-        # Add other actions here if needed:
-        # subprocess.run(["say", "Go command detected"])  # Text-to-speech
-        # subprocess.run(["open", "-a", "Finder"])        # Open Finder
-        # subprocess.run(["open", "/Applications"])       # Open Applications folder
+        # Add other actions here if needed (see action_launcher.ACTIONS):
+        # self.launcher.launch(action_command("say"))     # Text-to-speech
+        # self.launcher.launch(action_command("notify"))  # Desktop notification
+        # self.launcher.launch(["open", "-a", "Finder"])  # Open Finder
+
+    def _on_action_done(self, exit_code, handle, detected_at, fallback=False):
+        """Called from the launcher thread when an action finished."""
+        try:
+            failed = exit_code.result() != 0
+            error = f"exit code {exit_code.result()}"
+        except Exception as e:
+            failed, error = True, e
+
+        if not failed:
+            print(f"✅ Browser opened! (started {(handle.started_at - detected_at) * 1000:.1f} ms after detection)")
+            return
+
+        print(f"❌ Failed to open Chrome: {error}")
+        if fallback:
+            # Fallback: open the default browser
+            print("🔄 Trying fallback: opening default browser...")
+            fallback_handle = self.launcher.launch(action_command("open_url"))
+            fallback_handle.exit_code.add_done_callback(
+                lambda exit_code: self._on_action_done(exit_code, fallback_handle, detected_at))
+        else:
+            print("❌ Fallback failed too")
 
     def start(self):
         """Start real-time keyword spotting."""
@@ -252,6 +241,7 @@ class RealTimeKeywordSpotter:
             self.recording_thread.join(timeout=2)
         if self.processing_thread:
             self.processing_thread.join(timeout=2)
+        self.launcher.close()
 
         print("Stopped.")
 
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Low-latency action launcher for voice commands.
+A small helper process is started once, before the model is loaded, and waits for commands on a pipe.
+Each action is then a message to the helper, which starts the command and reports back when it has
+started and when it has exited. The process running the model never forks, and no interpreter
+is started per action.
+
+Usage:
+    launcher = ActionLauncher()                      # pre-warm, do this before loading the model
+    handle = launcher.launch(action_command("notify"))
+    handle.started.wait(1)
+    print(handle.start_latency_ms, handle.exit_code.result())
+"""
+
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+URL = "https://google.com"
+
+# Action name -> command per platform (platform.system())
+ACTIONS = {
+    "open_browser": {
+        "Darwin": ["open", "-a", "Google Chrome"],
+        "Linux": ["xdg-open", URL],
+    },
+    "open_url": {
+        "Darwin": ["open", URL],
+        "Linux": ["xdg-open", URL],
+    },
+    "notify": {
+        "Darwin": ["osascript", "-e", 'display notification "Go command detected" with title "Keyword spotter"'],
+        "Linux": ["notify-send", "Keyword spotter", "Go command detected"],
+    },
+    "say": {
+        "Darwin": ["say", "Go command detected"],
+        "Linux": ["spd-say", "Go command detected"],
+    },
+}
+
+
+def action_command(name, system=None):
+    """Return the command of an action for the current (or given) platform."""
+    system = system or platform.system()
+    commands = ACTIONS[name]
+    if system not in commands:
+        raise ValueError(f"Action '{name}' is not available on {system}")
+    return commands[system]
+
+
+def _helper_main():
+    """Helper process: start commands received as JSON lines on stdin, report start and exit on stdout."""
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+    def wait_for_exit(launch_id, process):
+        send(["exited", launch_id, process.wait()])
+
+    for line in sys.stdin:
+        message = json.loads(line)
+        if message[0] == "stop":
+            return
+        if message[0] == "ping":
+            send(["pong"])
+            continue
+
+        _, launch_id, argv = message
+        try:
+            process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, start_new_session=True)
+        except OSError as e:
+            send(["failed", launch_id, time.monotonic(), str(e)])
+            continue
+        send(["started", launch_id, time.monotonic(), process.pid])
+        threading.Thread(target=wait_for_exit, args=(launch_id, process), daemon=True).start()
+
+
+class LaunchHandle:
+    """State of one launched action."""
+
+    def __init__(self, argv, requested_at):
+        self.argv = argv
+        self.requested_at = requested_at # time.monotonic() when launch() was called
+        self.started_at = None
+        self.pid = None
+        self.error = None
+        self.started = threading.Event() # set when the command started (or failed to start)
+        self.exit_code = Future()
+
+    @property
+    def start_latency_ms(self):
+        if self.started_at is None:
+            return None
+        return (self.started_at - self.requested_at) * 1000
+
+
+class ActionLauncher:
+    """Pre-warmed helper process that starts commands on request."""
+
+    def __init__(self):
+        # A fresh interpreter running only this module, so the helper stays small no matter
+        # what the calling process has loaded. time.monotonic() is system-wide, so timestamps compare.
+        self.process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--helper"],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+
+        self._ids = itertools.count()
+        self._pending = {}
+        self._pending_lock = threading.Lock() # _pending is shared by launch() and the reader thread
+        self._send_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+        # Wait until the helper is up and answering, so the first action does not pay for the start
+        self._send(["ping"])
+        if not self._ready.wait(timeout=30):
+            raise RuntimeError("Action launcher helper did not start")
+
+    def launch(self, argv):
+        """Ask the helper to start argv. Returns immediately with a LaunchHandle."""
+        launch_id = next(self._ids)
+        handle = LaunchHandle(list(argv), time.monotonic())
+        with self._pending_lock:
+            self._pending[launch_id] = handle
+        self._send(["launch", launch_id, handle.argv])
+        return handle
+
+    def _send(self, message):
+        with self._send_lock:
+            self.process.stdin.write(json.dumps(message) + "\n")
+            self.process.stdin.flush()
+
+    def _read_loop(self):
+        for line in self.process.stdout:
+            message = json.loads(line)
+            kind = message[0]
+            if kind == "pong":
+                self._ready.set()
+                continue
+
+            with self._pending_lock:
+                handle = self._pending.get(message[1]) if kind == "started" else self._pending.pop(message[1], None)
+            if handle is None:
+                continue
+            if kind == "started":
+                handle.started_at, handle.pid = message[2], message[3]
+                handle.started.set()
+            elif kind == "failed":
+                handle.started_at, handle.error = message[2], message[3]
+                handle.started.set()
+                handle.exit_code.set_exception(OSError(message[3]))
+            elif kind == "exited":
+                handle.exit_code.set_result(message[2])
+
+        # Helper is gone, fail whatever is still waiting
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for handle in pending:
+            handle.started.set()
+            if not handle.exit_code.done():
+                handle.exit_code.set_exception(RuntimeError("Action launcher helper exited"))
+
+    def close(self):
+        try:
+            self._send(["stop"])
+            self.process.stdin.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+if __name__ == "__main__":
+    if "--helper" in sys.argv:
+        _helper_main()
+    else:
+        print("Helper process of ActionLauncher, not meant to be run directly. "
+              "See test_macos_commands.py for the latency benchmark.")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Audio capture diagnostics and blocksize auto-tuner.
+Opens an InputStream for every candidate blocksize/latency setting (the realtime scripts use
+blocksize=1024) and measures callback inter-arrival jitter, input overflows reported in `status`,
+dropped frames and CPU use, optionally while the keyword spotting model runs at the same time.
+Recommends the lowest-latency stable configuration and saves every capture as WAV for replay.
+
+Usage:
+    python audio_diagnostics.py
+    python audio_diagnostics.py --blocksizes 256 512 1024 2048 --latencies low high --with-model
+    python test_mic.py --diagnose
+"""
+
+import argparse
+import os
+import threading
+import time
+import numpy as np
+import sounddevice as sd
+from audio_io import write_wav
+
+SAMPLE_RATE = 16000
+BLOCKSIZES = [256, 512, 1024, 2048, 4096]
+LATENCIES = ["low", "high"]
+DURATION = 5.0 # seconds per configuration
+CAPTURE_DIR = "captures"
+
+
+class CaptureProbe:
+    """Stream callback that records arrival times, status flags and audio into preallocated buffers."""
+
+    def __init__(self, blocksize, duration, sample_rate=SAMPLE_RATE):
+        max_callbacks = int(duration * sample_rate / blocksize) + 64
+        self.arrivals = np.zeros(max_callbacks)
+        self.audio = np.zeros(int(duration * sample_rate) + blocksize * 64, dtype=np.float32)
+        self.callbacks = 0
+        self.frames = 0
+        self.overflows = 0
+        self.underflows = 0
+
+    def callback(self, indata, frames, time_info, status):
+        # Keep the callback short: store and return, no printing or allocation
+        if self.callbacks < len(self.arrivals):
+            self.arrivals[self.callbacks] = time.perf_counter()
+        self.callbacks += 1
+        if status.input_overflow:
+            self.overflows += 1
+        if status.input_underflow:
+            self.underflows += 1
+        end = min(self.frames + frames, len(self.audio))
+        self.audio[self.frames:end] = indata[:end - self.frames, 0]
+        self.frames = end
+
+
+class ModelLoad:
+    """Runs the keyword spotting model on the latest second of audio in a loop, like the realtime scripts."""
+
+    def __init__(self, probe, sample_rate=SAMPLE_RATE):
+        from kws_model import load_model
+
+        self.kws = load_model()
+        self.probe = probe
+        self.sample_rate = sample_rate
+        self.predictions = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._worker, daemon=True)
+
+    def _worker(self):
+        while not self.stop_event.is_set():
+            end = self.probe.frames
+            if end < self.sample_rate:
+                time.sleep(0.05)
+                continue
+            self.kws.predict(self.probe.audio[end - self.sample_rate:end])
+            self.predictions += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join(timeout=5)
+
+
+def measure(blocksize, latency, duration=DURATION, with_model=False, device=None, sample_rate=SAMPLE_RATE):
+    """Capture `duration` seconds with one configuration and return its statistics and audio."""
+    probe = CaptureProbe(blocksize, duration, sample_rate)
+    load = ModelLoad(probe, sample_rate) if with_model else None
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    with sd.InputStream(samplerate=sample_rate, channels=1, dtype=np.float32, blocksize=blocksize,
+                        latency=latency, device=device, callback=probe.callback) as stream:
+        if load:
+            with load:
+                time.sleep(duration)
+        else:
+            time.sleep(duration)
+        stream_latency = stream.latency
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    count = min(probe.callbacks, len(probe.arrivals))
+    intervals = np.diff(probe.arrivals[:count]) * 1000 # ms
+    expected_interval = blocksize / sample_rate * 1000
+    deviation = np.abs(intervals - expected_interval) if len(intervals) else np.zeros(1)
+    expected_frames = int(wall * sample_rate)
+
+    return {
+        "blocksize": blocksize,
+        "latency": latency,
+        "stream_latency_ms": stream_latency * 1000,
+        # Latency until a block reaches Python: one block of audio plus the device/host buffer
+        "effective_latency_ms": expected_interval + stream_latency * 1000,
+        "expected_interval_ms": expected_interval,
+        "jitter_std_ms": float(np.std(intervals)) if len(intervals) else 0.0,
+        "jitter_p99_ms": float(np.percentile(deviation, 99)),
+        "jitter_max_ms": float(deviation.max()),
+        "overflows": probe.overflows,
+        "dropped_frames": max(expected_frames - probe.frames, 0),
+        "cpu_percent": cpu / wall * 100,
+        "predictions": load.predictions if load else 0,
+        "audio": probe.audio[:probe.frames],
+    }
+
+
+def is_stable(result):
+    """No overflows and callback jitter within half a block interval."""
+    return result["overflows"] == 0 and result["jitter_p99_ms"] < result["expected_interval_ms"] / 2
+
+
+def run_diagnostics(blocksizes=BLOCKSIZES, latencies=LATENCIES, duration=DURATION, with_model=False,
+                    device=None, capture_dir=CAPTURE_DIR):
+    os.makedirs(capture_dir, exist_ok=True)
+    results = []
+    for blocksize in blocksizes:
+        for latency in latencies:
+            print(f"Capturing {duration:.0f}s with blocksize={blocksize}, latency={latency}"
+                  f"{' (model running)' if with_model else ''}...")
+            result = measure(blocksize, latency, duration, with_model, device)
+            path = os.path.join(capture_dir, f"capture-blocksize{blocksize}-{latency}.wav")
+            write_wav(path, result.pop("audio"))
+            result["capture"] = path
+            results.append(result)
+
+    print("\n" + "=" * 100)
+    print("CAPTURE DIAGNOSTICS")
+    print("=" * 100)
+    print(f"{'Blocksize':>9} {'Latency':>8} {'Eff. latency (ms)':>18} {'Jitter std':>11} {'p99':>7} {'max':>7} "
+          f"{'Overflows':>10} {'Dropped':>8} {'CPU %':>6}  Stable")
+    for r in results:
+        print(f"{r['blocksize']:>9} {r['latency']:>8} {r['effective_latency_ms']:>18.1f} {r['jitter_std_ms']:>11.2f} "
+              f"{r['jitter_p99_ms']:>7.2f} {r['jitter_max_ms']:>7.2f} {r['overflows']:>10} "
+              f"{r['dropped_frames']:>8} {r['cpu_percent']:>6.1f}  {'✅' if is_stable(r) else '❌'}")
+
+    stable = [r for r in results if is_stable(r)]
+    if stable:
+        best = min(stable, key=lambda r: r["effective_latency_ms"])
+        print(f"\n🎯 Recommended: blocksize={best['blocksize']}, latency='{best['latency']}' "
+              f"(~{best['effective_latency_ms']:.0f} ms)")
+    else:
+        best = None
+        print("\n❌ No stable configuration found, try larger blocksizes or latency='high'")
+    print(f"Captured audio saved to: {capture_dir}/")
+    return results, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audio capture diagnostics and blocksize auto-tuner")
+    parser.add_argument("--blocksizes", nargs="+", type=int, default=BLOCKSIZES)
+    parser.add_argument("--latencies", nargs="+", default=LATENCIES,
+                        help="'low', 'high' or seconds, e.g. 0.02")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per configuration")
+    parser.add_argument("--with-model", action="store_true", help="run the keyword model during capture")
+    parser.add_argument("--device", help="input device (index or name substring)")
+    parser.add_argument("--capture-dir", default=CAPTURE_DIR)
+    args = parser.parse_args()
+
+    latencies = [latency if latency in ("low", "high") else float(latency) for latency in args.latencies]
+    device = int(args.device) if args.device and args.device.isdigit() else args.device
+
+    print("Available audio devices:")
+    print(sd.query_devices())
+    print()
+    run_diagnostics(args.blocksizes, latencies, args.duration, args.with_model, device, args.capture_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# WAV helpers without extra dependencies (no librosa/soundfile), for captures and replay.
+
+import wave
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def write_wav(path, audio, sample_rate=SAMPLE_RATE):
+    """Save float32 audio (-1..1) as 16-bit mono WAV."""
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def read_wav(path):
+    """Load a 16-bit mono WAV (e.g. samples/ or captures/). Returns (float32 audio, sample_rate)."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2 or f.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono WAV")
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype=np.int16)
+        return pcm.astype(np.float32) / 32767, f.getframerate()
+
+
+def wav_info(path):
+    """(num_frames, sample_rate, channels) of a WAV file, without reading the audio."""
+    with wave.open(path, "rb") as f:
+        return f.getnframes(), f.getframerate(), f.getnchannels()
+
+
+def stream_wav(path, start=0, stop=None, block_frames=SAMPLE_RATE * 10):
+    """Yield float32 mono blocks of a 16-bit WAV from frame `start` to `stop`, without loading the whole file.
+    Multi-channel audio is averaged to mono."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16-bit WAV")
+        channels = f.getnchannels()
+        stop = f.getnframes() if stop is None else min(stop, f.getnframes())
+        f.setpos(start)
+        position = start
+        while position < stop:
+            count = min(block_frames, stop - position)
+            pcm = np.frombuffer(f.readframes(count), dtype=np.int16)
+            if len(pcm) == 0:
+                break
+            block = pcm.astype(np.float32) / 32767
+            if channels > 1:
+                block = block.reshape(-1, channels).mean(axis=1)
+            yield block
+            position += len(block)
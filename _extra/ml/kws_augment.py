@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+On-the-fly audio augmentation for keyword training data.
+Turns a handful of labelled clips (e.g. the 8 in samples/) into an endless stream of augmented
+batches. Every transform works on the whole batch at once (NumPy indexing and FFTs, no per-clip loops):
+
+    speed perturbation + time shift - one linear-interpolation gather for the batch
+    room impulse response           - FFT convolution with synthetic (or given) RIRs
+    additive noise                  - coloured noise (white to brown) or noise clips, at a random SNR
+    gain                            - random gain in dB
+
+Batches go straight into tf.data (tf_dataset) or a PyTorch DataLoader (TorchAugmentedClips), nothing
+is written to disk. Run directly to report augmented clips per second per core:
+
+    python kws_augment.py
+    python kws_augment.py --batch-size 64 --workers 4
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from audio_io import read_wav
+
+try:
+    import torch
+    _IterableDataset = torch.utils.data.IterableDataset
+except ImportError:
+    torch = None
+    _IterableDataset = object
+
+SAMPLE_RATE = 16000
+CLIP_SAMPLES = SAMPLE_RATE
+BATCH_SIZE = 64
+SAMPLES_DIR = "samples"
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def synthetic_rirs(count, sample_rate=SAMPLE_RATE, rt60=(0.1, 0.7), length=0.5, seed=0):
+    """Exponentially decaying noise impulse responses with random RT60, direct path at t=0."""
+    rng = np.random.default_rng(seed)
+    n = int(length * sample_rate)
+    t = np.arange(n) / sample_rate
+    decay_times = rng.uniform(*rt60, size=(count, 1))
+    # Amplitude falls by 60 dB after rt60 seconds
+    rirs = rng.standard_normal((count, n)) * np.exp(-6.9078 * t / decay_times)
+    rirs *= 0.3 / np.sqrt(np.sum(rirs ** 2, axis=1, keepdims=True)) # reverb energy below the direct sound
+    rirs[:, 0] = 1.0
+    return rirs.astype(np.float32)
+
+
+class Augmenter:
+    """Random augmentation of batches of equal-length clips. All ranges are (low, high)."""
+
+    def __init__(self, shift=(-0.1, 0.1), speed=(0.9, 1.1), gain_db=(-6.0, 6.0), snr_db=(5.0, 30.0),
+                 noise_prob=0.8, rir_prob=0.5, noise_clips=None, rirs=None, sample_rate=SAMPLE_RATE, seed=None):
+        self.shift = shift
+        self.speed = speed
+        self.gain_db = gain_db
+        self.snr_db = snr_db
+        self.noise_prob = noise_prob
+        self.rir_prob = rir_prob
+        self.noise_clips = noise_clips # (K, samples) float32, looped if shorter than the clips, or None
+        self.rirs = rirs if rirs is not None else synthetic_rirs(64, sample_rate)
+        self.sample_rate = sample_rate
+        self.rng = np.random.default_rng(seed)
+
+        # Shared FFT size for RIR convolution: linear (not circular) convolution of any clip we see
+        self._fft_size = None
+        self._rir_spectra = None
+
+    def __call__(self, batch):
+        """Return an augmented copy of batch (B, N)."""
+        batch = np.asarray(batch, dtype=np.float32)
+        out = self.speed_and_shift(batch)
+        out = self.reverberate(out)
+        out = self.add_noise(out)
+        out *= (10 ** (self.rng.uniform(*self.gain_db, size=(len(out), 1)) / 20)).astype(np.float32)
+        np.clip(out, -1.0, 1.0, out=out)
+        return out
+
+    def speed_and_shift(self, batch):
+        """Resample by a random speed factor and shift in time, zero outside the clip. One gather."""
+        b, n = batch.shape
+        speed = self.rng.uniform(*self.speed, size=(b, 1))
+        shift = self.rng.uniform(*self.shift, size=(b, 1)) * self.sample_rate
+        # Output sample i reads input position (i - shift) * speed
+        positions = (np.arange(n)[None, :] - shift) * speed
+        left = np.floor(positions).astype(np.int64)
+        frac = (positions - left).astype(np.float32)
+        valid = (left >= 0) & (left < n - 1)
+        left = np.clip(left, 0, n - 2)
+        rows = np.arange(b)[:, None]
+        out = batch[rows, left] * (1 - frac) + batch[rows, left + 1] * frac
+        out[~valid] = 0.0
+        return out
+
+    def reverberate(self, batch):
+        """Convolve a random subset of the batch with random RIRs, all in one rfft/irfft."""
+        selected = np.flatnonzero(self.rng.random(len(batch)) < self.rir_prob)
+        if len(selected) == 0:
+            return batch
+        n = batch.shape[1]
+        fft_size = 1 << int(np.ceil(np.log2(n + self.rirs.shape[1] - 1)))
+        if fft_size != self._fft_size:
+            # RIR spectra are computed once per FFT size
+            self._fft_size = fft_size
+            self._rir_spectra = np.fft.rfft(self.rirs, fft_size, axis=1)
+        spectra = np.fft.rfft(batch[selected], fft_size, axis=1)
+        spectra *= self._rir_spectra[self.rng.integers(len(self.rirs), size=len(selected))]
+        batch[selected] = np.fft.irfft(spectra, fft_size, axis=1)[:, :n]
+        return batch
+
+    def noise(self, b, n):
+        """(b, n) noise: random segments of noise_clips, or coloured noise with a random 1/f^alpha slope."""
+        if self.noise_clips is not None:
+            clips = self.noise_clips[self.rng.integers(len(self.noise_clips), size=b)]
+            if clips.shape[1] < n:
+                # Loop noise clips shorter than the audio
+                clips = np.tile(clips, (1, -(-n // clips.shape[1])))
+            starts = self.rng.integers(0, clips.shape[1] - n + 1, size=(b, 1))
+            return clips[np.arange(b)[:, None], starts + np.arange(n)[None, :]]
+        # alpha 0 = white, 1 = pink, 2 = brown
+        alpha = self.rng.uniform(0.0, 2.0, size=(b, 1))
+        freqs = np.fft.rfftfreq(n)
+        freqs[0] = freqs[1]
+        spectra = np.fft.rfft(self.rng.standard_normal((b, n)), axis=1) / freqs[None, :] ** (alpha / 2)
+        return np.fft.irfft(spectra, n, axis=1)
+
+    def add_noise(self, batch):
+        """Add noise to a random subset of the batch at a random SNR."""
+        selected = np.flatnonzero(self.rng.random(len(batch)) < self.noise_prob)
+        if len(selected) == 0:
+            return batch
+        noise = self.noise(len(selected), batch.shape[1])
+        signal_power = np.mean(batch[selected] ** 2, axis=1, keepdims=True) + 1e-10
+        noise_power = np.mean(noise ** 2, axis=1, keepdims=True) + 1e-10
+        snr = 10 ** (self.rng.uniform(*self.snr_db, size=(len(selected), 1)) / 10)
+        batch[selected] += (noise * np.sqrt(signal_power / (noise_power * snr))).astype(np.float32)
+        return batch
+
+
+def batches(clips, labels, augmenter, batch_size=BATCH_SIZE, num_batches=None):
+    """Endless (or num_batches) stream of (augmented clips, labels), clips drawn with replacement."""
+    labels = np.asarray(labels)
+    count = 0
+    while num_batches is None or count < num_batches:
+        indices = augmenter.rng.integers(len(clips), size=batch_size)
+        yield augmenter(clips[indices]), labels[indices]
+        count += 1
+
+
+def tf_dataset(clips, labels, batch_size=BATCH_SIZE, seed=None, **augmenter_kwargs):
+    """tf.data.Dataset of augmented (batch, clip samples) float32 batches and int32 labels."""
+    import tensorflow as tf
+
+    def generator():
+        augmenter = Augmenter(seed=seed, **augmenter_kwargs)
+        for audio, batch_labels in batches(clips, labels, augmenter, batch_size):
+            yield audio, batch_labels.astype(np.int32)
+
+    signature = (tf.TensorSpec((batch_size, clips.shape[1]), tf.float32), tf.TensorSpec((batch_size,), tf.int32))
+    return tf.data.Dataset.from_generator(generator, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
+
+class TorchAugmentedClips(_IterableDataset):
+    """PyTorch IterableDataset of augmented batches. Use with DataLoader(dataset, batch_size=None);
+    every DataLoader worker gets its own random stream."""
+
+    def __init__(self, clips, labels, batch_size=BATCH_SIZE, seed=0, **augmenter_kwargs):
+        if torch is None:
+            raise ImportError("TorchAugmentedClips needs torch")
+        self.clips = clips
+        self.labels = np.asarray(labels)
+        self.batch_size = batch_size
+        self.seed = seed
+        self.augmenter_kwargs = augmenter_kwargs
+
+    def __iter__(self):
+        info = torch.utils.data.get_worker_info()
+        worker_id = info.id if info else 0
+        augmenter = Augmenter(seed=[self.seed, worker_id], **self.augmenter_kwargs)
+        for audio, batch_labels in batches(self.clips, self.labels, augmenter, self.batch_size):
+            yield torch.from_numpy(audio), torch.from_numpy(batch_labels)
+
+
+def load_clips(samples_dir=SAMPLES_DIR, length=CLIP_SAMPLES):
+    """(clips, labels, label names) for <samples_dir>/<label>/*.wav, clips padded/cropped to `length`."""
+    paths = sorted(glob.glob(os.path.join(samples_dir, "*", "*.wav")))
+    names = sorted({os.path.basename(os.path.dirname(path)) for path in paths})
+    clips = np.zeros((len(paths), length), dtype=np.float32)
+    for i, path in enumerate(paths):
+        audio, _ = read_wav(path)
+        clips[i, :min(len(audio), length)] = audio[:length]
+    labels = np.array([names.index(os.path.basename(os.path.dirname(path))) for path in paths])
+    return clips, labels, names
+
+
+def _throughput(clips, labels, batch_size, duration, seed):
+    """Augmented clips per second in this process (one core)."""
+    augmenter = Augmenter(seed=seed)
+    next(batches(clips, labels, augmenter, batch_size)) # warm-up, computes the RIR spectra
+    produced = 0
+    start = time.perf_counter()
+    for audio, _ in batches(clips, labels, augmenter, batch_size):
+        produced += len(audio)
+        if time.perf_counter() - start >= duration:
+            break
+    return produced / (time.perf_counter() - start)
+
+
+def _limit_threads():
+    # Pool initializer: the BLAS/OpenMP pools follow THREAD_ENV_VARS, set before numpy was imported.
+    # torch is imported by now too, so its intra-op pool is limited directly
+    if torch is not None:
+        torch.set_num_threads(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of the vectorized audio augmentation")
+    parser.add_argument("--samples-dir", default=SAMPLES_DIR)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes for the multi-core run")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per measurement")
+    args = parser.parse_args()
+
+    clips, labels, names = load_clips(args.samples_dir)
+    print(f"Loaded {len(clips)} clips ({', '.join(names)}) from {args.samples_dir}/")
+    print("=" * 60)
+
+    # Same transforms applied one clip at a time, for comparison
+    per_clip = _throughput(clips, labels, 1, args.duration, 0)
+    print(f"One clip at a time:        {per_clip:10,.0f} clips/s (1 core)")
+    single = _throughput(clips, labels, args.batch_size, args.duration, 0)
+    print(f"Batch of {args.batch_size:<4} vectorized: {single:10,.0f} clips/s (1 core), "
+          f"{single / per_clip:.1f}x, {single / CLIP_SAMPLES * SAMPLE_RATE:,.0f} s of audio per second")
+
+    # One core per worker, so clips/s per core is meaningful. Thread pools read these variables when
+    # numpy is imported, so they are set here and the workers are spawned, importing numpy afresh
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = "1"
+    with ProcessPoolExecutor(args.workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_limit_threads) as pool:
+        rates = list(pool.map(_throughput, [clips] * args.workers, [labels] * args.workers,
+                              [args.batch_size] * args.workers, [args.duration] * args.workers,
+                              range(args.workers)))
+    total = sum(rates)
+    print(f"{args.workers} processes:               {total:10,.0f} clips/s, {total / args.workers:,.0f} clips/s per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# Distillation of the wav2vec2 keyword spotting model (teacher, ~95M parameters) into a small
+# log-mel CNN (student, ~25k parameters) for always-on spotting.
+#
+#   1. Teacher soft labels - every clip of the corpus (<corpus>/<label>/*.wav, 1 s at 16 kHz) goes
+#      through kws_model once. The probabilities are cached in distill_cache/, keyed by the teacher
+#      and the corpus files (path, size, mtime), so later runs train without loading wav2vec2.
+#   2. Student - log-mel spectrogram (kws_features.py) -> 3 conv blocks -> global average pooling ->
+#      logits, trained on the teacher's distribution softened with --temperature.
+#   3. Export - Keras model with a softmax on top, and TFLite through the same converter flow as
+#      5_ml-tf-keras-letters.py (letters_quantize.convert(): fp32, dynamic, int8).
+#   4. Report - accuracy, agreement with the teacher, size and per-window latency on samples/.
+#      Clips of samples/ found in the corpus are left out of training, so the report scores unseen clips.
+#
+#   python kws_distill.py --corpus /data/speech_commands --epochs 30
+#   python kws_distill.py --report-only
+
+import argparse
+import glob
+import hashlib
+import os
+import time
+import numpy as np
+import librosa
+import tensorflow as tf
+from kws_features import FRAMES, N_MELS, CLIP_SAMPLES, fix_length, log_mel
+from kws_model import MODEL_NAME, SAMPLE_RATE, load_model
+from letters_quantize import export_variants, variant_path
+from letters_tflite import TFLiteEvaluator
+
+STUDENT_KERAS_PATH = 'saved_models/model-kws-student.keras'
+STUDENT_TFLITE_PATH = 'saved_models/model-kws-student.tflite'
+STUDENT_LABELS_PATH = 'saved_models/model-kws-student-labels.txt'
+CACHE_DIR = 'distill_cache'
+SAMPLES_DIR = 'samples'
+
+VARIANTS = ["fp32", "dynamic", "int8"]
+TEMPERATURE = 2.0
+EPOCHS = 30
+BATCH_SIZE = 64
+TEACHER_BATCH_SIZE = 16
+LATENCY_RUNS = 50
+TEACHER_DEVICE = "cpu" # one device for soft labels and report, so the teacher is loaded only once
+
+
+def list_clips(corpus):
+    """Return (paths, folder labels) for <corpus>/<label>/*.wav."""
+    paths = sorted(glob.glob(os.path.join(corpus, "*", "*.wav")))
+    if not paths:
+        raise ValueError(f"No <label>/*.wav files found in {corpus}")
+    return paths, [os.path.basename(os.path.dirname(path)) for path in paths]
+
+
+def load_clips(paths):
+    """Load clips as a (N, CLIP_SAMPLES) float32 array, resampled to 16 kHz and padded/cropped to 1 s."""
+    clips = np.zeros((len(paths), CLIP_SAMPLES), dtype=np.float32)
+    for i, path in enumerate(paths):
+        audio, _ = librosa.load(path, sr=SAMPLE_RATE)
+        clips[i] = fix_length(audio)
+    return clips
+
+
+def teacher_cache_path(paths, model_name=MODEL_NAME, cache_dir=CACHE_DIR):
+    """Cache file for the teacher's soft labels, changes when the teacher or any corpus file changes."""
+    digest = hashlib.sha256(model_name.encode())
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return os.path.join(cache_dir, f"teacher-{digest.hexdigest()[:16]}.npz")
+
+
+def teacher_soft_labels(paths, clips, model_name=MODEL_NAME, cache_dir=CACHE_DIR, batch_size=TEACHER_BATCH_SIZE,
+                        device=TEACHER_DEVICE):
+    """Teacher probabilities (N, num_labels) and labels, computed once per corpus and cached."""
+    cache_path = teacher_cache_path(paths, model_name, cache_dir)
+    if os.path.exists(cache_path):
+        print(f"Using cached teacher soft labels: {cache_path}")
+        with np.load(cache_path) as cached:
+            return cached["probabilities"], list(cached["labels"])
+
+    print(f"Computing teacher soft labels for {len(clips)} clips with {model_name}...")
+    kws = load_model(model_name, device=device)
+    probabilities = np.empty((len(clips), kws.num_labels), dtype=np.float32)
+    start = time.perf_counter()
+    for i in range(0, len(clips), batch_size):
+        probabilities[i:i + batch_size] = kws.predict(clips[i:i + batch_size])
+    print(f"Teacher inference took {time.perf_counter() - start:.1f}s")
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez_compressed(cache_path, probabilities=probabilities, labels=kws.labels)
+    return probabilities, list(kws.labels)
+
+
+def build_student(num_labels, features):
+    """Log-mel CNN returning logits. The normalization layer is adapted to the training features."""
+    normalization = tf.keras.layers.Normalization(axis=None)
+    normalization.adapt(features)
+    return tf.keras.models.Sequential([
+        tf.keras.layers.Input(shape=(FRAMES, N_MELS)),
+        tf.keras.layers.Reshape((FRAMES, N_MELS, 1)),
+        normalization,
+        tf.keras.layers.Conv2D(16, 3, padding='same', activation='relu'),
+        tf.keras.layers.MaxPooling2D(2),
+        tf.keras.layers.Conv2D(32, 3, padding='same', activation='relu'),
+        tf.keras.layers.MaxPooling2D(2),
+        tf.keras.layers.Conv2D(64, 3, padding='same', activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(num_labels),
+    ])
+
+
+def distillation_loss(temperature=TEMPERATURE):
+    """Cross-entropy between the softened teacher and student distributions, scaled by T^2 (Hinton et al.).
+
+    y_true holds teacher log-probabilities, which differ from the teacher logits only by a constant,
+    so softmax(y_true / T) is the teacher distribution at temperature T.
+    """
+    def loss(y_true, y_pred):
+        soft_targets = tf.nn.softmax(y_true / temperature)
+        return tf.keras.losses.categorical_crossentropy(soft_targets, y_pred / temperature,
+                                                        from_logits=True) * temperature ** 2
+    return loss
+
+
+def train_student(features, probabilities, epochs=EPOCHS, batch_size=BATCH_SIZE, temperature=TEMPERATURE,
+                  validation_fraction=0.1, seed=0):
+    """Train the student on the teacher's soft labels. Returns the inference model (softmax outputs)."""
+    targets = np.log(probabilities + 1e-8)
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(features))
+    # Hold out a validation split only when there is enough data for it to mean anything
+    num_val = int(len(features) * validation_fraction) if len(features) >= 100 else 0
+    val_idx, train_idx = order[:num_val], order[num_val:]
+
+    def dataset(idx, shuffle):
+        ds = tf.data.Dataset.from_tensor_slices((features[idx], targets[idx]))
+        if shuffle:
+            ds = ds.shuffle(len(idx), seed=seed)
+        return ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+    student = build_student(probabilities.shape[1], features[train_idx])
+    student.compile(optimizer='adam', loss=distillation_loss(temperature))
+    student.summary()
+
+    callbacks = []
+    val_ds = None
+    if num_val:
+        val_ds = dataset(val_idx, shuffle=False)
+        callbacks.append(tf.keras.callbacks.EarlyStopping(patience=5, restore_best_weights=True))
+    student.fit(dataset(train_idx, shuffle=True), validation_data=val_ds, epochs=epochs,
+                callbacks=callbacks, verbose=2)
+
+    # Exported model outputs probabilities like the teacher
+    return tf.keras.models.Sequential([student, tf.keras.layers.Softmax()])
+
+
+def save_labels(labels, path=STUDENT_LABELS_PATH):
+    with open(path, 'w') as f:
+        f.write("\n".join(labels) + "\n")
+
+
+def load_labels(path=STUDENT_LABELS_PATH):
+    with open(path) as f:
+        return [line.rstrip("\n") for line in f if line.strip()]
+
+
+def median_ms(fn, inputs, runs=LATENCY_RUNS):
+    """Median time of fn(x) in ms, cycling through inputs after one warm-up call."""
+    fn(inputs[0])
+    timings = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        timings[i] = time.perf_counter() - start
+    return float(np.median(timings)) * 1000
+
+
+def report(tflite_paths, labels, model_name=MODEL_NAME, samples_dir=SAMPLES_DIR, device=TEACHER_DEVICE):
+    """Compare the student variants with the teacher on samples/: accuracy, agreement, size, latency."""
+    paths, expected = list_clips(samples_dir)
+    clips = load_clips(paths)
+    label_index = {label.lower(): i for i, label in enumerate(labels)}
+    # Only folders named after a model label count for accuracy
+    scored = np.array([label.lower() in label_index for label in expected])
+    expected_ids = np.array([label_index.get(label.lower(), -1) for label in expected])
+
+    def accuracy(predicted):
+        return float(np.mean(predicted[scored] == expected_ids[scored])) if scored.any() else float("nan")
+
+    kws = load_model(model_name, device=device)
+    teacher_ids = kws.predict(clips).argmax(axis=1)
+    teacher_params = sum(p.numel() for p in kws.model.parameters())
+    rows = [("teacher (wav2vec2)", teacher_params * 4, accuracy(teacher_ids), 1.0,
+             median_ms(kws.predict, clips))]
+
+    for variant, path in tflite_paths.items():
+        evaluator = TFLiteEvaluator(path, batch_size=1, num_threads=1)
+        out = np.empty((1, len(labels)), dtype=np.float32)
+
+        def predict(clip):
+            # Per window: features plus one interpreter call
+            return evaluator.predict(log_mel(clip)[None], out)
+
+        student_ids = np.array([predict(clip).argmax() for clip in clips])
+        rows.append((f"student {variant}", os.path.getsize(path), accuracy(student_ids),
+                     float(np.mean(student_ids == teacher_ids)), median_ms(predict, clips)))
+
+    print("\n" + "=" * 80)
+    print(f"STUDENT VS TEACHER on {samples_dir}/ ({len(clips)} clips, {int(scored.sum())} with a known label)")
+    print("=" * 80)
+    print(f"{'Model':<20} {'Size (bytes)':>14} {'Accuracy':>9} {'Agreement':>10} {'Latency/window (ms)':>20}")
+    for name, size, acc, agreement, latency in rows:
+        print(f"{name:<20} {size:>14,} {acc:>9.2%} {agreement:>10.2%} {latency:>20.2f}")
+    print("(teacher size = fp32 parameters; agreement = same top-1 label as the teacher)")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the wav2vec2 keyword model into a log-mel CNN")
+    parser.add_argument("--corpus", help="directory with <label>/*.wav clips (required unless --report-only)")
+    parser.add_argument("--teacher", default=MODEL_NAME)
+    parser.add_argument("--device", default=TEACHER_DEVICE, help="torch device of the teacher")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--temperature", type=float, default=TEMPERATURE)
+    parser.add_argument("--variants", nargs="+", default=VARIANTS, choices=VARIANTS)
+    parser.add_argument("--report-only", action="store_true", help="skip training, report the exported student")
+    args = parser.parse_args()
+    if not args.report_only and not args.corpus:
+        parser.error("--corpus is required for training")
+
+    if not args.report_only:
+        paths, _ = list_clips(args.corpus)
+        # The report scores samples/, keep those clips out of training
+        report_clips = {os.path.realpath(path) for path in glob.glob(os.path.join(SAMPLES_DIR, "*", "*.wav"))}
+        held_out = [path for path in paths if os.path.realpath(path) in report_clips]
+        paths = [path for path in paths if os.path.realpath(path) not in report_clips]
+        if held_out:
+            print(f"Leaving out {len(held_out)} clips of {SAMPLES_DIR}/, they are used for the report")
+        if not paths:
+            parser.error(f"no clips left in {args.corpus} after leaving out {SAMPLES_DIR}/")
+        print(f"Corpus: {len(paths)} clips from {args.corpus}/")
+        clips = load_clips(paths)
+        probabilities, labels = teacher_soft_labels(paths, clips, args.teacher, device=args.device)
+
+        start = time.perf_counter()
+        features = log_mel(clips)
+        print(f"Log-mel features {features.shape} in {time.perf_counter() - start:.1f}s")
+
+        model = train_student(features, probabilities, args.epochs, args.batch_size, args.temperature)
+        os.makedirs(os.path.dirname(STUDENT_KERAS_PATH), exist_ok=True)
+        model.save(STUDENT_KERAS_PATH)
+        save_labels(labels)
+        print(f"Student saved to: {STUDENT_KERAS_PATH}")
+
+        # Calibration data for int8 are the training features
+        tflite_paths = export_variants(model, features, args.variants, STUDENT_TFLITE_PATH)
+    else:
+        labels = load_labels()
+        tflite_paths = {variant: variant_path(variant, STUDENT_TFLITE_PATH) for variant in args.variants}
+
+    report(tflite_paths, labels, args.teacher, device=args.device)
+
+
+if __name__ == "__main__":
+    main()
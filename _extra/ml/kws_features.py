@@ -0,0 +1,251 @@
+# Log-mel features for compact keyword models (see kws_distill.py).
+# 1 s clips at 16 kHz -> (FRAMES, N_MELS) log-mel spectrogram: 25 ms windows every 10 ms, 40 mel bands.
+# The same parameters must be used for training and inference, so every user imports them from here.
+#
+# log_mel() computes the features of whole clips with librosa. StreamingLogMel computes the same
+# frames incrementally for a live stream: the overlapped 1 s windows of RealTimeKeywordSpotter share
+# most of their frames, so only the FFT frames completed by each new block are computed.
+#
+# Run directly to check StreamingLogMel against librosa on samples/ and time it against per-window log_mel():
+#   python kws_features.py
+
+import argparse
+import glob
+import os
+import time
+import numpy as np
+import librosa
+from kws_model import SAMPLE_RATE
+
+N_FFT = 512
+WIN_LENGTH = 400 # 25 ms
+HOP_LENGTH = 160 # 10 ms
+N_MELS = 40
+FMIN = 20
+FMAX = SAMPLE_RATE // 2
+CLIP_SAMPLES = SAMPLE_RATE
+FRAMES = 1 + CLIP_SAMPLES // HOP_LENGTH # librosa centers frames (center=True)
+LOG_OFFSET = 1e-6
+
+
+def fix_length(audio, length=CLIP_SAMPLES):
+    """Zero-pad or crop the last axis to `length` samples."""
+    return librosa.util.fix_length(audio, size=length, axis=-1)
+
+
+def melspectrogram(audio):
+    """Power mel spectrogram of one clip (samples,) or a batch (batch, samples). Returns (..., N_MELS, frames)."""
+    return librosa.feature.melspectrogram(y=np.asarray(audio, dtype=np.float32), sr=SAMPLE_RATE, n_fft=N_FFT,
+                                          win_length=WIN_LENGTH, hop_length=HOP_LENGTH, n_mels=N_MELS,
+                                          fmin=FMIN, fmax=FMAX, power=2.0, center=True, pad_mode="constant")
+
+
+def log_mel(audio):
+    """Model input: log power mel spectrogram, time first. (samples,) -> (frames, N_MELS), batches likewise."""
+    mel = melspectrogram(audio)
+    return np.log(mel + LOG_OFFSET).swapaxes(-1, -2).astype(np.float32)
+
+
+def mel_filterbank():
+    """(N_FFT // 2 + 1, N_MELS) matrix mapping a power spectrum to mel bands, same as librosa's."""
+    return librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS, fmin=FMIN, fmax=FMAX).T
+
+
+def analysis_window():
+    """Periodic Hann window of WIN_LENGTH centred in N_FFT samples, as librosa.stft applies it."""
+    n = np.arange(WIN_LENGTH)
+    hann = 0.5 - 0.5 * np.cos(2 * np.pi * n / WIN_LENGTH)
+    window = np.zeros(N_FFT)
+    offset = (N_FFT - WIN_LENGTH) // 2
+    window[offset:offset + WIN_LENGTH] = hann
+    return window
+
+
+def dct_matrix(n_mfcc, n_mels=N_MELS):
+    """Orthonormal DCT-II matrix (n_mfcc, n_mels), as used by librosa.feature.mfcc."""
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    dct = np.sqrt(2.0 / n_mels) * np.cos(np.pi / n_mels * (n + 0.5) * k)
+    dct[0] /= np.sqrt(2.0)
+    return dct
+
+
+class StreamingLogMel:
+    """Incremental log-mel (or MFCC) frontend with the frames of log_mel().
+
+    push() appends audio of any length and computes FFT frames only for the frames it completes, all of
+    them with one vectorized rfft and one filterbank matmul. Frames go into a preallocated matrix;
+    window() returns the latest `window_frames` frames as a view into it, without copying. The view is
+    valid until the next push().
+
+    Frames are centred like librosa's (center=True): the stream starts with N_FFT // 2 zeros, and
+    flush() adds the same padding at the end. A clip pushed in any block sizes and flushed therefore
+    gives exactly log_mel(clip). Inside a running stream, frames at the edges of a window see the
+    neighbouring audio instead of zero padding.
+
+    n_mfcc: return MFCCs instead, the DCT of the dB mel spectrogram
+    (librosa.feature.mfcc(S=librosa.power_to_db(mel, top_db=None), n_mfcc=n_mfcc)).
+    """
+
+    def __init__(self, window_frames=FRAMES, n_mfcc=None, capacity_windows=4):
+        if capacity_windows < 2:
+            raise ValueError("capacity_windows must be at least 2")
+        self.window_frames = window_frames
+        self.n_mfcc = n_mfcc
+        self.num_features = n_mfcc or N_MELS
+
+        # Precomputed once: analysis window, filterbank and DCT
+        self.analysis_window = analysis_window()
+        self.mel_basis = mel_filterbank()
+        self.dct = dct_matrix(n_mfcc).T if n_mfcc else None
+
+        # One window of samples plus one FFT frame; a push is processed in pieces of at most that size,
+        # each piece completes at most frames_per_piece frames
+        piece = window_frames * HOP_LENGTH
+        frames_per_piece = piece // HOP_LENGTH + N_FFT // HOP_LENGTH + 1
+        self._samples = np.zeros(piece + N_FFT)
+        self._features = np.zeros((capacity_windows * window_frames + frames_per_piece, self.num_features),
+                                  dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Start a new stream."""
+        self._num_samples = N_FFT // 2 # centre padding before the first sample
+        self._samples[:self._num_samples] = 0
+        self._frame_start = 0 # buffer position of the next frame's first sample
+        self._num_frames = 0
+        self.total_frames = 0
+
+    @property
+    def ready(self):
+        """True once a full window of frames is available."""
+        return self._num_frames >= self.window_frames
+
+    def push(self, audio):
+        """Add samples (1D, or (n, 1) as delivered by sounddevice). Returns the number of new frames."""
+        audio = np.asarray(audio).reshape(-1)
+        new_frames = 0
+        while len(audio):
+            if self._num_samples == len(self._samples):
+                self._compact_samples()
+            take = min(len(audio), len(self._samples) - self._num_samples)
+            self._samples[self._num_samples:self._num_samples + take] = audio[:take]
+            self._num_samples += take
+            audio = audio[take:]
+            new_frames += self._compute_frames()
+        return new_frames
+
+    def flush(self):
+        """End of stream: add the centre padding after the last sample, like librosa. Returns new frames."""
+        return self.push(np.zeros(N_FFT // 2))
+
+    def window(self):
+        """Latest window_frames frames, (window_frames, num_features) view (fewer at stream start)."""
+        return self._features[max(self._num_frames - self.window_frames, 0):self._num_frames]
+
+    def _compute_frames(self):
+        available = self._num_samples - self._frame_start
+        if available < N_FFT:
+            return 0
+        count = 1 + (available - N_FFT) // HOP_LENGTH
+        if self._num_frames + count > len(self._features):
+            self._compact_features()
+
+        # All new frames at once: strided view of the samples, one rfft, one matmul
+        end = self._frame_start + N_FFT + (count - 1) * HOP_LENGTH
+        frames = np.lib.stride_tricks.sliding_window_view(self._samples[self._frame_start:end], N_FFT)[::HOP_LENGTH]
+        spectrum = np.fft.rfft(frames * self.analysis_window, axis=1)
+        mel = (spectrum.real ** 2 + spectrum.imag ** 2) @ self.mel_basis
+
+        out = self._features[self._num_frames:self._num_frames + count]
+        if self.dct is None:
+            out[:] = np.log(mel + LOG_OFFSET)
+        else:
+            out[:] = (10 * np.log10(np.maximum(mel, 1e-10))) @ self.dct
+
+        self._frame_start += count * HOP_LENGTH
+        self._num_frames += count
+        self.total_frames += count
+        return count
+
+    def _compact_samples(self):
+        # Keep only the samples of frames that are not complete yet (less than N_FFT)
+        keep = self._num_samples - self._frame_start
+        self._samples[:keep] = self._samples[self._frame_start:self._num_samples]
+        self._num_samples = keep
+        self._frame_start = 0
+
+    def _compact_features(self):
+        # Once every few windows: move the latest window to the front
+        keep = min(self._num_frames, self.window_frames)
+        self._features[:keep] = self._features[self._num_frames - keep:self._num_frames]
+        self._num_frames = keep
+
+
+def check_against_librosa(clips, blocksize, n_mfcc=None, tolerance=1e-3):
+    """Max abs difference between StreamingLogMel (blocks of `blocksize`) and librosa for every clip."""
+    frontend = StreamingLogMel(n_mfcc=n_mfcc)
+    max_diff = 0.0
+    for clip in clips:
+        frontend.reset()
+        for start in range(0, len(clip), blocksize):
+            frontend.push(clip[start:start + blocksize])
+        frontend.flush()
+
+        # float64 reference, so the comparison is not limited by float32 FFT rounding
+        mel = librosa.feature.melspectrogram(y=clip.astype(np.float64), sr=SAMPLE_RATE, n_fft=N_FFT,
+                                             win_length=WIN_LENGTH, hop_length=HOP_LENGTH, n_mels=N_MELS,
+                                             fmin=FMIN, fmax=FMAX, power=2.0, center=True, pad_mode="constant")
+        if n_mfcc:
+            reference = librosa.feature.mfcc(S=librosa.power_to_db(mel, top_db=None), n_mfcc=n_mfcc).T
+        else:
+            reference = np.log(mel + LOG_OFFSET).T
+        max_diff = max(max_diff, float(np.abs(frontend.window() - reference).max()))
+    return max_diff, max_diff <= tolerance
+
+
+def main():
+    from audio_io import read_wav
+    from kws_stream import BLOCKSIZE, window_ends
+
+    parser = argparse.ArgumentParser(description="Check and time the streaming log-mel frontend")
+    parser.add_argument("--samples-dir", default="samples")
+    parser.add_argument("--seconds", type=int, default=60, help="length of the replayed stream")
+    args = parser.parse_args()
+
+    clips = [fix_length(read_wav(path)[0]) for path in sorted(glob.glob(os.path.join(args.samples_dir, "*", "*.wav")))]
+    print(f"Checking against librosa on {len(clips)} clips from {args.samples_dir}/")
+    for n_mfcc in (None, 13):
+        for blocksize in (160, 1024, 1000, 4096):
+            max_diff, ok = check_against_librosa(clips, blocksize, n_mfcc)
+            name = f"MFCC({n_mfcc})" if n_mfcc else "log-mel"
+            print(f"  {'✅' if ok else '❌'} {name:<9} blocksize {blocksize:>5}: max abs diff {max_diff:.2e}")
+
+    # Realtime windowing: one prediction every ~0.5 s on the last second of audio
+    stream = np.tile(np.concatenate(clips), args.seconds * SAMPLE_RATE // (len(clips) * CLIP_SAMPLES) + 1)
+    stream = stream[:args.seconds * SAMPLE_RATE]
+    ends = window_ends(len(stream))
+
+    start = time.perf_counter()
+    for end in ends:
+        log_mel(stream[end - CLIP_SAMPLES:end])
+    per_window = time.perf_counter() - start
+
+    frontend = StreamingLogMel()
+    ends_set = set(ends.tolist())
+    start = time.perf_counter()
+    for end in range(BLOCKSIZE, len(stream) + 1, BLOCKSIZE):
+        frontend.push(stream[end - BLOCKSIZE:end])
+        if end in ends_set:
+            features = frontend.window() # what the model would get
+    streaming = time.perf_counter() - start
+
+    print(f"\n{args.seconds}s stream, blocksize {BLOCKSIZE}, {len(ends)} windows")
+    print(f"  log_mel() per window:   {per_window * 1000:8.1f} ms total, {per_window / len(ends) * 1000:.3f} ms/window")
+    print(f"  StreamingLogMel:        {streaming * 1000:8.1f} ms total, "
+          f"{streaming / (len(stream) // BLOCKSIZE) * 1e6:.1f} µs/block")
+    print(f"  Speedup: {per_window / streaming:.1f}x, window shape {features.shape}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Multi-process keyword spotter fleet sharing one copy of the wav2vec2 weights.
+A supervisor runs one spotter process per stream (e.g. one per sound card). Instead of every process
+loading its own fp32 copy of the model, the weights are loaded once and shared:
+
+    fork  - the supervisor loads the model (float32, float16/bfloat16 or int8 quantized), freezes the
+            garbage collector and forks the workers. Weight pages are shared copy-on-write and never
+            written, because inference only reads them. Linux (and macOS with care), not Windows.
+    mmap  - the supervisor saves the weights once to fleet_cache/, spawned workers build the model on
+            the meta device and memory-map the tensors (torch.load(mmap=True)), so all of them share the
+            page cache. Float dtypes only.
+    none  - every worker loads its own copy, for comparison.
+
+Each worker reports its unique set size (USS, memory only it uses) and proportional set size (PSS, its
+fair share of shared pages) from /proc/<pid>/smaps_rollup. The sum of PSS is the real footprint of the
+fleet, USS is roughly what one more stream costs.
+
+Usage:
+    python kws_fleet.py --workers 4                          # replay samples/ in 4 workers
+    python kws_fleet.py --workers 8 --dtype bfloat16 --share mmap
+    python kws_fleet.py --sources device:1 device:2          # one worker per sound card
+    python kws_fleet.py --sources recording.wav --share none
+"""
+
+import argparse
+import gc
+import glob
+import multiprocessing
+import os
+import queue
+import time
+import numpy as np
+from audio_io import read_wav
+from kws_model import MODEL_NAME, SAMPLE_RATE, load_model, configure_threads
+from kws_stream import BLOCKSIZE, CHUNK_SIZE, OVERLAP_SIZE, window_ends, windows
+
+SHARE_MODES = ["fork", "mmap", "none"]
+FLEET_CACHE_DIR = "fleet_cache"
+DURATION = 20.0 # seconds each worker runs before memory is measured
+REPORT_POLL = 1.0 # seconds between liveness checks while waiting for worker reports
+SAMPLES_DIR = "samples"
+
+# Model loaded by the supervisor in fork mode, inherited by the forked workers
+_shared_model = None
+
+
+def memory_info(pid):
+    """RSS, PSS, USS and shared bytes of a process from /proc/<pid>/smaps_rollup (Linux 4.14+), or None."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return None
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+    }
+
+
+def mmap_weights_path(model_name, dtype, cache_dir=FLEET_CACHE_DIR):
+    return os.path.join(cache_dir, f"{model_name.replace('/', '--')}-{dtype}.pt")
+
+
+def save_mmap_weights(model_name, dtype, cache_dir=FLEET_CACHE_DIR):
+    """Save the model's state dict once, for workers to memory-map. Returns the path."""
+    import torch
+
+    path = mmap_weights_path(model_name, dtype, cache_dir)
+    if not os.path.exists(path):
+        kws = load_model(model_name, device="cpu", dtype=dtype)
+        os.makedirs(cache_dir, exist_ok=True)
+        torch.save(kws.model.state_dict(), path)
+    return path
+
+
+def load_mmap_model(model_name, weights_path, dtype):
+    """KeywordModel whose weights are memory-mapped from weights_path instead of copied into the process."""
+    import torch
+    from transformers import Wav2Vec2Config, Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
+    from kws_model import DTYPES, KeywordModel
+
+    config = Wav2Vec2Config.from_pretrained(model_name)
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name)
+    # Build without allocating weights, then point the parameters at the mapped tensors
+    with torch.device("meta"):
+        model = Wav2Vec2ForSequenceClassification(config)
+    state_dict = torch.load(weights_path, mmap=True, weights_only=True)
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return KeywordModel(model, feature_extractor, torch.device("cpu"), DTYPES[dtype])
+
+
+def replay_windows(path, duration, realtime=True):
+    """Yield 1 s windows of a WAV file (looped to `duration`) at the realtime spotter's positions."""
+    audio, _ = read_wav(path)
+    repeats = int(np.ceil(duration * SAMPLE_RATE / len(audio)))
+    audio = np.tile(audio, repeats)[:int(duration * SAMPLE_RATE)]
+    start = time.perf_counter()
+    for end in window_ends(len(audio)):
+        if realtime:
+            # Wait until the window would have been recorded
+            delay = end / SAMPLE_RATE - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        yield windows(audio, np.array([end]))[0]
+
+
+def device_windows(device, duration):
+    """Yield 1 s windows from a sound card, with the buffering of 7_realtime_yes_detection.py."""
+    import sounddevice as sd
+
+    blocks = queue.Queue()
+    buffer = np.zeros(CHUNK_SIZE * 2, dtype=np.float32)
+    buffered = 0
+
+    def callback(indata, frames, time_info, status):
+        blocks.put(indata[:, 0].copy())
+
+    with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype=np.float32, blocksize=BLOCKSIZE,
+                        device=device, callback=callback):
+        stop_at = time.perf_counter() + duration
+        while time.perf_counter() < stop_at:
+            try:
+                block = blocks.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # Rolling buffer of at most 2 s, newest samples at the end
+            keep = min(buffered, len(buffer) - len(block))
+            buffer[len(buffer) - keep - len(block):len(buffer) - len(block)] = buffer[len(buffer) - keep:]
+            buffer[len(buffer) - len(block):] = block
+            buffered = keep + len(block)
+            if buffered >= CHUNK_SIZE:
+                yield buffer[-CHUNK_SIZE:]
+                buffered = OVERLAP_SIZE
+
+
+def get_model(share, model_name, dtype, quantize, weights_path):
+    if share == "fork":
+        return _shared_model
+    if share == "mmap":
+        return load_mmap_model(model_name, weights_path, dtype)
+    return load_model(model_name, device="cpu", dtype=dtype, quantize=quantize)
+
+
+def worker(index, source, args, weights_path, threads, results, measured):
+    """One spotter: run `source` for args.duration seconds, report, wait until memory was measured."""
+    configure_threads(threads)
+    load_start = time.perf_counter()
+    kws = get_model(args.share, args.model, args.dtype, args.quantize, weights_path)
+    load_time = time.perf_counter() - load_start
+
+    if source.startswith("device:"):
+        device = source.split(":", 1)[1]
+        stream = device_windows(int(device) if device.isdigit() else device, args.duration)
+    else:
+        stream = replay_windows(source, args.duration, realtime=not args.fast)
+
+    predictions = 0
+    busy = 0.0
+    start = time.perf_counter()
+    for window in stream:
+        predict_start = time.perf_counter()
+        kws.predict(window)
+        busy += time.perf_counter() - predict_start
+        predictions += 1
+    elapsed = time.perf_counter() - start
+
+    results.put({
+        "index": index,
+        "pid": os.getpid(),
+        "source": source,
+        "load_time": load_time,
+        "predictions": predictions,
+        "latency_ms": busy / max(predictions, 1) * 1000,
+        "windows_per_s": predictions / elapsed,
+    })
+    # Stay alive, with the model loaded, until the supervisor has read our memory
+    measured.wait(timeout=60)
+
+
+def default_sources(workers, samples_dir=SAMPLES_DIR):
+    paths = sorted(glob.glob(os.path.join(samples_dir, "*", "*.wav")))
+    if not paths:
+        raise ValueError(f"No WAV files in {samples_dir}/, pass --sources")
+    return [paths[i % len(paths)] for i in range(workers)]
+
+
+def run_fleet(args):
+    global _shared_model
+
+    sources = args.sources or default_sources(args.workers)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // len(sources))
+    weights_path = None
+
+    if args.share == "fork":
+        # Load before forking, and run no inference here: thread pools started before fork()
+        # do not survive in the children
+        _shared_model = load_model(args.model, device="cpu", dtype=args.dtype, quantize=args.quantize)
+        # Objects created so far are never collected, so the GC does not write to (and copy) their pages
+        gc.collect()
+        gc.freeze()
+        context = multiprocessing.get_context("fork")
+    else:
+        if args.share == "mmap":
+            if args.quantize:
+                raise ValueError("--share mmap supports float dtypes only, use --share fork with --quantize")
+            weights_path = save_mmap_weights(args.model, args.dtype)
+        context = multiprocessing.get_context("spawn")
+
+    supervisor_memory = memory_info(os.getpid())
+    results = context.Queue()
+    measured = context.Event()
+    processes = []
+    for index, source in enumerate(sources):
+        process = context.Process(target=worker, args=(index, source, args, weights_path, threads, results, measured))
+        process.start()
+        processes.append(process)
+
+    reports = []
+    while len(reports) < len(processes):
+        try:
+            report = results.get(timeout=REPORT_POLL)
+        except queue.Empty:
+            # A worker that died (model load failed, killed by the OOM killer, ...) never reports
+            reported = {r["index"] for r in reports}
+            dead = [(index, process.exitcode) for index, process in enumerate(processes)
+                    if index not in reported and not process.is_alive()]
+            if dead:
+                measured.set()
+                for process in processes:
+                    process.terminate()
+                    process.join()
+                details = ", ".join(f"worker {index} ({sources[index]}) exit code {code}" for index, code in dead)
+                raise RuntimeError(f"Worker(s) exited without reporting: {details}")
+            continue
+        # Measure while the worker is still running with everything loaded
+        report["memory"] = memory_info(report["pid"])
+        reports.append(report)
+    measured.set()
+    for process in processes:
+        process.join()
+    return sorted(reports, key=lambda r: r["index"]), supervisor_memory, threads
+
+
+def mb(value):
+    return f"{value / 2**20:>8.1f}" if value is not None else f"{'n/a':>8}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keyword spotter fleet sharing model weights")
+    parser.add_argument("--workers", type=int, default=4, help="number of workers when --sources is not given")
+    parser.add_argument("--sources", nargs="+",
+                        help="per worker: a WAV file replayed in real time, or device:<index or name>")
+    parser.add_argument("--share", choices=SHARE_MODES, default="fork")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16", "bfloat16"])
+    parser.add_argument("--quantize", action="store_true", help="int8 dynamic quantization (fork/none only)")
+    parser.add_argument("--threads", type=int, help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--fast", action="store_true", help="replay files as fast as possible, not in real time")
+    args = parser.parse_args()
+
+    print(f"Spotter fleet: share={args.share}, dtype={args.dtype}{', int8 quantized' if args.quantize else ''}")
+    print("=" * 60)
+    reports, supervisor_memory, threads = run_fleet(args)
+
+    print(f"\n{'Worker':>6} {'PID':>7} {'Load (s)':>9} {'Windows':>8} {'Latency (ms)':>13} "
+          f"{'RSS MB':>8} {'PSS MB':>8} {'USS MB':>8} {'Shared MB':>9}  Source")
+    for r in reports:
+        m = r["memory"] or {}
+        print(f"{r['index']:>6} {r['pid']:>7} {r['load_time']:>9.2f} {r['predictions']:>8} {r['latency_ms']:>13.1f} "
+              f"{mb(m.get('rss'))} {mb(m.get('pss'))} {mb(m.get('uss'))} {mb(m.get('shared')):>9}  {r['source']}")
+
+    measured = [r["memory"] for r in reports if r["memory"]]
+    if not measured:
+        print("\n/proc/<pid>/smaps_rollup not available, no USS/PSS (Linux only)")
+        return
+    total_pss = sum(m["pss"] for m in measured)
+    mean_uss = np.mean([m["uss"] for m in measured])
+    print(f"\nWorkers: {len(reports)}, {threads} torch thread(s) each")
+    print(f"Total PSS of the workers: {total_pss / 2**20:.1f} MB "
+          f"({total_pss / len(measured) / 2**20:.1f} MB per stream)")
+    print(f"Mean USS per worker (cost of one more stream): {mean_uss / 2**20:.1f} MB")
+    if args.share == "fork" and supervisor_memory:
+        print(f"Supervisor RSS with the shared model: {supervisor_memory['rss'] / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Shared loader for the pre-trained wav2vec2 keyword spotting model.
+# All wav2vec2 scripts load the model through here, so the model and feature extractor are
+# downloaded/loaded once per process and the label lookup is the same everywhere.
+#
+# Usage:
+#   from kws_model import load_model
+#   kws = load_model()                       # cached, later calls return the same instance
+#   kws = load_model(offline=True)           # use only the local Hugging Face cache
+#   kws = load_model(quantize=True)          # int8 dynamic quantization of Linear layers (CPU)
+#   probabilities = kws.predict(audio_data)  # (batch, num_labels)
+#   yes_class_id = kws.class_id("yes")
+
+import numpy as np
+import torch
+from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
+
+# Model from Hugging Face: https://huggingface.co/anton-l/wav2vec2-base-ft-keyword-spotting
+MODEL_NAME = "anton-l/wav2vec2-base-ft-keyword-spotting"
+SAMPLE_RATE = 16000
+
+DTYPES = {
+    "float32": torch.float32,
+    "float16": torch.float16,
+    "bfloat16": torch.bfloat16,
+}
+
+# Loaded models keyed by (model_name, device, dtype, quantize)
+_models = {}
+
+
+class KeywordModel:
+    """Loaded wav2vec2 model, feature extractor and a prebuilt label index."""
+
+    def __init__(self, model, feature_extractor, device, dtype):
+        self.model = model
+        self.feature_extractor = feature_extractor
+        self.device = device
+        self.dtype = dtype
+
+        # id2label keys are ints or strings depending on how the config was loaded.
+        # Normalise once, so callers index labels by position and never by key type.
+        num_labels = model.config.num_labels
+        id2label = {int(class_id): label for class_id, label in model.config.id2label.items()}
+        self.labels = np.array([id2label.get(i, f"class_{i}") for i in range(num_labels)])
+        self.labels_lower = np.char.lower(self.labels)
+        self.label2id = {label: i for i, label in enumerate(self.labels_lower)}
+
+    @property
+    def num_labels(self):
+        return len(self.labels)
+
+    def class_id(self, label):
+        """Return the class id of a label (case insensitive)."""
+        class_id = self.label2id.get(label.lower())
+        if class_id is None:
+            raise ValueError(f"'{label}' class not found in model labels")
+        return class_id
+
+    def label(self, class_id):
+        """Return the label of a class id."""
+        return str(self.labels[int(class_id)])
+
+    def predict(self, audio_data):
+        """Return softmax probabilities for one clip (1D) or a batch of clips (2D or list)."""
+        inputs = self.feature_extractor(
+            audio_data,
+            sampling_rate=SAMPLE_RATE,
+            return_tensors="pt",
+            padding=True
+        )
+        inputs = {k: self._to_device(v) for k, v in inputs.items()}
+
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+            predictions = torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
+
+        return predictions.cpu().numpy()
+
+    def _to_device(self, tensor):
+        # Float inputs follow the model dtype (float16/bfloat16), masks stay as they are
+        if tensor.is_floating_point():
+            return tensor.to(self.device, dtype=self.dtype)
+        return tensor.to(self.device)
+
+
+def configure_threads(num_threads=None, num_interop_threads=None):
+    """Set torch intra-op/inter-op thread pools. Applies to the whole process."""
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if num_interop_threads:
+        try:
+            torch.set_num_interop_threads(num_interop_threads)
+        except RuntimeError as e:
+            # Can be set only once and only before any inter-op parallel work started
+            print(f"Could not set inter-op threads: {e}")
+
+
+def default_device():
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def load_model(model_name=MODEL_NAME, device=None, offline=False, dtype="float32",
+               quantize=False, num_threads=None, num_interop_threads=None):
+    """Load the model and feature extractor once per process and return a cached KeywordModel.
+
+    offline: load only from the local Hugging Face cache, never touch the network.
+    dtype: "float32", "float16" or "bfloat16" (or a torch dtype).
+    quantize: int8 dynamic quantization of Linear layers. CPU and float32 only.
+    num_threads/num_interop_threads: torch thread pools, see configure_threads(). They are part of the
+    cache key, so a call with other thread settings does not silently get a model loaded with different ones.
+    """
+    configure_threads(num_threads, num_interop_threads)
+
+    device = torch.device(device) if device is not None else default_device()
+    dtype = DTYPES[dtype] if isinstance(dtype, str) else dtype
+    if quantize and (device.type != "cpu" or dtype != torch.float32):
+        raise ValueError("quantize=True requires device='cpu' and dtype='float32'")
+
+    key = (model_name, str(device), dtype, quantize, num_threads, num_interop_threads)
+    if key in _models:
+        return _models[key]
+
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name, local_files_only=offline)
+    model = Wav2Vec2ForSequenceClassification.from_pretrained(
+        model_name,
+        local_files_only=offline,
+        torch_dtype=dtype
+    )
+    model.eval()
+
+    if quantize:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    model.to(device)
+
+    _models[key] = KeywordModel(model, feature_extractor, device, dtype)
+    return _models[key]
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Bulk keyword search over long recordings.
+6_huggingface_wav2vec2.py classifies short clips one file at a time. This tool scans hours of archived
+16 kHz WAV audio:
+
+- files are streamed in blocks (audio_io.stream_wav), never loaded whole
+- 1 s windows every --hop seconds on a fixed grid, batched through the model
+- each file is split into time ranges of --range-minutes, spread over --processes worker processes;
+  windows above --threshold come back as (window, keyword, confidence) rows and runs of consecutive
+  windows are merged into one hit, also across range boundaries
+- one JSONL line per hit: file, keyword, start/end/peak time in seconds, peak confidence
+
+Reports audio hours processed per CPU hour.
+
+Usage:
+    python kws_search.py archive/*.wav --output hits.jsonl
+    python kws_search.py archive/*.wav --keywords yes go --threshold 0.8 --processes 8
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+from audio_io import stream_wav, wav_info
+from kws_model import MODEL_NAME, SAMPLE_RATE, configure_threads, load_model
+from kws_stream import CHUNK_SIZE
+
+WINDOW = CHUNK_SIZE # 1 s, as the model was trained on
+HOP = 0.5 # seconds, same overlap as the realtime scripts
+THRESHOLD = 0.7
+BATCH_SIZE = 32
+RANGE_MINUTES = 10
+OUTPUT = "keyword_hits.jsonl"
+
+# Per worker process: model and search settings, set by _init_worker
+_worker = {}
+
+
+def _init_worker(model_name, threads, quantize):
+    configure_threads(threads)
+    _worker["kws"] = load_model(model_name, device="cpu", quantize=quantize)
+
+
+def num_windows(num_frames, hop_samples, window=WINDOW):
+    """Windows on the grid k * hop_samples covering the file; the last one is zero-padded."""
+    if num_frames <= window:
+        return 1
+    return math.ceil((num_frames - window) / hop_samples) + 1
+
+
+def search_range(path, first_window, last_window, keyword_ids, threshold, hop_samples, batch_size=BATCH_SIZE):
+    """Scan windows [first_window, last_window) of one file.
+
+    Returns (rows, cpu_seconds): rows is an (m, 3) float array of (window index, keyword id, confidence)
+    for every window where a keyword is above threshold.
+    """
+    kws = _worker["kws"]
+    cpu_start = time.process_time()
+    keyword_ids = np.asarray(keyword_ids)
+    offsets = np.arange(WINDOW)
+    rows = []
+
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = first_window * hop_samples # file sample index of buffer[0]
+    next_window = first_window
+    stop = (last_window - 1) * hop_samples + WINDOW
+
+    def run(count):
+        nonlocal buffer, buffer_start, next_window
+        starts = (next_window + np.arange(count)) * hop_samples - buffer_start
+        for i in range(0, count, batch_size):
+            batch = buffer[starts[i:i + batch_size, None] + offsets]
+            confidences = kws.predict(batch)[:, keyword_ids]
+            window_idx, keyword_idx = np.nonzero(confidences > threshold)
+            if len(window_idx):
+                rows.append(np.column_stack([next_window + i + window_idx, keyword_ids[keyword_idx],
+                                             confidences[window_idx, keyword_idx]]))
+        next_window += count
+        # Drop samples no later window needs
+        drop = next_window * hop_samples - buffer_start
+        buffer = buffer[drop:]
+        buffer_start += drop
+
+    def complete_windows():
+        available = buffer_start + len(buffer) - next_window * hop_samples
+        if available < WINDOW:
+            return 0
+        return min(last_window - next_window, (available - WINDOW) // hop_samples + 1)
+
+    for block in stream_wav(path, buffer_start, stop, block_frames=batch_size * hop_samples):
+        buffer = np.concatenate([buffer, block])
+        count = complete_windows()
+        if count >= batch_size:
+            run(count)
+    # End of range, or end of file: zero-pad the last window
+    buffer = np.concatenate([buffer, np.zeros(max(0, stop - buffer_start - len(buffer)), dtype=np.float32)])
+    count = complete_windows()
+    if count:
+        run(count)
+
+    rows = np.concatenate(rows) if rows else np.zeros((0, 3))
+    return rows, time.process_time() - cpu_start
+
+
+def merge_hits(path, rows, labels, hop_samples):
+    """Merge runs of consecutive windows of the same keyword into hits, sorted by start time."""
+    hits = []
+    for keyword_id in np.unique(rows[:, 1]).astype(int):
+        keyword_rows = rows[rows[:, 1] == keyword_id]
+        keyword_rows = keyword_rows[np.argsort(keyword_rows[:, 0])]
+        windows = keyword_rows[:, 0].astype(np.int64)
+        run_starts = np.flatnonzero(np.r_[True, np.diff(windows) > 1])
+        run_ends = np.r_[run_starts[1:], len(windows)]
+        for lo, hi in zip(run_starts, run_ends):
+            peak = lo + int(np.argmax(keyword_rows[lo:hi, 2]))
+            hits.append({
+                "file": path,
+                "keyword": labels[keyword_id],
+                "start": round(windows[lo] * hop_samples / SAMPLE_RATE, 3),
+                "end": round((windows[hi - 1] * hop_samples + WINDOW) / SAMPLE_RATE, 3),
+                "peak_time": round((windows[peak] * hop_samples + WINDOW / 2) / SAMPLE_RATE, 3),
+                "confidence": round(float(keyword_rows[peak, 2]), 4),
+            })
+    return sorted(hits, key=lambda hit: hit["start"])
+
+
+def plan(paths, hop_samples, range_minutes=RANGE_MINUTES):
+    """Tasks (path, first_window, last_window) of at most range_minutes each, and audio seconds per file."""
+    windows_per_range = max(1, int(range_minutes * 60 * SAMPLE_RATE / hop_samples))
+    tasks, durations = [], {}
+    for path in paths:
+        num_frames, sample_rate, _ = wav_info(path)
+        if sample_rate != SAMPLE_RATE:
+            raise ValueError(f"{path}: {sample_rate} Hz, resample to {SAMPLE_RATE} Hz first "
+                             f"(e.g. ffmpeg -i in.wav -ar {SAMPLE_RATE} out.wav)")
+        durations[path] = num_frames / SAMPLE_RATE
+        total = num_windows(num_frames, hop_samples)
+        for first in range(0, total, windows_per_range):
+            tasks.append((path, first, min(first + windows_per_range, total)))
+    return tasks, durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk keyword search over long WAV recordings")
+    parser.add_argument("files", nargs="+", help="16 kHz 16-bit WAV files")
+    parser.add_argument("--output", default=OUTPUT)
+    parser.add_argument("--keywords", nargs="+", help="default: all model labels except _silence_/_unknown_")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--hop", type=float, default=HOP, help="seconds between window starts")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--threads", type=int, help="torch threads per process (default: cores / processes)")
+    parser.add_argument("--range-minutes", type=float, default=RANGE_MINUTES, help="audio per task")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--quantize", action="store_true", help="int8 dynamic quantization")
+    args = parser.parse_args()
+
+    hop_samples = int(args.hop * SAMPLE_RATE)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.processes)
+    tasks, durations = plan(args.files, hop_samples, args.range_minutes)
+    audio_hours = sum(durations.values()) / 3600
+
+    # Labels from the model config in this process, the model itself is loaded by the workers
+    from transformers import AutoConfig
+    config = AutoConfig.from_pretrained(args.model)
+    labels = [config.id2label[i] for i in range(config.num_labels)]
+    keywords = args.keywords or [label for label in labels if not label.startswith("_")]
+    lower = [label.lower() for label in labels]
+    unknown = [keyword for keyword in keywords if keyword.lower() not in lower]
+    if unknown:
+        parser.error(f"not in model labels: {', '.join(unknown)} (labels: {', '.join(labels)})")
+    keyword_ids = [lower.index(keyword.lower()) for keyword in keywords]
+
+    print(f"Searching {len(args.files)} file(s), {audio_hours:.2f} h of audio, for {', '.join(keywords)}")
+    print(f"{len(tasks)} task(s) on {args.processes} process(es) x {threads} thread(s)")
+    print("=" * 60)
+
+    rows = {path: [] for path in args.files}
+    cpu_seconds = 0.0
+    start = time.perf_counter()
+    task_args = [(path, first, last, keyword_ids, args.threshold, hop_samples, args.batch_size)
+                 for path, first, last in tasks]
+    if args.processes == 1:
+        _init_worker(args.model, threads, args.quantize)
+        results = (search_range(*task) for task in task_args)
+    else:
+        pool = ProcessPoolExecutor(args.processes, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(args.model, threads, args.quantize))
+        results = pool.map(search_range, *zip(*task_args))
+
+    for done, ((path, first, last), (task_rows, task_cpu)) in enumerate(zip(tasks, results), 1):
+        rows[path].append(task_rows)
+        cpu_seconds += task_cpu
+        print(f"\r  {done}/{len(tasks)} tasks", end="", flush=True)
+    if args.processes > 1:
+        pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print()
+
+    hits = 0
+    with open(args.output, "w") as f:
+        for path in args.files:
+            for hit in merge_hits(path, np.concatenate(rows[path]), labels, hop_samples):
+                f.write(json.dumps(hit) + "\n")
+                hits += 1
+
+    cpu_hours = cpu_seconds / 3600
+    print(f"\n{hits} hit(s) written to {args.output}")
+    print(f"Wall time: {elapsed:.1f}s ({audio_hours * 3600 / elapsed:.0f}x realtime)")
+    print(f"CPU time: {cpu_seconds:.1f}s, {audio_hours / cpu_hours:.1f} audio hours per CPU hour")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Offline replay of the realtime keyword spotter's windowing (7_realtime_yes_detection.py,
+# 8_realtime_go_detection_and_action.py) over recorded audio.
+#
+# The realtime scripts receive `blocksize` samples per callback, predict on the last second of audio
+# as soon as one second is buffered, then keep only the last 0.5 s. The windows therefore end on block
+# boundaries, every ceil(0.5 s / blocksize) blocks. window_ends() reproduces exactly those positions,
+# replay() runs the model on the same windows in batches, and detect() applies the threshold/cooldown
+# logic, so recordings give the same posteriors and detections as the live microphone would.
+
+import numpy as np
+from kws_model import SAMPLE_RATE
+
+BLOCKSIZE = 1024
+CHUNK_SIZE = SAMPLE_RATE # 1 s window
+OVERLAP_SIZE = SAMPLE_RATE // 2 # 0.5 s kept after each prediction
+BATCH_SIZE = 16
+
+
+def window_ends(num_samples, blocksize=BLOCKSIZE, chunk_size=CHUNK_SIZE, overlap_size=OVERLAP_SIZE):
+    """Sample positions where the realtime spotter predicts on audio[end - chunk_size:end]."""
+    ends = []
+    buffered = 0
+    # Only complete blocks arrive from the stream
+    for end in range(blocksize, num_samples + 1, blocksize):
+        buffered = min(buffered + blocksize, chunk_size * 2) # deque(maxlen=chunk_size * 2)
+        if buffered >= chunk_size:
+            ends.append(end)
+            buffered = overlap_size
+    return np.array(ends, dtype=np.int64)
+
+
+def windows(audio, ends, chunk_size=CHUNK_SIZE):
+    """Stack the windows ending at `ends` into a (len(ends), chunk_size) array."""
+    return audio[ends[:, None] - chunk_size + np.arange(chunk_size)[None, :]]
+
+
+def replay(kws, audio, blocksize=BLOCKSIZE, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE,
+           overlap_size=OVERLAP_SIZE):
+    """Run the model over the realtime windows of a recording.
+
+    Returns (times, posteriors): window end times in seconds and (num_windows, num_labels) probabilities.
+    """
+    ends = window_ends(len(audio), blocksize, chunk_size, overlap_size)
+    posteriors = np.empty((len(ends), kws.num_labels), dtype=np.float32)
+    for start in range(0, len(ends), batch_size):
+        batch_ends = ends[start:start + batch_size]
+        posteriors[start:start + len(batch_ends)] = kws.predict(windows(audio, batch_ends, chunk_size))
+    return ends / SAMPLE_RATE, posteriors
+
+
+def detect(times, confidences, threshold=0.7, cooldown=1.0):
+    """Detection times of the realtime scripts: confidence above threshold and more than `cooldown`
+    seconds after the previous detection."""
+    detections = []
+    last_detection = -np.inf
+    for t in times[confidences > threshold]:
+        if t - last_detection > cooldown:
+            detections.append(t)
+            last_detection = t
+    return np.array(detections)
@@ -0,0 +1,283 @@
+# Threshold tuning for the realtime keyword spotter from cached posteriors.
+# Tuning yes_threshold/go_threshold and detection_cooldown used to mean live microphone runs. Here the
+# labelled recordings are replayed through the spotter's windowing once (kws_stream.replay) and every
+# window's full posterior vector is cached on disk. Sweeps then only read the cache:
+#
+#   cache - replay recordings, save posteriors (float16, memory-mapped on load), window times and events
+#   sweep - for one keyword, every threshold x cooldown x smoothing setting at once: miss rate,
+#           false alarms per hour, DET/ROC curves, best operating points. No model inference.
+#
+# Labelled recordings come from a JSONL manifest, one recording per line:
+#   {"audio": "kitchen.wav", "events": [{"keyword": "yes", "start": 3.2, "end": 3.7}, ...]}
+# (recordings without keywords have "events": [], they only contribute false alarms), or from
+# --clips samples, which joins <label>/*.wav clips into one recording with a known event per clip.
+# A window ending at t covers [t - 1 s, t] and hits an event when it overlaps it.
+#
+#   python kws_tune.py cache --clips samples --output tune_cache
+#   python kws_tune.py cache --manifest recordings.jsonl --output tune_cache
+#   python kws_tune.py sweep --cache tune_cache --keyword yes --cooldowns 0.5 1 2 --smoothing 1 2 3 --plot det.png
+
+import argparse
+import glob
+import json
+import os
+import time
+import numpy as np
+import librosa
+from kws_model import MODEL_NAME, SAMPLE_RATE
+from kws_stream import BLOCKSIZE, CHUNK_SIZE, OVERLAP_SIZE, replay
+
+CACHE_DIR = "tune_cache"
+THRESHOLDS = np.round(np.arange(0.05, 1.0, 0.01), 2)
+COOLDOWNS = [0.5, 1.0, 2.0]
+SMOOTHING = [1, 2, 3] # moving average over the last n windows, 1 = as the realtime scripts do
+RECORDING_GAP = 1000.0 # seconds between recordings on the common timeline, more than any cooldown
+CLIP_GAP = 1.0 # seconds of silence between clips with --clips
+CURRENT = {"threshold": 0.7, "cooldown": 1.0, "smoothing": 1} # settings of scripts 7/8
+
+
+def clips_recording(clips_dir, gap=CLIP_GAP):
+    """Join <clips_dir>/<label>/*.wav into one recording. Returns (audio, events)."""
+    paths = sorted(glob.glob(os.path.join(clips_dir, "*", "*.wav")))
+    if not paths:
+        raise ValueError(f"No <label>/*.wav files in {clips_dir}")
+    silence = np.zeros(int(gap * SAMPLE_RATE), dtype=np.float32)
+    parts, events, position = [silence], [], len(silence)
+    for path in paths:
+        audio, _ = librosa.load(path, sr=SAMPLE_RATE)
+        events.append({"keyword": os.path.basename(os.path.dirname(path)),
+                       "start": position / SAMPLE_RATE, "end": (position + len(audio)) / SAMPLE_RATE})
+        parts += [audio, silence]
+        position += len(audio) + len(silence)
+    return np.concatenate(parts), events
+
+
+def build_cache(recordings, output=CACHE_DIR, model_name=MODEL_NAME, blocksize=BLOCKSIZE):
+    """Replay recordings [(name, audio, events)] once and save every window's posteriors to `output`."""
+    from kws_model import load_model
+
+    kws = load_model(model_name)
+    os.makedirs(output, exist_ok=True)
+    all_times, all_posteriors, meta_recordings = [], [], []
+    offset = 0.0
+    start = time.perf_counter()
+    for name, audio, events in recordings:
+        times, posteriors = replay(kws, audio, blocksize=blocksize)
+        duration = len(audio) / SAMPLE_RATE
+        print(f"  {name}: {duration:.1f}s, {len(times)} windows, {len(events)} events")
+        # One timeline for all recordings, far enough apart that no cooldown spans two of them
+        all_times.append(times + offset)
+        all_posteriors.append(posteriors.astype(np.float16))
+        meta_recordings.append({"name": name, "offset": offset, "duration": duration,
+                                "events": [dict(e, start=e["start"] + offset, end=e["end"] + offset) for e in events]})
+        offset += duration + RECORDING_GAP
+    elapsed = time.perf_counter() - start
+
+    np.save(os.path.join(output, "posteriors.npy"), np.concatenate(all_posteriors))
+    np.save(os.path.join(output, "times.npy"), np.concatenate(all_times))
+    meta = {
+        "model": model_name,
+        "labels": [str(label) for label in kws.labels],
+        "blocksize": blocksize, "chunk_size": CHUNK_SIZE, "overlap_size": OVERLAP_SIZE,
+        "recordings": meta_recordings,
+    }
+    with open(os.path.join(output, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    total = sum(r["duration"] for r in meta_recordings)
+    print(f"Cached {sum(len(t) for t in all_times)} windows of {total:.1f}s audio in {elapsed:.1f}s -> {output}/")
+
+
+def load_cache(path=CACHE_DIR):
+    """(times, posteriors (memory-mapped float16), meta)."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    times = np.load(os.path.join(path, "times.npy"))
+    posteriors = np.load(os.path.join(path, "posteriors.npy"), mmap_mode="r")
+    return times, posteriors, meta
+
+
+def smooth(confidences, times, n):
+    """Causal moving average over the last n windows, restarted at every recording boundary."""
+    if n <= 1:
+        return confidences
+    # Window index within its recording, so averages never mix two recordings
+    boundaries = np.flatnonzero(np.diff(times) > RECORDING_GAP / 2) + 1
+    position = np.arange(len(times)) - np.repeat(np.r_[0, boundaries], np.diff(np.r_[0, boundaries, len(times)]))
+    cumulative = np.r_[0.0, np.cumsum(confidences, dtype=np.float64)]
+    count = np.minimum(position + 1, n)
+    index = np.arange(len(times))
+    return (cumulative[index + 1] - cumulative[index + 1 - count]) / count
+
+
+def detections(times, confidences, thresholds, cooldown):
+    """(windows, thresholds) bool: where the spotter fires, for all thresholds at once.
+
+    Same rule as kws_stream.detect(). Only windows above the lowest threshold can fire, so the
+    sequential cooldown scan runs over those and is vectorized over the thresholds.
+    """
+    fired = np.zeros((len(times), len(thresholds)), dtype=bool)
+    last = np.full(len(thresholds), -np.inf)
+    for i in np.flatnonzero(confidences > thresholds.min()):
+        fire = (confidences[i] > thresholds) & (times[i] - last > cooldown)
+        fired[i] = fire
+        last[fire] = times[i]
+    return fired
+
+
+def event_windows(times, events, window=CHUNK_SIZE / SAMPLE_RATE):
+    """Per event, the [lo, hi) range of windows overlapping it: window end t covers [t - window, t]."""
+    starts = np.array([e["start"] for e in events])
+    ends = np.array([e["end"] for e in events])
+    lo = np.searchsorted(times, starts, side="right") # t > start
+    hi = np.searchsorted(times, ends + window, side="left") # t - window < end
+    return lo, hi
+
+
+def score(fired, times, events, keyword, total_hours):
+    """Miss rate and false alarms per hour per threshold for one keyword."""
+    targets = [e for e in events if e["keyword"].lower() == keyword]
+    others = [e for e in events if e["keyword"].lower() != keyword]
+    cumulative = np.vstack([np.zeros((1, fired.shape[1]), dtype=np.int64), np.cumsum(fired, axis=0)])
+
+    if targets:
+        lo, hi = event_windows(times, targets)
+        hits = (cumulative[hi] - cumulative[lo] > 0).sum(axis=0)
+        miss_rate = 1 - hits / len(targets)
+        # Firing inside a target event is a hit, not a false alarm
+        in_target = np.zeros(len(times) + 1, dtype=np.int64)
+        np.add.at(in_target, lo, 1)
+        np.add.at(in_target, hi, -1)
+        in_target = np.cumsum(in_target)[:-1] > 0
+    else:
+        miss_rate = np.full(fired.shape[1], np.nan)
+        in_target = np.zeros(len(times), dtype=bool)
+
+    false_alarms = fired[~in_target].sum(axis=0)
+    return {"miss_rate": miss_rate, "fa_per_hour": false_alarms / total_hours,
+            "false_alarms": false_alarms, "targets": len(targets), "other_events": len(others)}
+
+
+def sweep(times, posteriors, meta, keyword, thresholds=THRESHOLDS, cooldowns=COOLDOWNS, smoothing=SMOOTHING):
+    """Score every threshold x cooldown x smoothing setting. Returns {(cooldown, smoothing): score}."""
+    labels = [label.lower() for label in meta["labels"]]
+    if keyword not in labels:
+        raise ValueError(f"'{keyword}' not in model labels {meta['labels']}")
+    confidences = np.asarray(posteriors[:, labels.index(keyword)], dtype=np.float32)
+    events = [e for r in meta["recordings"] for e in r["events"]]
+    total_hours = sum(r["duration"] for r in meta["recordings"]) / 3600
+
+    results = {}
+    for n in smoothing:
+        smoothed = smooth(confidences, times, n)
+        for cooldown in cooldowns:
+            fired = detections(times, smoothed, thresholds, cooldown)
+            results[(cooldown, n)] = score(fired, times, events, keyword, total_hours)
+    return results
+
+
+def plot(results, thresholds, keyword, output):
+    from regression_plot import use_backend
+
+    plt = use_backend(output)
+    fig, (det, roc) = plt.subplots(1, 2, figsize=(13, 5))
+    for (cooldown, n), r in results.items():
+        label = f"cooldown {cooldown}s, smoothing {n}"
+        det.plot(r["fa_per_hour"], r["miss_rate"] * 100, label=label)
+        roc.plot(r["fa_per_hour"], (1 - r["miss_rate"]) * 100, label=label)
+    det.set(title=f"DET: '{keyword}'", xlabel="False alarms per hour", ylabel="Miss rate (%)", xscale="symlog")
+    roc.set(title=f"ROC: '{keyword}'", xlabel="False alarms per hour", ylabel="Detection rate (%)", xscale="symlog")
+    for ax in (det, roc):
+        ax.grid(True, alpha=0.3)
+    roc.legend(fontsize=8)
+    fig.tight_layout()
+    if output:
+        fig.savefig(output, dpi=120)
+        print(f"Curves saved to: {output}")
+    else:
+        plt.show()
+
+
+def report(results, thresholds, keyword, max_fa_per_hour):
+    any_result = next(iter(results.values()))
+    print(f"\n'{keyword}': {any_result['targets']} target events, {any_result['other_events']} other events")
+
+    def at(cooldown, n, threshold):
+        r = results[(cooldown, n)]
+        i = int(np.argmin(np.abs(thresholds - threshold)))
+        return r["miss_rate"][i], r["fa_per_hour"][i]
+
+    if (CURRENT["cooldown"], CURRENT["smoothing"]) in results:
+        miss, fa = at(CURRENT["cooldown"], CURRENT["smoothing"], CURRENT["threshold"])
+        print(f"Current settings (threshold {CURRENT['threshold']}, cooldown {CURRENT['cooldown']}s, no smoothing): "
+              f"miss rate {miss:.1%}, {fa:.2f} false alarms/hour")
+
+    print(f"\nBest threshold per setting with at most {max_fa_per_hour} false alarms/hour:")
+    print(f"{'Cooldown (s)':>12} {'Smoothing':>10} {'Threshold':>10} {'Miss rate':>10} {'FA/hour':>8}")
+    best = None
+    for (cooldown, n), r in results.items():
+        allowed = np.flatnonzero(r["fa_per_hour"] <= max_fa_per_hour)
+        if len(allowed) == 0:
+            print(f"{cooldown:>12} {n:>10} {'-':>10} {'-':>10} {'-':>8}")
+            continue
+        # Lowest miss rate, then the highest threshold among equals (fewest false alarms)
+        i = allowed[np.lexsort((-thresholds[allowed], r["miss_rate"][allowed]))[0]]
+        print(f"{cooldown:>12} {n:>10} {thresholds[i]:>10.2f} {r['miss_rate'][i]:>10.1%} {r['fa_per_hour'][i]:>8.2f}")
+        if best is None or r["miss_rate"][i] < best[0]:
+            best = (r["miss_rate"][i], cooldown, n, thresholds[i])
+    if best:
+        print(f"\n🎯 Recommended: threshold={best[3]:.2f}, detection_cooldown={best[1]}, smoothing={best[2]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune keyword thresholds from cached posteriors")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    cache_parser = subparsers.add_parser("cache", help="replay labelled recordings once and cache posteriors")
+    source = cache_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="JSONL with {'audio': path, 'events': [...]} per line")
+    source.add_argument("--clips", help="directory with <label>/*.wav clips, joined into one recording")
+    cache_parser.add_argument("--output", default=CACHE_DIR)
+    cache_parser.add_argument("--model", default=MODEL_NAME)
+    cache_parser.add_argument("--blocksize", type=int, default=BLOCKSIZE)
+
+    sweep_parser = subparsers.add_parser("sweep", help="sweep thresholds, cooldowns and smoothing over the cache")
+    sweep_parser.add_argument("--cache", default=CACHE_DIR)
+    sweep_parser.add_argument("--keyword", default="yes")
+    sweep_parser.add_argument("--thresholds", type=float, nargs=3, metavar=("START", "STOP", "STEP"),
+                              help="default 0.05 1.0 0.01")
+    sweep_parser.add_argument("--cooldowns", type=float, nargs="+", default=COOLDOWNS)
+    sweep_parser.add_argument("--smoothing", type=int, nargs="+", default=SMOOTHING)
+    sweep_parser.add_argument("--max-fa-per-hour", type=float, default=1.0)
+    sweep_parser.add_argument("--plot", nargs="?", const="", help="show DET/ROC curves, or save them to a file")
+    args = parser.parse_args()
+
+    if args.command == "cache":
+        if args.clips:
+            audio, events = clips_recording(args.clips)
+            recordings = [(args.clips, audio, events)]
+        else:
+            recordings = []
+            with open(args.manifest) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        audio, _ = librosa.load(entry["audio"], sr=SAMPLE_RATE)
+                        recordings.append((entry["audio"], audio, entry.get("events", [])))
+        print(f"Replaying {len(recordings)} recording(s) through the realtime windowing...")
+        build_cache(recordings, args.output, args.model, args.blocksize)
+        return
+
+    thresholds = np.round(np.arange(*args.thresholds), 4) if args.thresholds else THRESHOLDS
+    times, posteriors, meta = load_cache(args.cache)
+    start = time.perf_counter()
+    results = sweep(times, posteriors, meta, args.keyword.lower(), thresholds, args.cooldowns, args.smoothing)
+    elapsed = time.perf_counter() - start
+    settings = len(thresholds) * len(args.cooldowns) * len(args.smoothing)
+    print(f"Swept {settings} settings over {len(times)} cached windows in {elapsed * 1000:.0f} ms")
+    report(results, thresholds, args.keyword.lower(), args.max_fa_per_hour)
+    if args.plot is not None:
+        plot(results, thresholds, args.keyword.lower(), args.plot or None)
+
+
+if __name__ == "__main__":
+    main()
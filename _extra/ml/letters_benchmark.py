@@ -0,0 +1,170 @@
+# Inference benchmark for the letters model across runtimes:
+#   keras_predict - model.predict()
+#   keras_call    - model(x) directly, no predict() loop overhead
+#   tf_function   - model wrapped in a tf.function with a fixed input signature
+#   tflite        - TFLite interpreter (batched, see letters_tflite.py)
+#
+# Measures cold start (load + first prediction, each runtime in a fresh process),
+# p50/p99 latency at batch 1 and throughput at batch sizes 1..1024.
+# Results are saved as JSON tagged with the git commit, so runs can be compared between commits:
+#   python letters_benchmark.py                                   # -> benchmark_results/letters-<commit>.json
+#   python letters_benchmark.py --compare old.json new.json
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+
+RUNTIMES = ["keras_predict", "keras_call", "tf_function", "tflite"]
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+RESULTS_DIR = "benchmark_results"
+
+
+def load_runtime(runtime, batch_size=1):
+    """Load the model for a runtime and return predict(images) -> np.ndarray."""
+    import tensorflow as tf
+    from letters_model import KERAS_PATH, TFLITE_PATH
+
+    if runtime == "tflite":
+        from letters_tflite import TFLiteEvaluator
+        return TFLiteEvaluator(TFLITE_PATH, batch_size=batch_size).predict
+
+    model = tf.keras.models.load_model(KERAS_PATH)
+    if runtime == "keras_predict":
+        return lambda images: model.predict(images, batch_size=len(images), verbose=0)
+    if runtime == "keras_call":
+        return lambda images: model(images, training=False).numpy()
+    if runtime == "tf_function":
+        compiled = tf.function(lambda x: model(x, training=False),
+                               input_signature=[tf.TensorSpec([None, 28, 28], tf.float32)])
+        return lambda images: compiled(images).numpy()
+    raise ValueError(f"Unknown runtime '{runtime}', expected one of {RUNTIMES}")
+
+
+def _cold_start(runtime):
+    """Import, load and run a first prediction. Runs in a fresh process."""
+    start = time.perf_counter()
+    predict = load_runtime(runtime)
+    predict(np.zeros((1, 28, 28), dtype=np.float32))
+    return time.perf_counter() - start
+
+
+def benchmark_runtime(runtime, images, latency_runs=500, throughput_images=4096, batch_sizes=BATCH_SIZES):
+    """p50/p99 latency at batch 1 and throughput per batch size for one runtime."""
+    predict = load_runtime(runtime, batch_size=1)
+    predict(images[:1]) # warm-up
+    timings = np.empty(latency_runs)
+    for i in range(latency_runs):
+        image = images[i % len(images)][None]
+        start = time.perf_counter()
+        predict(image)
+        timings[i] = time.perf_counter() - start
+
+    throughput = {}
+    for batch_size in batch_sizes:
+        # TFLite tensors are allocated for a fixed batch, the other runtimes take any batch size
+        predict_batch = load_runtime(runtime, batch_size) if runtime == "tflite" else predict
+        batches = [images[start:start + batch_size]
+                   for start in range(0, len(images) - batch_size + 1, batch_size)]
+        predict_batch(batches[0]) # warm-up, traces new shapes
+        count = 0
+        start = time.perf_counter()
+        while count < throughput_images:
+            predict_batch(batches[(count // batch_size) % len(batches)])
+            count += batch_size
+        throughput[str(batch_size)] = count / (time.perf_counter() - start)
+
+    return {
+        "latency_p50_ms": float(np.percentile(timings, 50)) * 1000,
+        "latency_p99_ms": float(np.percentile(timings, 99)) * 1000,
+        "throughput": throughput,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return "unknown"
+
+
+def compare(old_path, new_path):
+    """Print relative change of every metric between two result files."""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"Comparing {old['commit']} -> {new['commit']} (negative latency / positive throughput is better)")
+    for runtime, new_result in new["results"].items():
+        old_result = old["results"].get(runtime)
+        if old_result is None:
+            continue
+        print(f"\n{runtime}:")
+        for metric in ["cold_start_s", "latency_p50_ms", "latency_p99_ms"]:
+            change = (new_result[metric] / old_result[metric] - 1) * 100
+            print(f"  {metric:<16} {old_result[metric]:>10.3f} -> {new_result[metric]:>10.3f} ({change:+.1f}%)")
+        for batch_size, value in new_result["throughput"].items():
+            if batch_size in old_result["throughput"]:
+                change = (value / old_result["throughput"][batch_size] - 1) * 100
+                print(f"  images/s @ {batch_size:<5} {old_result['throughput'][batch_size]:>10,.0f} -> "
+                      f"{value:>10,.0f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark letters model inference across runtimes")
+    parser.add_argument("--runtimes", nargs="+", default=RUNTIMES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--output", help=f"JSON output path (default: {RESULTS_DIR}/letters-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    import tensorflow as tf
+    from letters_data import load_mnist, to_float32
+
+    _, (val_images, _) = load_mnist()
+    val_images = to_float32(val_images)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for runtime in args.runtimes:
+        print(f"Benchmarking {runtime} ...")
+        with ctx.Pool(1) as pool:
+            cold_start = pool.apply(_cold_start, (runtime,))
+        results[runtime] = {"cold_start_s": cold_start,
+                            **benchmark_runtime(runtime, val_images, batch_sizes=args.batch_sizes)}
+
+    print(f"\n{'Runtime':<15} {'Cold start (s)':>15} {'p50 (ms)':>10} {'p99 (ms)':>10} "
+          + " ".join(f"{'bs=' + str(b):>9}" for b in args.batch_sizes))
+    for runtime, r in results.items():
+        print(f"{runtime:<15} {r['cold_start_s']:>15.3f} {r['latency_p50_ms']:>10.3f} {r['latency_p99_ms']:>10.3f} "
+              + " ".join(f"{r['throughput'][str(b)]:>9,.0f}" for b in args.batch_sizes))
+    print("(throughput columns in images/s)")
+
+    commit = git_commit()
+    output = args.output or os.path.join(RESULTS_DIR, f"letters-{commit}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "tensorflow": tf.__version__,
+            "results": results,
+        }, f, indent=2)
+    print(f"Results saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
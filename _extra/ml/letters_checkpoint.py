@@ -0,0 +1,182 @@
+# Checkpointed, resumable and incremental training for the letters model.
+#
+#   train    - train from scratch, saving model and optimizer state every N steps. Re-running the same
+#              command after the job was killed resumes from the latest checkpoint. Keras epochs cannot
+#              start mid-way, so the interrupted epoch is run again in full (from the restored weights).
+#   finetune - continue from saved_models/model-letters.keras on newly added data (.npz with `images`
+#              uint8 (N, 28, 28) and `labels` (N,)), optionally mixed with a share of the original data.
+#
+# Both modes save the Keras model and regenerate the TFLite export only if the weights actually changed.
+#
+#   python letters_checkpoint.py train --epochs 20 --every 500
+#   python letters_checkpoint.py finetune --new-data new_letters.npz --epochs 3 --replay 0.2
+
+import argparse
+import hashlib
+import json
+import os
+import numpy as np
+import tensorflow as tf
+from letters_data import load_mnist, make_dataset, SHUFFLE_BUFFER, BATCH_SIZE
+from letters_model import build_model, KERAS_PATH, TFLITE_PATH
+
+CHECKPOINT_DIR = "checkpoints/letters"
+CHECKPOINT_EVERY = 500 # steps
+MAX_TO_KEEP = 3
+
+
+class CheckpointCallback(tf.keras.callbacks.Callback):
+    """Saves the checkpoint every `every` train steps and at the end of every epoch."""
+
+    def __init__(self, manager, step, every=CHECKPOINT_EVERY):
+        super().__init__()
+        self.manager = manager
+        self.step = step
+        self.every = every
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.step.assign_add(1)
+        if int(self.step) % self.every == 0:
+            self.manager.save(checkpoint_number=int(self.step))
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.manager.save(checkpoint_number=int(self.step))
+
+
+def weights_digest(model):
+    """SHA-256 over all weights of a model."""
+    digest = hashlib.sha256()
+    for weights in model.get_weights():
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_if_changed(model, keras_path=KERAS_PATH, tflite_path=TFLITE_PATH):
+    """Save the Keras model and convert it to TFLite, unless the existing export has the same weights.
+
+    <tflite_path>.sha256 records the digest of the weights the export was built from, and of the
+    .keras and .tflite files written. Other tools (script 5, letters_quantize) overwrite the same files
+    without updating it, so the export is only kept if both files still have the recorded bytes.
+    """
+    from letters_quantize import convert
+
+    digest = weights_digest(model)
+    digest_path = tflite_path + ".sha256"
+    if os.path.exists(digest_path):
+        with open(digest_path) as f:
+            try:
+                recorded = json.load(f)
+            except ValueError: # older plain-text sidecar, export again
+                recorded = None
+        if recorded == {"weights": digest, "keras": file_digest(keras_path), "tflite": file_digest(tflite_path)}:
+            print("Weights unchanged, keeping existing Keras and TFLite export")
+            return False
+
+    print(f"Saving model in Keras format: {keras_path}")
+    model.save(keras_path)
+    print(f"Converting model to TFLite format: {tflite_path}")
+    with open(tflite_path, "wb") as f:
+        f.write(convert(model, "fp32"))
+    with open(digest_path, "w") as f:
+        json.dump({"weights": digest, "keras": file_digest(keras_path), "tflite": file_digest(tflite_path)}, f)
+        f.write("\n")
+    return True
+
+
+def train(args):
+    (training_images, training_labels), (val_images, val_labels) = load_mnist()
+    train_ds = make_dataset(training_images, training_labels, batch_size=args.batch_size,
+                            shuffle_buffer=SHUFFLE_BUFFER)
+    val_ds = make_dataset(val_images, val_labels)
+    steps_per_epoch = int(np.ceil(len(training_images) / args.batch_size))
+
+    model = build_model()
+    step = tf.Variable(0, dtype=tf.int64)
+    checkpoint = tf.train.Checkpoint(model=model, optimizer=model.optimizer, step=step)
+    manager = tf.train.CheckpointManager(checkpoint, args.checkpoint_dir, max_to_keep=MAX_TO_KEEP)
+
+    if manager.latest_checkpoint:
+        checkpoint.restore(manager.latest_checkpoint)
+        print(f"Resumed from {manager.latest_checkpoint} (step {int(step)})")
+    else:
+        print("No checkpoint found, training from scratch")
+
+    initial_epoch = int(step) // steps_per_epoch
+    # The interrupted epoch is run again in full, so count its steps again too
+    step.assign(initial_epoch * steps_per_epoch)
+    if initial_epoch >= args.epochs:
+        print(f"Training already finished ({initial_epoch} epochs)")
+    else:
+        model.fit(train_ds, epochs=args.epochs, initial_epoch=initial_epoch, validation_data=val_ds,
+                  callbacks=[CheckpointCallback(manager, step, args.every)])
+
+    export_if_changed(model)
+
+
+def finetune(args):
+    new_data = np.load(args.new_data)
+    images, labels = new_data["images"], new_data["labels"]
+    print(f"Fine-tuning {KERAS_PATH} on {len(images)} new samples from {args.new_data}")
+
+    (training_images, training_labels), (val_images, val_labels) = load_mnist()
+    if args.replay > 0:
+        # Mix in a share of the original data, so the model does not forget it
+        rng = np.random.default_rng(0)
+        size = min(int(len(images) * args.replay / (1 - args.replay)), len(training_images))
+        replay = rng.choice(len(training_images), size=size, replace=False)
+        images = np.concatenate([images, training_images[replay]])
+        labels = np.concatenate([labels, training_labels[replay]])
+        print(f"Replaying {len(replay)} original training samples")
+
+    train_ds = make_dataset(images, labels, batch_size=args.batch_size, shuffle_buffer=len(images))
+    val_ds = make_dataset(val_images, val_labels)
+
+    # The saved model keeps its optimizer state, training continues where it stopped
+    model = tf.keras.models.load_model(KERAS_PATH)
+    if args.learning_rate:
+        model.optimizer.learning_rate.assign(args.learning_rate)
+    model.fit(train_ds, epochs=args.epochs, validation_data=val_ds)
+
+    export_if_changed(model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpointed and incremental training of the letters model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="train from scratch, resume from the latest checkpoint")
+    train_parser.add_argument("--epochs", type=int, default=20)
+    train_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    train_parser.add_argument("--every", type=int, default=CHECKPOINT_EVERY, help="checkpoint every N steps")
+    train_parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+
+    finetune_parser = subparsers.add_parser("finetune", help=f"continue from {KERAS_PATH} on new data")
+    finetune_parser.add_argument("--new-data", required=True, help=".npz with `images` and `labels`")
+    finetune_parser.add_argument("--epochs", type=int, default=3)
+    finetune_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    finetune_parser.add_argument("--learning-rate", type=float, help="override the saved learning rate")
+    finetune_parser.add_argument("--replay", type=float, default=0.0,
+                                 help="share of original training data mixed into the new data (0-1)")
+
+    args = parser.parse_args()
+    if args.command == "finetune" and not 0 <= args.replay < 1:
+        parser.error("--replay must be in [0, 1)")
+    if args.command == "train":
+        train(args)
+    else:
+        finetune(args)
+
+
+if __name__ == "__main__":
+    main()
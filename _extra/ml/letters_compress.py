@@ -0,0 +1,152 @@
+# Pruning and weight clustering of the letters model to shrink its TFLite export.
+#
+#   1. Magnitude pruning - the smallest kernel weights of every Dense layer are set to zero, the sparsity
+#      grows over the fine-tuning epochs up to --sparsity. Pruned weights are kept at zero while training.
+#   2. Weight clustering - the remaining non-zero weights of every Dense kernel are clustered into
+#      --clusters shared values (k-means). While fine-tuning, every cluster is reset to the mean of its
+#      weights after each step, so the weights stay shared and zeros stay zero.
+#
+# Zeros and repeated values do not make the .tflite file smaller by themselves, but they compress well,
+# so the gzip size is what shrinks. The report compares it with the baseline export.
+#
+#   python letters_compress.py --sparsity 0.8 --clusters 16
+
+import argparse
+import gzip
+import numpy as np
+import tensorflow as tf
+from letters_data import load_mnist, make_dataset, to_float32, SHUFFLE_BUFFER
+from letters_model import KERAS_PATH, TFLITE_PATH
+from letters_quantize import convert, measure, variant_path
+
+SPARSITY = 0.8
+CLUSTERS = 16
+PRUNE_EPOCHS = 4
+CLUSTER_EPOCHS = 2
+
+
+def dense_layers(model):
+    return [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+
+
+def sparsity_schedule(final_sparsity, epoch, epochs):
+    """Polynomial (cubic) ramp from 0 to final_sparsity, prunes fast first and slows down later."""
+    return final_sparsity * (1 - (1 - (epoch + 1) / epochs) ** 3)
+
+
+class KeepPruned(tf.keras.callbacks.Callback):
+    """Re-applies the pruning masks after every train step."""
+
+    def __init__(self, masks):
+        super().__init__()
+        self.masks = masks # {layer: mask}
+
+    def on_train_batch_end(self, batch, logs=None):
+        for layer, mask in self.masks.items():
+            layer.kernel.assign(layer.kernel * mask)
+
+
+def prune(model, train_ds, val_ds, sparsity=SPARSITY, epochs=PRUNE_EPOCHS):
+    """Prune Dense kernels by magnitude, one fine-tuning epoch per sparsity step."""
+    for epoch in range(epochs):
+        target = sparsity_schedule(sparsity, epoch, epochs)
+        masks = {}
+        for layer in dense_layers(model):
+            kernel = layer.kernel.numpy()
+            threshold = np.quantile(np.abs(kernel), target)
+            masks[layer] = tf.constant(np.abs(kernel) > threshold, dtype=kernel.dtype)
+            layer.kernel.assign(kernel * masks[layer].numpy())
+        print(f"Pruning epoch {epoch + 1}/{epochs}: sparsity {target:.2f}")
+        model.fit(train_ds, epochs=1, validation_data=val_ds, callbacks=[KeepPruned(masks)], verbose=2)
+    return model
+
+
+def kmeans_1d(values, clusters, iterations=25):
+    """k-means on a 1D array with linearly initialised centroids. Returns (centroids, assignments)."""
+    centroids = np.linspace(values.min(), values.max(), clusters)
+    for _ in range(iterations):
+        assignments = np.argmin(np.abs(values[:, None] - centroids[None, :]), axis=1)
+        counts = np.bincount(assignments, minlength=clusters)
+        sums = np.bincount(assignments, weights=values, minlength=clusters)
+        # Empty clusters keep their previous centroid
+        centroids = np.where(counts > 0, sums / np.maximum(counts, 1), centroids)
+    return centroids, assignments
+
+
+class ShareClusters(tf.keras.callbacks.Callback):
+    """Resets every cluster to the mean of its weights after every train step. Zeros stay zero."""
+
+    def __init__(self, clustering):
+        super().__init__()
+        self.clustering = clustering # {layer: (nonzero_mask, assignments, clusters)}
+
+    def on_train_batch_end(self, batch, logs=None):
+        for layer, (nonzero, assignments, clusters) in self.clustering.items():
+            kernel = layer.kernel.numpy()
+            values = kernel[nonzero]
+            counts = np.bincount(assignments, minlength=clusters)
+            centroids = np.bincount(assignments, weights=values, minlength=clusters) / np.maximum(counts, 1)
+            kernel[nonzero] = centroids[assignments]
+            kernel[~nonzero] = 0
+            layer.kernel.assign(kernel)
+
+
+def cluster(model, train_ds, val_ds, clusters=CLUSTERS, epochs=CLUSTER_EPOCHS):
+    """Cluster the non-zero weights of every Dense kernel into `clusters` shared values and fine-tune."""
+    clustering = {}
+    for layer in dense_layers(model):
+        kernel = layer.kernel.numpy()
+        nonzero = kernel != 0
+        centroids, assignments = kmeans_1d(kernel[nonzero], clusters)
+        kernel[nonzero] = centroids[assignments]
+        layer.kernel.assign(kernel)
+        clustering[layer] = (nonzero, assignments, clusters)
+
+    print(f"Clustering: {clusters} shared values per Dense kernel, fine-tuning {epochs} epoch(s)")
+    model.fit(train_ds, epochs=epochs, validation_data=val_ds, callbacks=[ShareClusters(clustering)], verbose=2)
+    return model
+
+
+def gzip_size(path):
+    with open(path, "rb") as f:
+        return len(gzip.compress(f.read(), compresslevel=9))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prune and cluster the letters model, export a compressed TFLite file")
+    parser.add_argument("--sparsity", type=float, default=SPARSITY)
+    parser.add_argument("--clusters", type=int, default=CLUSTERS)
+    parser.add_argument("--prune-epochs", type=int, default=PRUNE_EPOCHS)
+    parser.add_argument("--cluster-epochs", type=int, default=CLUSTER_EPOCHS)
+    parser.add_argument("--quantize", action="store_true", help="also apply dynamic-range quantization")
+    args = parser.parse_args()
+
+    (training_images, training_labels), (val_images, val_labels) = load_mnist()
+    train_ds = make_dataset(training_images, training_labels, shuffle_buffer=SHUFFLE_BUFFER, cache="memory")
+    val_ds = make_dataset(val_images, val_labels)
+    val_images = to_float32(val_images)
+
+    model = tf.keras.models.load_model(KERAS_PATH)
+    prune(model, train_ds, val_ds, args.sparsity, args.prune_epochs)
+    cluster(model, train_ds, val_ds, args.clusters, args.cluster_epochs)
+
+    compressed_path = variant_path("compressed")
+    print(f"Converting model to TFLite format -> {compressed_path}")
+    with open(compressed_path, "wb") as f:
+        f.write(convert(model, "dynamic" if args.quantize else "fp32"))
+
+    print("\n=== Compressed Model Comparison ===")
+    print(f"{'Model':<11} {'Size (bytes)':>13} {'Gzip (bytes)':>13} {'Latency (ms)':>13} {'Accuracy':>9}")
+    results = {}
+    for name, path in [("baseline", TFLITE_PATH), ("compressed", compressed_path)]:
+        results[name] = {**measure(path, val_images, val_labels), "gzip_size": gzip_size(path)}
+        r = results[name]
+        print(f"{name:<11} {r['size']:>13,} {r['gzip_size']:>13,} {r['latency_ms']:>13.4f} {r['accuracy']:>9.4f}")
+
+    baseline, compressed = results["baseline"], results["compressed"]
+    print(f"\nGzip size reduction: {(1 - compressed['gzip_size'] / baseline['gzip_size']) * 100:.1f}%")
+    print(f"Accuracy difference: {(compressed['accuracy'] - baseline['accuracy']) * 100:+.2f} percentage points")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# tf.data input pipeline for the MNIST letters model.
+# Images stay uint8 in memory and are normalised to float32 inside the graph.
+# `images / 255.0` on the NumPy arrays creates float64 copies (8 bytes per pixel, ~376 MB for
+# the 60k training images). The pipeline keeps images as uint8, also in its cache and shuffle buffer,
+# and only holds a few float32 batches at a time.
+#
+# Run directly to compare the NumPy path of 5_ml-tf-keras-letters.py with the pipeline:
+#   python letters_data.py --epochs 3
+
+import argparse
+import sys
+import time
+import resource
+import multiprocessing
+import numpy as np
+import tensorflow as tf
+
+AUTOTUNE = tf.data.AUTOTUNE
+BATCH_SIZE = 32 # same as the model.fit() default
+SHUFFLE_BUFFER = 10000
+
+
+def load_mnist():
+    """Return (training_images, training_labels), (val_images, val_labels) as uint8 arrays."""
+    data = tf.keras.datasets.mnist
+    return data.load_data()
+
+
+def normalize(images, labels):
+    """Convert 0-255 pixels to 0-1 float32. Runs inside the tf.data graph."""
+    return tf.cast(images, tf.float32) / 255.0, labels
+
+
+def to_float32(images):
+    """NumPy equivalent of normalize() without the float64 intermediate."""
+    images = images.astype(np.float32)
+    images /= 255.0
+    return images
+
+
+def make_dataset(images, labels, batch_size=BATCH_SIZE, shuffle_buffer=None, cache=None, seed=None):
+    """Build a batched, prefetched dataset from uint8 images and integer labels.
+
+    shuffle_buffer: number of samples in the shuffle buffer, None disables shuffling (validation).
+    cache: None, "memory" or a file path for a file-backed cache (e.g. "/tmp/letters-train").
+           Cached and shuffled data stay uint8 (1 byte per pixel), normalisation runs after batching.
+    """
+    ds = tf.data.Dataset.from_tensor_slices((images, labels))
+
+    if cache:
+        ds = ds.cache() if cache == "memory" else ds.cache(cache)
+
+    if shuffle_buffer:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    # Normalise whole batches, one vectorised op per batch instead of per sample
+    ds = ds.batch(batch_size)
+    ds = ds.map(normalize, num_parallel_calls=AUTOTUNE)
+
+    return ds.prefetch(AUTOTUNE)
+
+
+def peak_memory_mb():
+    """Peak resident set size of the current process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _train(mode, epochs, batch_size, cache_path):
+    """Train the letters model with one input path. Runs in a fresh process, so the peak memory is its own."""
+    from letters_model import build_model, EpochTimer
+
+    (training_images, training_labels), (val_images, val_labels) = load_mnist()
+    model = build_model()
+    timer = EpochTimer()
+
+    if mode == "numpy":
+        # Current path of 5_ml-tf-keras-letters.py
+        training_images = training_images / 255.0
+        val_images = val_images / 255.0
+        history = model.fit(training_images, training_labels, epochs=epochs, batch_size=batch_size,
+                            validation_data=(val_images, val_labels), callbacks=[timer], verbose=0)
+    else:
+        cache = {"tfdata": None, "tfdata-memory": "memory", "tfdata-file": cache_path}[mode]
+        train_ds = make_dataset(training_images, training_labels, batch_size=batch_size,
+                                shuffle_buffer=SHUFFLE_BUFFER, cache=cache)
+        val_ds = make_dataset(val_images, val_labels, batch_size=batch_size)
+        history = model.fit(train_ds, epochs=epochs, validation_data=val_ds, callbacks=[timer], verbose=0)
+
+    return {
+        "mode": mode,
+        "peak_memory_mb": peak_memory_mb(),
+        "first_epoch_s": timer.epoch_times[0],
+        "epoch_s": float(np.median(timer.epoch_times[1:] or timer.epoch_times)),
+        "val_accuracy": history.history["val_accuracy"][-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the NumPy input path with the tf.data pipeline")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--cache-path", default="/tmp/letters-train-cache")
+    parser.add_argument("--modes", nargs="+", default=["numpy", "tfdata", "tfdata-memory", "tfdata-file"])
+    args = parser.parse_args()
+
+    # One fresh process per mode, ru_maxrss only ever grows within a process
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for mode in args.modes:
+        print(f"Training with input path: {mode} ...")
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(_train, (mode, args.epochs, args.batch_size, args.cache_path)))
+
+    print("\n=== Input Pipeline Comparison ===")
+    print(f"{'Mode':<15} {'Peak RSS (MB)':>14} {'1st epoch (s)':>14} {'Epoch (s)':>10} {'Val acc':>8}")
+    for r in results:
+        print(f"{r['mode']:<15} {r['peak_memory_mb']:>14.0f} {r['first_epoch_s']:>14.2f} "
+              f"{r['epoch_s']:>10.2f} {r['val_accuracy']:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
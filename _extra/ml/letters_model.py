@@ -0,0 +1,41 @@
+# Model definition and paths for the MNIST letters model, shared by the letters_* tools.
+# Same architecture as 5_ml-tf-keras-letters.py: Flatten -> Dense(20, relu) -> Dense(10, softmax).
+
+import time
+import tensorflow as tf
+
+KERAS_PATH = 'saved_models/model-letters.keras'
+TFLITE_PATH = 'saved_models/model-letters.tflite'
+
+HIDDEN_UNITS = 20
+NUM_CLASSES = 10
+OPT = 'adam'
+LOSS = 'sparse_categorical_crossentropy' # suitable for multiclass classification tasks
+
+
+def build_model(hidden_units=HIDDEN_UNITS, optimizer=OPT, **compile_kwargs):
+    """Build and compile the letters model."""
+    model = tf.keras.models.Sequential([tf.keras.layers.Input(shape=(28,28)),
+                                        tf.keras.layers.Flatten(),
+                                        tf.keras.layers.Dense(hidden_units, activation=tf.nn.relu),
+                                        # softmax stays float32 also under a mixed precision policy
+                                        tf.keras.layers.Dense(NUM_CLASSES, activation=tf.nn.softmax, dtype='float32')])
+
+    model.compile(optimizer=optimizer,
+                  loss=LOSS,
+                  metrics=['accuracy'],
+                  **compile_kwargs)
+    return model
+
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    """Collects wall time of every epoch in self.epoch_times (seconds)."""
+
+    def on_train_begin(self, logs=None):
+        self.epoch_times = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.epoch_times.append(time.perf_counter() - self._start)
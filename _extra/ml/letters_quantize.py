@@ -0,0 +1,139 @@
+# Post-training quantization of the letters model.
+# Exports dynamic-range, float16 and full-int8 TFLite variants next to the fp32 model and
+# reports file size, single-sample latency, batched throughput and accuracy for each of them.
+#
+#   fp32    - plain conversion, same as 5_ml-tf-keras-letters.py
+#   dynamic - int8 weights, float activations (Optimize.DEFAULT)
+#   float16 - float16 weights
+#   int8    - int8 weights and activations, int8 input/output. Calibrated with a representative
+#             dataset drawn from the training images.
+#
+# Run directly to quantize the saved Keras model:
+#   python letters_quantize.py
+
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from letters_model import KERAS_PATH, TFLITE_PATH
+from letters_tflite import TFLiteEvaluator
+
+VARIANTS = ["fp32", "dynamic", "float16", "int8"]
+CALIBRATION_SAMPLES = 500
+
+
+def representative_dataset(training_images, num_samples=CALIBRATION_SAMPLES, seed=0):
+    """Yield random training inputs (float32, images in 0-1) one by one for int8 calibration."""
+    rng = np.random.default_rng(seed)
+    indices = rng.choice(len(training_images), size=min(num_samples, len(training_images)), replace=False)
+
+    def generator():
+        for i in indices:
+            image = training_images[i:i+1].astype(np.float32)
+            if training_images.dtype == np.uint8:
+                image /= 255.0
+            yield [image]
+
+    return generator
+
+
+def convert(model, variant, training_images=None):
+    """Convert a Keras model to a TFLite flatbuffer for one of VARIANTS."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if variant == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if training_images is None:
+            raise ValueError("int8 quantization needs training images for calibration")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(training_images)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif variant != "fp32":
+        raise ValueError(f"Unknown variant '{variant}', expected one of {VARIANTS}")
+
+    return converter.convert()
+
+
+def variant_path(variant, base_path=TFLITE_PATH):
+    """saved_models/model-letters.tflite for fp32, saved_models/model-letters-<variant>.tflite otherwise."""
+    if variant == "fp32":
+        return base_path
+    root, ext = os.path.splitext(base_path)
+    return f"{root}-{variant}{ext}"
+
+
+def export_variants(model, training_images, variants=VARIANTS, base_path=TFLITE_PATH):
+    """Convert and save all variants. Returns {variant: path}."""
+    paths = {}
+    for variant in variants:
+        path = variant_path(variant, base_path)
+        print(f"Converting model to TFLite format ({variant}) -> {path}")
+        with open(path, 'wb') as f:
+            f.write(convert(model, variant, training_images))
+        paths[variant] = path
+    return paths
+
+
+def measure(path, val_images, val_labels, latency_runs=1000, batch_size=256):
+    """Size, single-sample latency (median, ms), batched throughput (images/s) and accuracy of one model."""
+    single = TFLiteEvaluator(path, batch_size=1, num_threads=1)
+    out = np.empty((1, 10), dtype=np.float32)
+    timings = np.empty(latency_runs)
+    for i in range(latency_runs):
+        image = val_images[i % len(val_images)][None]
+        start = time.perf_counter()
+        single.predict(image, out)
+        timings[i] = time.perf_counter() - start
+
+    batched = TFLiteEvaluator(path, batch_size=batch_size)
+    batched.predict(val_images[:batch_size]) # warm-up
+    start = time.perf_counter()
+    predictions = batched.predict(val_images)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "size": os.path.getsize(path),
+        "latency_ms": float(np.median(timings)) * 1000,
+        "throughput": len(val_images) / elapsed,
+        "accuracy": float(np.mean(np.argmax(predictions, axis=1) == val_labels)),
+    }
+
+
+def report(paths, val_images, val_labels, reference_accuracy):
+    """Print a size/latency/throughput/accuracy table. reference_accuracy is the Keras model accuracy."""
+    results = {variant: measure(path, val_images, val_labels) for variant, path in paths.items()}
+    fp32_size = results["fp32"]["size"] if "fp32" in results else None
+
+    print(f"\n{'Variant':<9} {'Size (bytes)':>13} {'vs fp32':>8} {'Latency (ms)':>13} "
+          f"{'Images/s':>11} {'Accuracy':>9} {'Delta (pp)':>11}")
+    for variant, r in results.items():
+        ratio = f"{r['size'] / fp32_size:.2f}x" if fp32_size else "-"
+        delta = (r['accuracy'] - reference_accuracy) * 100
+        print(f"{variant:<9} {r['size']:>13,} {ratio:>8} {r['latency_ms']:>13.4f} "
+              f"{r['throughput']:>11,.0f} {r['accuracy']:>9.4f} {delta:>+11.2f}")
+    return results
+
+
+def main():
+    from letters_data import load_mnist, to_float32
+
+    (training_images, _), (val_images, val_labels) = load_mnist()
+    val_images = to_float32(val_images)
+
+    model = tf.keras.models.load_model(KERAS_PATH)
+    keras_predictions = model.predict(val_images, batch_size=1024, verbose=0)
+    keras_accuracy = np.mean(np.argmax(keras_predictions, axis=1) == val_labels)
+    print(f"Keras model accuracy: {keras_accuracy:.4f}")
+
+    paths = export_variants(model, training_images)
+    report(paths, val_images, val_labels, keras_accuracy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# Local inference service for saved_models/model-letters.tflite.
+# Accepts 28x28 uint8 images over localhost HTTP, collects concurrent requests into micro-batches
+# (flushed when full or when the oldest request waited max_latency) and runs the batches on a pool
+# of pre-allocated TFLite interpreters.
+#
+#   python letters_server.py serve --port 8501 --max-batch 64 --max-latency-ms 2
+#   python letters_server.py load --port 8501 --concurrency 1 4 16 64
+#
+# API:
+#   POST /predict  body: N*784 raw uint8 bytes (N images, row-major 28x28)
+#                  response: {"classes": [...], "probabilities": [[...], ...]}
+#                  errors: 400 bad length, 413 more than MAX_REQUEST_IMAGES images, 500 inference failed,
+#                  all with {"error": "..."}
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+IMAGE_SIZE = 28 * 28
+PORT = 8501
+MAX_BATCH = 64
+MAX_LATENCY_MS = 2.0
+MAX_REQUEST_IMAGES = 4096 # per POST, larger bodies are rejected with 413
+
+
+class MicroBatcher:
+    """Collects single requests into batches and runs them on a pool of interpreters."""
+
+    def __init__(self, model_path, max_batch=MAX_BATCH, max_latency_ms=MAX_LATENCY_MS,
+                 num_interpreters=os.cpu_count(), num_threads=1):
+        from letters_tflite import TFLiteEvaluator
+
+        self.max_batch = max_batch
+        self.max_latency = max_latency_ms / 1000
+        self.requests = queue.Queue()
+
+        # Interpreters are allocated for max_batch once, a free one is taken per batch
+        self.interpreters = queue.Queue()
+        for _ in range(num_interpreters):
+            self.interpreters.put(TFLiteEvaluator(model_path, batch_size=max_batch, num_threads=num_threads))
+        self.executor = ThreadPoolExecutor(max_workers=num_interpreters)
+
+        self.stop_event = threading.Event()
+        self.batching_thread = threading.Thread(target=self._batching_worker, daemon=True)
+        self.batching_thread.start()
+
+    def submit(self, images):
+        """Queue (N, 28, 28) uint8 images, returns a Future with (N, 10) probabilities."""
+        future = Future()
+        self.requests.put((images, future))
+        return future
+
+    def _batching_worker(self):
+        while not self.stop_event.is_set():
+            try:
+                first = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            count = len(first[0])
+            deadline = time.perf_counter() + self.max_latency
+            while count < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                count += len(item[0])
+
+            self.executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        images = np.concatenate([item[0] for item in batch]).astype(np.float32)
+        images /= 255.0
+
+        evaluator = self.interpreters.get()
+        try:
+            probabilities = evaluator.predict(images)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self.interpreters.put(evaluator)
+
+        start = 0
+        for item_images, future in batch:
+            future.set_result(probabilities[start:start + len(item_images)])
+            start += len(item_images)
+
+    def stop(self):
+        self.stop_event.set()
+        self.batching_thread.join(timeout=2)
+        self.executor.shutdown()
+
+
+def make_handler(batcher):
+    class PredictHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # keep-alive, clients reuse their connection
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._reply(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", ""))
+            except ValueError:
+                length = -1
+            if length <= 0 or length % IMAGE_SIZE:
+                # Nothing of the body is read, so the connection cannot be reused
+                self.close_connection = True
+                self._reply(400, {"error": f"Content-Length must be N*{IMAGE_SIZE} (N uint8 images)"})
+                return
+            if length > MAX_REQUEST_IMAGES * IMAGE_SIZE:
+                self.close_connection = True
+                self._reply(413, {"error": f"at most {MAX_REQUEST_IMAGES} images per request"})
+                return
+
+            body = self.rfile.read(length)
+            if len(body) != length:
+                self.close_connection = True
+                self._reply(400, {"error": "body shorter than Content-Length"})
+                return
+
+            images = np.frombuffer(body, dtype=np.uint8).reshape(-1, 28, 28)
+            try:
+                probabilities = batcher.submit(images).result()
+            except Exception as e:
+                self._reply(500, {"error": f"inference failed: {e}"})
+                return
+            self._reply(200, {"classes": np.argmax(probabilities, axis=1).tolist(),
+                              "probabilities": probabilities.round(6).tolist()})
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass # one line per request would dominate the run time
+
+    return PredictHandler
+
+
+def serve(args):
+    batcher = MicroBatcher(args.model, args.max_batch, args.max_latency_ms, args.interpreters, args.threads)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(batcher))
+    print(f"Serving {args.model} on http://127.0.0.1:{args.port}/predict "
+          f"(max batch {args.max_batch}, max latency {args.max_latency_ms} ms, {args.interpreters} interpreters)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        server.server_close()
+        batcher.stop()
+
+
+def _client_worker(port, images, duration, latencies):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    rng = np.random.default_rng()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        body = images[rng.integers(len(images))].tobytes()
+        start = time.perf_counter()
+        connection.request("POST", "/predict", body=body,
+                           headers={"Content-Type": "application/octet-stream"})
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def load(args):
+    from letters_data import load_mnist
+
+    _, (val_images, _) = load_mnist()
+
+    print(f"{'Concurrency':>11} {'Requests/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'p99.9 (ms)':>11}")
+    for concurrency in args.concurrency:
+        latencies = [[] for _ in range(concurrency)]
+        threads = [threading.Thread(target=_client_worker, args=(args.port, val_images, args.duration, latencies[i]))
+                   for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_latencies = np.concatenate([np.array(l) for l in latencies]) * 1000
+        print(f"{concurrency:>11} {len(all_latencies) / args.duration:>11,.0f} "
+              f"{np.percentile(all_latencies, 50):>9.2f} {np.percentile(all_latencies, 99):>9.2f} "
+              f"{np.percentile(all_latencies, 99.9):>11.2f}")
+
+
+def main():
+    from letters_model import TFLITE_PATH
+
+    parser = argparse.ArgumentParser(description="Micro-batching inference service for the letters model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="run the service")
+    serve_parser.add_argument("--model", default=TFLITE_PATH)
+    serve_parser.add_argument("--port", type=int, default=PORT)
+    serve_parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    serve_parser.add_argument("--max-latency-ms", type=float, default=MAX_LATENCY_MS)
+    serve_parser.add_argument("--interpreters", type=int, default=os.cpu_count())
+    serve_parser.add_argument("--threads", type=int, default=1, help="num_threads per interpreter")
+
+    load_parser = subparsers.add_parser("load", help="load generator, reports throughput and tail latency")
+    load_parser.add_argument("--port", type=int, default=PORT)
+    load_parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16, 64])
+    load_parser.add_argument("--duration", type=float, default=10.0, help="seconds per concurrency level")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+    else:
+        load(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Hyperparameter sweep for the letters classifier.
+# Grid or random search over hidden width, epochs, batch size and optimizer, run across a process pool.
+# Every trial gets a fixed number of TF threads, so parallel trials do not oversubscribe the cores.
+# Training stops early on validation loss, the best weights are saved as .keras and converted to TFLite,
+# and accuracy, size and inference latency of the TFLite file are recorded.
+#
+#   python letters_sweep.py                          # full grid
+#   python letters_sweep.py --random 12 --threads 2  # 12 random trials, 2 threads each
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SEARCH_SPACE = {
+    "hidden_units": [10, 20, 64, 128],
+    "epochs": [20],
+    "batch_size": [32, 128],
+    "optimizer": ["adam", "sgd", "rmsprop"],
+}
+RESULTS_DIR = "sweep_results"
+PATIENCE = 3
+
+
+def grid(space):
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*space.values())]
+
+
+def random_trials(space, count, seed=0):
+    rng = random.Random(seed)
+    return [{key: rng.choice(values) for key, values in space.items()} for _ in range(count)]
+
+
+def _limit_threads(threads):
+    """Pool initializer: pin the TF thread pools of a worker process."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def run_trial(trial_id, params, results_dir):
+    """Train one trial, save its best model and TFLite export, measure the export."""
+    import tensorflow as tf
+    from letters_data import load_mnist, make_dataset, to_float32, SHUFFLE_BUFFER
+    from letters_model import build_model, EpochTimer
+    from letters_quantize import convert, measure
+
+    (training_images, training_labels), (val_images, val_labels) = load_mnist()
+    train_ds = make_dataset(training_images, training_labels, batch_size=params["batch_size"],
+                            shuffle_buffer=SHUFFLE_BUFFER)
+    val_ds = make_dataset(val_images, val_labels, batch_size=1024)
+
+    keras_path = os.path.join(results_dir, f"trial-{trial_id:03d}.keras")
+    tflite_path = os.path.join(results_dir, f"trial-{trial_id:03d}.tflite")
+
+    model = build_model(params["hidden_units"], params["optimizer"])
+    timer = EpochTimer()
+    early_stopping = tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=PATIENCE)
+    # EarlyStopping only restores the best weights when it stops early, so the best epoch is checkpointed
+    checkpoint = tf.keras.callbacks.ModelCheckpoint(keras_path, monitor="val_loss", save_best_only=True)
+    history = model.fit(train_ds, epochs=params["epochs"], validation_data=val_ds,
+                        callbacks=[early_stopping, checkpoint, timer], verbose=0)
+
+    model = tf.keras.models.load_model(keras_path)
+    with open(tflite_path, "wb") as f:
+        f.write(convert(model, "fp32"))
+
+    tflite = measure(tflite_path, to_float32(val_images), val_labels, latency_runs=200)
+    return {
+        "trial": trial_id,
+        **params,
+        "epochs_run": len(timer.epoch_times),
+        "train_s": sum(timer.epoch_times),
+        "best_val_loss": min(history.history["val_loss"]),
+        "tflite_accuracy": tflite["accuracy"],
+        "tflite_size": tflite["size"],
+        "tflite_latency_ms": tflite["latency_ms"],
+        "keras_path": keras_path,
+        "tflite_path": tflite_path,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hyperparameter sweep for the letters classifier")
+    parser.add_argument("--random", type=int, metavar="N", help="N random trials instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threads", type=int, default=1, help="TF threads per trial")
+    parser.add_argument("--workers", type=int, help="parallel trials (default: cpu_count // threads)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    trials = random_trials(SEARCH_SPACE, args.random, args.seed) if args.random else grid(SEARCH_SPACE)
+    workers = args.workers or max(1, os.cpu_count() // args.threads)
+    os.makedirs(args.results_dir, exist_ok=True)
+    print(f"Running {len(trials)} trials on {workers} workers, {args.threads} thread(s) each")
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_limit_threads,
+                             initargs=(args.threads,)) as executor:
+        futures = {executor.submit(run_trial, trial_id, params, args.results_dir): trial_id
+                   for trial_id, params in enumerate(trials)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Trial {futures[future]} failed: {e}")
+                continue
+            results.append(result)
+            print(f"Trial {result['trial']:3d} done: accuracy={result['tflite_accuracy']:.4f} "
+                  f"({result['epochs_run']} epochs, {result['train_s']:.1f}s)")
+
+    results.sort(key=lambda r: r["tflite_accuracy"], reverse=True)
+
+    print("\n=== Sweep Results (TFLite) ===")
+    print(f"{'Trial':>5} {'Hidden':>7} {'Batch':>6} {'Optimizer':>10} {'Epochs':>7} {'Train (s)':>10} "
+          f"{'Val loss':>9} {'Accuracy':>9} {'Size (bytes)':>13} {'Latency (ms)':>13}")
+    for r in results:
+        print(f"{r['trial']:>5} {r['hidden_units']:>7} {r['batch_size']:>6} {r['optimizer']:>10} "
+              f"{r['epochs_run']:>3}/{r['epochs']:<3} {r['train_s']:>10.1f} {r['best_val_loss']:>9.4f} "
+              f"{r['tflite_accuracy']:>9.4f} {r['tflite_size']:>13,} {r['tflite_latency_ms']:>13.4f}")
+
+    results_path = os.path.join(args.results_dir, "results.json")
+    with open(results_path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to: {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# Batched TFLite evaluation for saved_models/model-letters.tflite.
+# The interpreter input is resized to a batch dimension once and results are written
+# straight into a preallocated output array. TFLitePool spreads shards of the input
+# over several interpreters (invoke() releases the GIL, so plain threads are enough).
+#
+# Run directly to compare with the per-sample loop used in 5_ml-tf-keras-letters.py:
+#   python letters_tflite.py --batch-size 256 --interpreters 4 --threads 1
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import tensorflow as tf
+from letters_model import TFLITE_PATH
+
+BATCH_SIZE = 256
+
+
+def make_interpreter(model_path=TFLITE_PATH, num_threads=None, use_xnnpack=True):
+    """Create a TFLite interpreter. use_xnnpack=False disables the default XNNPACK delegate."""
+    resolver = (tf.lite.experimental.OpResolverType.AUTO if use_xnnpack
+                else tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES)
+    return tf.lite.Interpreter(model_path=model_path,
+                               num_threads=num_threads,
+                               experimental_op_resolver_type=resolver)
+
+
+class TFLiteEvaluator:
+    """Runs one interpreter over batches of images."""
+
+    def __init__(self, model_path=TFLITE_PATH, batch_size=BATCH_SIZE, num_threads=None, use_xnnpack=True):
+        self.batch_size = batch_size
+        self.interpreter = make_interpreter(model_path, num_threads, use_xnnpack)
+
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self.input_index = self.input_details['index']
+        self.output_index = self.output_details['index']
+
+        # Resize the batch dimension once, tensors are allocated for the full batch
+        input_shape = list(self.input_details['shape'])
+        self.interpreter.resize_tensor_input(self.input_index, [batch_size] + input_shape[1:])
+        self.interpreter.allocate_tensors()
+
+        self.input_shape = tuple(self.interpreter.get_input_details()[0]['shape'])
+        self.output_shape = tuple(self.interpreter.get_output_details()[0]['shape'])
+
+        # Full-integer models take int8/uint8 input and return int8/uint8 output
+        self.input_dtype = self.input_details['dtype']
+        self.input_scale, self.input_zero_point = self.input_details['quantization']
+        self.output_scale, self.output_zero_point = self.output_details['quantization']
+        self.quantized_input = self.input_dtype != np.float32
+        self.quantized_output = self.output_details['dtype'] != np.float32
+
+    def predict(self, images, out=None):
+        """Return model outputs for all images. images: (N, 28, 28) float32 in 0-1."""
+        n = len(images)
+        if out is None:
+            out = np.empty((n,) + self.output_shape[1:], dtype=np.float32)
+
+        for start in range(0, n, self.batch_size):
+            end = min(start + self.batch_size, n)
+            count = end - start
+
+            # Write into the interpreter's input buffer directly. The views returned by tensor()
+            # must not be kept around, invoke() refuses to run while they are referenced.
+            input_buffer = self.interpreter.tensor(self.input_index)()
+            if self.quantized_input:
+                input_buffer[:count] = self._quantize(images[start:end])
+            else:
+                input_buffer[:count] = images[start:end]
+            if count < self.batch_size:
+                input_buffer[count:] = 0 # last, partial batch
+            del input_buffer
+
+            self.interpreter.invoke()
+
+            output = self.interpreter.tensor(self.output_index)()[:count]
+            if self.quantized_output:
+                out[start:end] = (output.astype(np.float32) - self.output_zero_point) * self.output_scale
+            else:
+                out[start:end] = output
+            del output
+
+        return out
+
+    def _quantize(self, images):
+        info = np.iinfo(self.input_dtype)
+        quantized = np.round(images / self.input_scale + self.input_zero_point)
+        return np.clip(quantized, info.min, info.max).astype(self.input_dtype)
+
+
+class TFLitePool:
+    """Pool of TFLiteEvaluators, each predicting a contiguous shard of the input."""
+
+    def __init__(self, model_path=TFLITE_PATH, num_interpreters=os.cpu_count(), batch_size=BATCH_SIZE,
+                 num_threads=1, use_xnnpack=True):
+        self.evaluators = [TFLiteEvaluator(model_path, batch_size, num_threads, use_xnnpack)
+                           for _ in range(num_interpreters)]
+        self.executor = ThreadPoolExecutor(max_workers=num_interpreters)
+        self.output_shape = self.evaluators[0].output_shape
+
+    def predict(self, images, out=None):
+        n = len(images)
+        if out is None:
+            out = np.empty((n,) + self.output_shape[1:], dtype=np.float32)
+
+        bounds = np.linspace(0, n, len(self.evaluators) + 1).astype(int)
+        futures = [self.executor.submit(evaluator.predict, images[start:end], out[start:end])
+                   for evaluator, start, end in zip(self.evaluators, bounds[:-1], bounds[1:])
+                   if end > start]
+        for future in futures:
+            future.result()
+
+        return out
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def predict_per_sample(images, model_path=TFLITE_PATH):
+    """One set_tensor/invoke/get_tensor per image, as 5_ml-tf-keras-letters.py used to do."""
+    interpreter = tf.lite.Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+    input_details = interpreter.get_input_details()
+    output_details = interpreter.get_output_details()
+
+    predictions = []
+    for i in range(len(images)):
+        interpreter.set_tensor(input_details[0]['index'], images[i:i+1].astype(np.float32))
+        interpreter.invoke()
+        predictions.append(interpreter.get_tensor(output_details[0]['index'])[0])
+    return np.array(predictions)
+
+
+def main():
+    from letters_data import load_mnist, to_float32
+
+    parser = argparse.ArgumentParser(description="Benchmark TFLite evaluation of the letters model")
+    parser.add_argument("--model", default=TFLITE_PATH)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--interpreters", type=int, default=os.cpu_count())
+    parser.add_argument("--threads", type=int, default=1, help="num_threads per interpreter")
+    parser.add_argument("--no-xnnpack", action="store_true")
+    args = parser.parse_args()
+
+    _, (val_images, val_labels) = load_mnist()
+    val_images = to_float32(val_images)
+    use_xnnpack = not args.no_xnnpack
+
+    evaluator = TFLiteEvaluator(args.model, args.batch_size, args.threads, use_xnnpack)
+    pool = TFLitePool(args.model, args.interpreters, args.batch_size, args.threads, use_xnnpack)
+    runs = [
+        ("per-sample loop", lambda images: predict_per_sample(images, args.model)),
+        (f"batched (batch={args.batch_size}, threads={args.threads})", evaluator.predict),
+        (f"pool ({args.interpreters} interpreters)", pool.predict),
+    ]
+
+    print(f"\n=== TFLite Evaluation ({len(val_images)} images) ===")
+    for name, run in runs:
+        run(val_images[:args.batch_size]) # warm-up
+        start = time.perf_counter()
+        predictions = run(val_images)
+        elapsed = time.perf_counter() - start
+        accuracy = np.mean(np.argmax(predictions, axis=1) == val_labels)
+        print(f"{name:<40} {len(val_images) / elapsed:>12,.0f} images/s   accuracy: {accuracy:.4f}")
+
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
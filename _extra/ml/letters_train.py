@@ -0,0 +1,147 @@
+# Training configurations for the letters model.
+# Same model and data as 5_ml-tf-keras-letters.py, trained with different execution options:
+#
+#   jit_compile         - compile the train step with XLA
+#   mixed_precision     - Keras mixed precision policy. "mixed_bfloat16" is only fast on CPUs with
+#                         native bf16 (AVX512_BF16 / AMX), it is skipped elsewhere.
+#   steps_per_execution - run several train steps per tf.function call, less Python overhead per batch
+#   replicas            - split the CPU into N logical devices and train data-parallel with MirroredStrategy
+#
+# Each configuration trains in a fresh process (the precision policy and logical devices are global)
+# and reports epoch time and final accuracy:
+#   python letters_train.py --epochs 5
+#   python letters_train.py --configs baseline xla+spe --epochs 20
+
+import argparse
+import multiprocessing
+import os
+import sys
+import numpy as np
+
+# More replicas than this leave each one with only a few samples of the global batch of 32
+MAX_REPLICAS = 4
+
+CONFIGS = {
+    "baseline": {},
+    "xla": {"jit_compile": True},
+    "spe": {"steps_per_execution": 32},
+    "xla+spe": {"jit_compile": True, "steps_per_execution": 32},
+    "mixed_bf16": {"mixed_precision": "mixed_bfloat16"},
+    "xla+spe+mixed_bf16": {"jit_compile": True, "steps_per_execution": 32, "mixed_precision": "mixed_bfloat16"},
+    "mirrored": {"replicas": min(os.cpu_count() or 1, MAX_REPLICAS)},
+}
+
+
+def cpu_supports_bf16():
+    """True if the CPU has native bfloat16 instructions (Linux only, elsewhere assume no)."""
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return "avx512_bf16" in flags or "amx_bf16" in flags
+
+
+def is_supported(config):
+    if config.get("mixed_precision") == "mixed_bfloat16":
+        return cpu_supports_bf16()
+    return True
+
+
+def setup(config):
+    """Apply process-wide settings of a config. Must run before any model or tensor is created."""
+    import tensorflow as tf
+
+    replicas = config.get("replicas", 1)
+    if replicas > 1:
+        # One logical CPU device per replica, each replica then runs its own share of the batch
+        cpu = tf.config.list_physical_devices("CPU")[0]
+        tf.config.set_logical_device_configuration(
+            cpu, [tf.config.LogicalDeviceConfiguration() for _ in range(replicas)])
+
+    if config.get("mixed_precision"):
+        tf.keras.mixed_precision.set_global_policy(config["mixed_precision"])
+
+    if replicas > 1:
+        devices = [device.name for device in tf.config.list_logical_devices("CPU")]
+        return tf.distribute.MirroredStrategy(devices)
+    return tf.distribute.get_strategy() # default (no-op) strategy
+
+
+def build(config, strategy, hidden_units=None, optimizer=None):
+    """Build the letters model under the given strategy with the config's compile options."""
+    from letters_model import build_model, HIDDEN_UNITS, OPT
+
+    with strategy.scope():
+        return build_model(hidden_units or HIDDEN_UNITS,
+                           optimizer or OPT,
+                           jit_compile=config.get("jit_compile", False),
+                           steps_per_execution=config.get("steps_per_execution", 1))
+
+
+def train(name, config, epochs, batch_size):
+    """Train with one configuration. Runs in a fresh process."""
+    strategy = setup(config)
+
+    from letters_data import load_mnist, make_dataset, SHUFFLE_BUFFER
+    from letters_model import EpochTimer
+
+    (training_images, training_labels), (val_images, val_labels) = load_mnist()
+    train_ds = make_dataset(training_images, training_labels, batch_size=batch_size,
+                            shuffle_buffer=SHUFFLE_BUFFER, cache="memory")
+    val_ds = make_dataset(val_images, val_labels, batch_size=batch_size)
+
+    model = build(config, strategy)
+    timer = EpochTimer()
+    history = model.fit(train_ds, epochs=epochs, validation_data=val_ds, callbacks=[timer], verbose=0)
+
+    return {
+        "name": name,
+        "first_epoch_s": timer.epoch_times[0],
+        # The first epoch includes tracing and XLA compilation
+        "epoch_s": float(np.median(timer.epoch_times[1:] or timer.epoch_times)),
+        "accuracy": history.history["accuracy"][-1],
+        "val_accuracy": history.history["val_accuracy"][-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare training configurations of the letters model")
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=32, help="global batch size")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for name in args.configs:
+        config = CONFIGS[name]
+        if not is_supported(config):
+            print(f"Skipping {name}: no native bfloat16 support on this CPU")
+            continue
+        if config.get("replicas", 1) > args.batch_size:
+            print(f"Skipping {name}: {config['replicas']} replicas need a global batch of at least as many samples")
+            continue
+        print(f"Training with config: {name} {config} ...")
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(train, (name, config, args.epochs, args.batch_size)))
+
+    if not results:
+        print("\n❌ No configuration could run on this machine")
+        sys.exit(1)
+
+    print("\n=== Training Configuration Comparison ===")
+    print(f"{'Config':<20} {'1st epoch (s)':>14} {'Epoch (s)':>10} {'Accuracy':>9} {'Val acc':>8}")
+    for r in results:
+        print(f"{r['name']:<20} {r['first_epoch_s']:>14.2f} {r['epoch_s']:>10.2f} "
+              f"{r['accuracy']:>9.4f} {r['val_accuracy']:>8.4f}")
+
+    # Fastest configuration that does not lose more than 0.5 percentage points of validation accuracy
+    best_accuracy = max(r["val_accuracy"] for r in results)
+    candidates = [r for r in results if r["val_accuracy"] >= best_accuracy - 0.005]
+    fastest = min(candidates, key=lambda r: r["epoch_s"])
+    print(f"\nFastest configuration: {fastest['name']} {CONFIGS[fastest['name']]}")
+
+
+if __name__ == "__main__":
+    main()
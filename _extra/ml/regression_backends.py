@@ -0,0 +1,215 @@
+# One regression runner for the y = 2x - 1 problem of scripts 1-4, with interchangeable backends
+# behind the same fit/predict interface:
+#
+#   python       - lists and loops, as in 1_ml-manual.py
+#   numpy        - vectorized NumPy (regression_numpy.py)
+#   gradienttape - tf.Variable model and GradientTape, as in 2_ml-tf-gradienttape.py
+#   keras_dense  - one-unit Dense layer, as in 3_ml-tf-keras.py
+#   keras_multi  - Dense(2) -> Dense(1), as in 4_ml-tf-keras-multi.py
+#
+# All backends run full-batch gradient descent with the same learning rate, so they solve the same
+# problem the same way and only the implementation differs.
+#
+# The benchmark sweeps the dataset size and records time to converge (loss below --tolerance),
+# time per epoch and peak memory, each backend/size in a fresh process:
+#   python regression_backends.py --sizes 1000 100000 10000000
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+import numpy as np
+
+BACKENDS = ["python", "numpy", "gradienttape", "keras_dense", "keras_multi"]
+LEARNING_RATE = 0.05
+MAX_EPOCHS = 1000
+TOLERANCE = 1e-4
+PYTHON_LIMIT = 1_000_000 # the pure Python backend is skipped above this size
+
+
+class PythonBackend:
+    def fit(self, x, y, epochs=MAX_EPOCHS, learning_rate=LEARNING_RATE, tolerance=None):
+        x, y = list(map(float, x)), list(map(float, y))
+        n = len(x)
+        self.w, self.b = 0.0, 0.0
+        history = []
+        for _ in range(epochs):
+            dw = db = loss = 0.0
+            for x_val, y_val in zip(x, y):
+                error = x_val * self.w + self.b - y_val
+                loss += error * error
+                dw += error * x_val
+                db += error
+            self.w -= learning_rate * 2 * dw / n
+            self.b -= learning_rate * 2 * db / n
+            history.append((time.perf_counter(), loss / n))
+            if tolerance and loss / n < tolerance:
+                break
+        return history
+
+    def predict(self, x):
+        return np.array([x_val * self.w + self.b for x_val in x])
+
+
+class NumpyBackend:
+    def fit(self, x, y, epochs=MAX_EPOCHS, learning_rate=LEARNING_RATE, tolerance=None):
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        n = len(x)
+        self.w, self.b = 0.0, 0.0
+        error = np.empty_like(x)
+        history = []
+        for _ in range(epochs):
+            # error = x * w + b - y, without temporaries
+            np.multiply(x, self.w, out=error)
+            error += self.b
+            error -= y
+            loss = float(np.dot(error, error)) / n
+            self.w -= learning_rate * 2 * float(np.dot(error, x)) / n
+            self.b -= learning_rate * 2 * float(error.sum()) / n
+            history.append((time.perf_counter(), loss))
+            if tolerance and loss < tolerance:
+                break
+        return history
+
+    def predict(self, x):
+        return np.asarray(x) * self.w + self.b
+
+
+class GradientTapeBackend:
+    def fit(self, x, y, epochs=MAX_EPOCHS, learning_rate=LEARNING_RATE, tolerance=None):
+        import tensorflow as tf
+        from regression_tf import Model, make_train_step
+
+        self.model = Model()
+        self.model.w.assign(0.0)
+        self.model.b.assign(0.0)
+        step = make_train_step(self.model, learning_rate, mode="compiled")
+        x = tf.constant(x, dtype=tf.float32)
+        y = tf.constant(y, dtype=tf.float32)
+        history = []
+        for _ in range(epochs):
+            loss = float(step(x, y))
+            history.append((time.perf_counter(), loss))
+            if tolerance and loss < tolerance:
+                break
+        return history
+
+    def predict(self, x):
+        return self.model(np.asarray(x, dtype=np.float32)).numpy()
+
+
+class KerasBackend:
+    def __init__(self, hidden_units=None):
+        self.hidden_units = hidden_units
+
+    def fit(self, x, y, epochs=MAX_EPOCHS, learning_rate=LEARNING_RATE, tolerance=None):
+        from tensorflow import keras
+
+        layers = [keras.layers.Input(shape=[1])]
+        if self.hidden_units:
+            layers.append(keras.layers.Dense(units=self.hidden_units))
+        layers.append(keras.layers.Dense(units=1))
+        self.model = keras.Sequential(layers)
+        self.model.compile(optimizer=keras.optimizers.SGD(learning_rate), loss='mean_squared_error')
+
+        history = []
+
+        class Record(keras.callbacks.Callback):
+            def on_epoch_end(self, epoch, logs=None):
+                history.append((time.perf_counter(), logs["loss"]))
+                if tolerance and logs["loss"] < tolerance:
+                    self.model.stop_training = True
+
+        x = np.asarray(x, dtype=np.float32)
+        self.model.fit(x, np.asarray(y, dtype=np.float32), epochs=epochs, batch_size=len(x),
+                       shuffle=False, callbacks=[Record()], verbose=0)
+        return history
+
+    def predict(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        return self.model.predict(x, batch_size=max(len(x), 1), verbose=0)[:, 0]
+
+
+def make_backend(name):
+    if name == "python":
+        return PythonBackend()
+    if name == "numpy":
+        return NumpyBackend()
+    if name == "gradienttape":
+        return GradientTapeBackend()
+    if name == "keras_dense":
+        return KerasBackend()
+    if name == "keras_multi":
+        return KerasBackend(hidden_units=2)
+    raise ValueError(f"Unknown backend '{name}', expected one of {BACKENDS}")
+
+
+def make_data(n, seed=0):
+    """n samples of y = 2x - 1, x in the range of the scripts' data (-1..4)."""
+    rng = np.random.default_rng(seed)
+    x = rng.uniform(-1.0, 4.0, n)
+    return x, 2 * x - 1
+
+
+def peak_memory_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _run(name, n, epochs, learning_rate, tolerance):
+    """Fit one backend on n samples. Runs in a fresh process, so the peak memory is its own."""
+    x, y = make_data(n)
+    backend = make_backend(name)
+    baseline_memory = peak_memory_mb()
+    start = time.perf_counter()
+    history = backend.fit(x, y, epochs, learning_rate, tolerance)
+
+    times = np.array([t for t, _ in history]) - start
+    losses = np.array([loss for _, loss in history])
+    converged = np.nonzero(losses < tolerance)[0]
+    prediction = float(backend.predict(np.array([10.0]))[0])
+    return {
+        "backend": name,
+        "n": n,
+        "epochs": len(history),
+        "time_to_converge_s": float(times[converged[0]]) if len(converged) else None,
+        # First epoch includes tracing/graph building, leave it out of the per-epoch time
+        "epoch_s": float(np.median(np.diff(times))) if len(times) > 1 else float(times[0]),
+        "peak_memory_mb": peak_memory_mb(),
+        "fit_memory_mb": peak_memory_mb() - baseline_memory,
+        "final_loss": float(losses[-1]),
+        "prediction_10": prediction,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare regression backends across dataset sizes")
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    parser.add_argument("--sizes", nargs="+", type=int, default=[6, 1000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--epochs", type=int, default=MAX_EPOCHS)
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for n in args.sizes:
+        for name in args.backends:
+            if name == "python" and n > PYTHON_LIMIT:
+                continue
+            print(f"Fitting {name} on {n:,} samples ...")
+            with ctx.Pool(1) as pool:
+                results.append(pool.apply(_run, (name, n, args.epochs, args.learning_rate, args.tolerance)))
+
+    print(f"\n{'Backend':<13} {'N':>11} {'Epochs':>7} {'Converge (s)':>13} {'Epoch (ms)':>11} "
+          f"{'Peak RSS (MB)':>14} {'Fit mem (MB)':>13} {'f(10)':>8}")
+    for r in results:
+        converge = f"{r['time_to_converge_s']:.3f}" if r['time_to_converge_s'] is not None else "-"
+        print(f"{r['backend']:<13} {r['n']:>11,} {r['epochs']:>7} {converge:>13} {r['epoch_s'] * 1000:>11.3f} "
+              f"{r['peak_memory_mb']:>14.0f} {r['fit_memory_mb']:>13.0f} {r['prediction_10']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
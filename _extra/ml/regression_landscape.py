@@ -0,0 +1,131 @@
+# Loss landscape of the linear regression y = x * w + b over a grid of (w, b).
+# MSE is computed from precomputed statistics of the data (n, means and centered sums Sxx, Sxy, Syy, see
+# regression_numpy.SufficientStats), so every grid point costs O(1) no matter how large the dataset is.
+# The grid is evaluated in blocks of rows to bound memory for very dense grids.
+# The gradient descent trajectory of 2_ml-tf-gradienttape.py (w=10, b=10, learning rate 0.14, 50 epochs)
+# is drawn on top of the contour plot.
+#
+#   python regression_landscape.py                      # data of scripts 1 and 2, interactive plot
+#   python regression_landscape.py --output landscape.png
+#   python regression_landscape.py --file data.bin --learning-rate 0.01
+
+import argparse
+import sys
+import numpy as np
+from regression_numpy import SufficientStats, stream_stats, open_memmap
+
+# Training data of 1_ml-manual.py and 2_ml-tf-gradienttape.py
+XS = [-1.0, 0.0, 1.0, 2.0, 3.0, 4.0]
+YS = [-3.0, -1.0, 1.0, 3.0, 5.0, 7.0]
+
+INITIAL_W = 10.0
+INITIAL_B = 10.0
+LEARNING_RATE = 0.14
+EPOCHS = 50
+GRID_CHUNK_ROWS = 256
+
+
+def landscape(stats, ws, bs, chunk_rows=GRID_CHUNK_ROWS):
+    """MSE for every (b, w) pair. Returns an array of shape (len(bs), len(ws))."""
+    losses = np.empty((len(bs), len(ws)))
+    w_row = ws[None, :]
+    for start in range(0, len(bs), chunk_rows):
+        b_block = bs[start:start + chunk_rows, None]
+        losses[start:start + chunk_rows] = stats.mse(w_row, b_block)
+    # The data of scripts 1/2 lie exactly on a line, so the minimum is 0 and rounding can land a hair
+    # below it; the log-scale contour plot needs losses >= 0
+    return np.maximum(losses, 0, out=losses)
+
+
+def landscape_direct(x, y, ws, bs, chunk_size=4096):
+    """Reference implementation: residuals of every sample for every grid point, data processed in chunks.
+    Costs O(n) per grid point, useful to check landscape() on small data."""
+    sums = np.zeros((len(bs), len(ws)))
+    for start in range(0, len(x), chunk_size):
+        xc = np.asarray(x[start:start + chunk_size])[:, None, None]
+        yc = np.asarray(y[start:start + chunk_size])[:, None, None]
+        residuals = xc * ws[None, None, :] + bs[None, :, None] - yc
+        sums += np.einsum("nij,nij->ij", residuals, residuals)
+    return sums / len(x)
+
+
+def gradient_descent(stats, w=INITIAL_W, b=INITIAL_B, learning_rate=LEARNING_RATE, epochs=EPOCHS):
+    """Full-batch gradient descent as in 2_ml-tf-gradienttape.py, gradients from the statistics.
+    Returns the visited (list_w, list_b): the start and the parameters after every epoch. A learning rate
+    too large for the data makes them overflow to inf/nan."""
+    ex, ey, exx, exy, _ = stats.moments()
+    list_w, list_b = [w], [b]
+    with np.errstate(over="ignore", invalid="ignore"):
+        for _ in range(epochs):
+            dw = 2 * (w * exx + b * ex - exy)
+            db = 2 * (w * ex + b - ey)
+            w, b = w - learning_rate * dw, b - learning_rate * db
+            list_w.append(w)
+            list_b.append(b)
+    return np.array(list_w), np.array(list_b)
+
+
+def plot(stats, list_w, list_b, resolution=400, output=None):
+    import matplotlib
+    if output:
+        matplotlib.use("Agg") # headless, write to file
+    import matplotlib.pyplot as plt
+
+    w_opt, b_opt = stats.fit()
+    # Grid around the optimum that also covers the whole trajectory
+    w_span = max(np.abs(list_w - w_opt).max(), 1.0) * 1.2
+    b_span = max(np.abs(list_b - b_opt).max(), 1.0) * 1.2
+    ws = np.linspace(w_opt - w_span, w_opt + w_span, resolution)
+    bs = np.linspace(b_opt - b_span, b_opt + b_span, resolution)
+    losses = landscape(stats, ws, bs)
+
+    plt.figure(figsize=(10, 8))
+    levels = np.geomspace(max(losses.min(), 1e-6), losses.max(), 30)
+    contour = plt.contourf(ws, bs, losses, levels=levels, cmap='viridis', norm=matplotlib.colors.LogNorm())
+    plt.colorbar(contour, label='MSE (log scale)')
+    plt.contour(ws, bs, losses, levels=levels, colors='white', linewidths=0.3, alpha=0.5)
+
+    plt.plot(list_w, list_b, color='red', marker='o', markersize=3, linewidth=1.5, label='Gradient descent')
+    plt.scatter([list_w[0]], [list_b[0]], color='orange', s=100, zorder=3, label=f'Start ({list_w[0]:.1f}, {list_b[0]:.1f})')
+    plt.scatter([w_opt], [b_opt], color='white', marker='*', s=250, zorder=3, label=f'Optimum ({w_opt:.2f}, {b_opt:.2f})')
+
+    plt.title('Loss Landscape of y = x * w + b', fontsize=16, fontweight='bold')
+    plt.xlabel('w', fontsize=12)
+    plt.ylabel('b', fontsize=12)
+    plt.legend(fontsize=11)
+    plt.tight_layout()
+
+    if output:
+        plt.savefig(output, dpi=150)
+        print(f"Plot saved to: {output}")
+    else:
+        plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loss landscape with the gradient descent trajectory")
+    parser.add_argument("--file", help="file of interleaved float64 (x, y) pairs (default: data of scripts 1/2)")
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--resolution", type=int, default=400, help="grid points per axis")
+    parser.add_argument("--output", help="write the plot to a PNG/SVG file instead of showing it")
+    args = parser.parse_args()
+
+    if args.file:
+        stats = stream_stats(*open_memmap(args.file))
+    else:
+        stats = SufficientStats.from_arrays(XS, YS)
+
+    list_w, list_b = gradient_descent(stats, learning_rate=args.learning_rate, epochs=args.epochs)
+    finite = np.isfinite(list_w) & np.isfinite(list_b)
+    if not finite.all():
+        print(f"❌ Gradient descent diverged: w/b not finite after epoch {int(np.argmin(finite))} "
+              f"with learning rate {args.learning_rate}, try a smaller --learning-rate")
+        sys.exit(1)
+    print(f"Gradient descent after {args.epochs} epochs: w={list_w[-1]:.4f} b={list_b[-1]:.4f}, "
+          f"loss={stats.mse(list_w[-1], list_b[-1]):.4f}")
+    plot(stats, list_w, list_b, args.resolution, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# Vectorized NumPy version of the manual regression in 1_ml-manual.py (y = x * w + b).
+#
+#   predict/mse/rmse  - whole-array operations instead of Python loops over lists
+#   fit_closed_form   - least-squares w and b in one pass, no guessing
+#   SufficientStats   - n, means and centered sums of x, y. Built chunk by chunk (e.g. from a memory-mapped
+#                       file larger than RAM), merged across chunks, and enough to get the closed-form
+#                       solution and the MSE of any (w, b) in O(1).
+#
+# Run directly to compare the list-based loops with the vectorized version as N grows:
+#   python regression_numpy.py
+#   python regression_numpy.py --file data.bin --generate 100000000   # streaming fit over a memmap
+
+import argparse
+import math
+import os
+import time
+import numpy as np
+
+CHUNK_SIZE = 1_000_000
+
+
+def predict(x, w, b):
+    return x * w + b
+
+
+def mse(y_pred, y):
+    error = y_pred - y
+    return float(np.dot(error, error)) / len(error)
+
+
+def rmse(y_pred, y):
+    return math.sqrt(mse(y_pred, y))
+
+
+def fit_closed_form(x, y):
+    """Least-squares w and b for in-memory arrays."""
+    x_mean, y_mean = x.mean(), y.mean()
+    dx = x - x_mean
+    sxx = np.dot(dx, dx)
+    if sxx == 0:
+        raise ValueError("x is constant, the slope w is undetermined")
+    w = float(np.dot(dx, y - y_mean) / sxx)
+    b = float(y_mean - w * x_mean)
+    return w, b
+
+
+class SufficientStats:
+    """Count, means and centered sums of squares/products of (x, y).
+
+    Centered sums are merged with Chan's parallel formula, which stays accurate for large N where the
+    raw sums (Σx², Σxy) would lose precision to cancellation.
+    """
+
+    def __init__(self, n=0, x_mean=0.0, y_mean=0.0, sxx=0.0, sxy=0.0, syy=0.0):
+        self.n = n
+        self.x_mean, self.y_mean = x_mean, y_mean
+        self.sxx, self.sxy, self.syy = sxx, sxy, syy
+
+    @classmethod
+    def from_arrays(cls, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        x_mean, y_mean = x.mean(), y.mean()
+        dx, dy = x - x_mean, y - y_mean
+        return cls(len(x), x_mean, y_mean, np.dot(dx, dx), np.dot(dx, dy), np.dot(dy, dy))
+
+    def merge(self, other):
+        """Combine with the statistics of another chunk."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+        n = self.n + other.n
+        delta_x = other.x_mean - self.x_mean
+        delta_y = other.y_mean - self.y_mean
+        factor = self.n * other.n / n
+        return SufficientStats(
+            n,
+            self.x_mean + delta_x * other.n / n,
+            self.y_mean + delta_y * other.n / n,
+            self.sxx + other.sxx + delta_x * delta_x * factor,
+            self.sxy + other.sxy + delta_x * delta_y * factor,
+            self.syy + other.syy + delta_y * delta_y * factor,
+        )
+
+    def moments(self):
+        """Raw moments E[x], E[y], E[x²], E[xy], E[y²]."""
+        return (self.x_mean, self.y_mean,
+                self.sxx / self.n + self.x_mean ** 2,
+                self.sxy / self.n + self.x_mean * self.y_mean,
+                self.syy / self.n + self.y_mean ** 2)
+
+    def fit(self):
+        """Closed-form least-squares (w, b)."""
+        if self.sxx == 0:
+            raise ValueError("x is constant, the slope w is undetermined")
+        w = self.sxy / self.sxx
+        return w, self.y_mean - w * self.x_mean
+
+    def mse(self, w, b):
+        """MSE of y = x * w + b over all data seen, in O(1). w and b can also be NumPy arrays.
+
+        Uses the centered sums, not the raw moments, so it does not cancel to noise (or below zero) for
+        large N or data far from the origin.
+        """
+        offset = w * self.x_mean + b - self.y_mean # mean error
+        return (self.syy - 2 * w * self.sxy + w * w * self.sxx) / self.n + offset * offset
+
+
+def stream_stats(x, y, chunk_size=CHUNK_SIZE):
+    """Accumulate SufficientStats chunk by chunk. x and y can be memory-mapped arrays."""
+    stats = SufficientStats()
+    for start in range(0, len(x), chunk_size):
+        stats = stats.merge(SufficientStats.from_arrays(x[start:start + chunk_size], y[start:start + chunk_size]))
+    return stats
+
+
+def open_memmap(path, dtype=np.float64):
+    """Open a file of interleaved (x, y) pairs. Returns memory-mapped x and y views."""
+    data = np.memmap(path, dtype=dtype, mode="r").reshape(-1, 2)
+    return data[:, 0], data[:, 1]
+
+
+def generate_file(path, n, w=2.0, b=-1.0, noise=0.5, dtype=np.float64, chunk_size=CHUNK_SIZE, seed=0):
+    """Write n noisy samples of y = x * w + b as interleaved (x, y) pairs, chunk by chunk."""
+    rng = np.random.default_rng(seed)
+    data = np.memmap(path, dtype=dtype, mode="w+", shape=(n, 2))
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        x = rng.uniform(-10, 10, end - start)
+        data[start:end, 0] = x
+        data[start:end, 1] = x * w + b + rng.normal(0, noise, end - start)
+    data.flush()
+    del data
+
+
+def rmse_lists(x, y, w, b):
+    """The list-based loops of 1_ml-manual.py."""
+    y_pred = []
+    for x_val in x:
+        y_pred.append(x_val * w + b)
+    individual_losses = []
+    for i in range(len(x)):
+        individual_losses.append((y_pred[i] - y[i]) ** 2)
+    return math.sqrt(sum(individual_losses) / len(individual_losses))
+
+
+def benchmark(sizes, list_limit=1_000_000, w=3.0, b=1.0):
+    rng = np.random.default_rng(0)
+    print(f"{'N':>12} {'Lists (s)':>11} {'NumPy (s)':>11} {'Speed-up':>9} {'Closed form (s)':>16}")
+    for n in sizes:
+        x = rng.uniform(-10, 10, n)
+        y = 2 * x - 1 + rng.normal(0, 0.5, n)
+
+        start = time.perf_counter()
+        rmse(predict(x, w, b), y)
+        numpy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fit_closed_form(x, y)
+        closed_form_time = time.perf_counter() - start
+
+        if n <= list_limit:
+            x_list, y_list = x.tolist(), y.tolist()
+            start = time.perf_counter()
+            rmse_lists(x_list, y_list, w, b)
+            list_time = time.perf_counter() - start
+            print(f"{n:>12,} {list_time:>11.4f} {numpy_time:>11.4f} {list_time / numpy_time:>8.0f}x "
+                  f"{closed_form_time:>16.4f}")
+        else:
+            print(f"{n:>12,} {'-':>11} {numpy_time:>11.4f} {'-':>9} {closed_form_time:>16.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized regression engine and benchmark")
+    parser.add_argument("--sizes", nargs="+", type=int,
+                        default=[10 ** e for e in range(2, 8)] + [30_000_000])
+    parser.add_argument("--file", help="fit a file of interleaved float64 (x, y) pairs by streaming")
+    parser.add_argument("--generate", type=int, metavar="N", help="first write N synthetic samples to --file")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.file:
+        if args.generate:
+            print(f"Generating {args.generate:,} samples of y = 2x - 1 into {args.file} ...")
+            generate_file(args.file, args.generate, chunk_size=args.chunk_size)
+        x, y = open_memmap(args.file)
+        start = time.perf_counter()
+        stats = stream_stats(x, y, args.chunk_size)
+        elapsed = time.perf_counter() - start
+        w, b = stats.fit()
+        print(f"Streamed {stats.n:,} samples ({os.path.getsize(args.file) / 1e9:.2f} GB) in {elapsed:.2f}s")
+        print(f"Closed form: w={w:.4f} b={b:.4f}, RMSE={math.sqrt(stats.mse(w, b)):.4f}")
+        return
+
+    benchmark(args.sizes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# Online regressors for an unbounded stream of (x, y) measurements.
+# Same linear model as Model in 2_ml-tf-gradienttape.py (y = x * w + b), but updated sample by sample
+# (or mini-batch by mini-batch) without keeping any history.
+#
+#   RecursiveLeastSquares - exact least-squares fit of everything seen so far, optionally with a
+#                           forgetting factor (0 < forgetting <= 1) so older samples weigh less and the
+#                           model follows drifting data. O(1) time and memory per sample.
+#   OnlineSGD             - one gradient descent step per sample or mini-batch.
+#
+# Both expose w, b and the running RMSE at any time. The RMSE is computed from each sample's error
+# before the model learned from it, with the same forgetting factor.
+#
+#   python regression_online.py   # drifting stream demo and throughput
+
+import argparse
+import math
+import time
+import numpy as np
+
+
+class RecursiveLeastSquares:
+    """Least squares in information form: A = Σ λ^k φφᵀ, r = Σ λ^k φy with φ = (x, 1), θ = A⁻¹r."""
+
+    def __init__(self, forgetting=1.0, w=0.0, b=0.0, regularization=1e-6):
+        self.forgetting = forgetting
+        # The initial guess enters as a weak prior, it is forgotten like any other data
+        self.a = np.eye(2) * regularization
+        self.r = self.a @ np.array([w, b])
+        self.error_sum = 0.0
+        self.weight_sum = 0.0
+        self._theta = np.array([w, b], dtype=np.float64)
+
+    def update(self, x, y):
+        """Learn from one sample in O(1)."""
+        error = self._theta[0] * x + self._theta[1] - y
+        lam = self.forgetting
+        a = self.a
+        a *= lam
+        a[0, 0] += x * x
+        a[0, 1] += x
+        a[1, 0] += x
+        a[1, 1] += 1.0
+        self.r *= lam
+        self.r[0] += x * y
+        self.r[1] += y
+        self.error_sum = lam * self.error_sum + error * error
+        self.weight_sum = lam * self.weight_sum + 1.0
+        self._solve()
+
+    def update_batch(self, x, y):
+        """Learn from a mini-batch with vectorized sums, equivalent to calling update() per sample
+        (except that the errors of the whole batch are taken before it)."""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        m = len(x)
+        if m == 0:
+            return
+        lam = self.forgetting
+        # Sample i of the batch is forgotten (m - 1 - i) times by the end of the batch
+        weights = lam ** np.arange(m - 1, -1, -1, dtype=np.float64) if lam != 1.0 else np.ones(m)
+        decay = lam ** m
+
+        errors = self._theta[0] * x + self._theta[1] - y
+        wx = weights * x
+        sx, sxx, sw = wx.sum(), np.dot(wx, x), weights.sum()
+        self.a = decay * self.a + np.array([[sxx, sx], [sx, sw]])
+        self.r = decay * self.r + np.array([np.dot(wx, y), np.dot(weights, y)])
+        self.error_sum = decay * self.error_sum + np.dot(weights, errors * errors)
+        self.weight_sum = decay * self.weight_sum + sw
+        self._solve()
+
+    def _solve(self):
+        # Closed-form 2x2 inverse, cheaper than np.linalg.solve for a single tiny system
+        (a00, a01), (a10, a11) = self.a
+        det = a00 * a11 - a01 * a10
+        if det != 0:
+            r0, r1 = self.r
+            self._theta = np.array([(a11 * r0 - a01 * r1) / det, (a00 * r1 - a10 * r0) / det])
+
+    @property
+    def w(self):
+        return float(self._theta[0])
+
+    @property
+    def b(self):
+        return float(self._theta[1])
+
+    @property
+    def rmse(self):
+        return math.sqrt(self.error_sum / self.weight_sum) if self.weight_sum else float("nan")
+
+    def __call__(self, x):
+        return x * self.w + self.b
+
+
+class OnlineSGD:
+    """Stochastic gradient descent on the squared error, one step per sample or mini-batch."""
+
+    def __init__(self, learning_rate=0.01, forgetting=1.0, w=0.0, b=0.0):
+        self.learning_rate = learning_rate
+        self.forgetting = forgetting # only used for the running RMSE
+        self.w, self.b = float(w), float(b)
+        self.error_sum = 0.0
+        self.weight_sum = 0.0
+
+    def update(self, x, y):
+        error = x * self.w + self.b - y
+        self.w -= self.learning_rate * 2 * error * x
+        self.b -= self.learning_rate * 2 * error
+        self.error_sum = self.forgetting * self.error_sum + error * error
+        self.weight_sum = self.forgetting * self.weight_sum + 1.0
+
+    def update_batch(self, x, y):
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        m = len(x)
+        if m == 0:
+            return
+        errors = x * self.w + self.b - y
+        self.w -= self.learning_rate * 2 * float(np.dot(errors, x)) / m
+        self.b -= self.learning_rate * 2 * float(errors.sum()) / m
+        decay = self.forgetting ** m
+        weights = self.forgetting ** np.arange(m - 1, -1, -1, dtype=np.float64)
+        self.error_sum = decay * self.error_sum + float(np.dot(weights, errors * errors))
+        self.weight_sum = decay * self.weight_sum + float(weights.sum())
+
+    @property
+    def rmse(self):
+        return math.sqrt(self.error_sum / self.weight_sum) if self.weight_sum else float("nan")
+
+    def __call__(self, x):
+        return x * self.w + self.b
+
+
+def drifting_stream(n, batch_size, noise=0.1, seed=0):
+    """Batches of y = w * x + b where w drifts from 2 to 3 halfway through (b = -1)."""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, batch_size):
+        m = min(batch_size, n - start)
+        x = rng.uniform(-1.0, 4.0, m)
+        w = np.where(np.arange(start, start + m) < n // 2, 2.0, 3.0)
+        yield x, w * x - 1 + rng.normal(0, noise, m)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Online regression on a drifting stream")
+    parser.add_argument("--samples", type=int, default=2_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--forgetting", type=float, default=0.999)
+    args = parser.parse_args()
+
+    regressors = {
+        "RLS (no forgetting)": RecursiveLeastSquares(),
+        f"RLS (forgetting {args.forgetting})": RecursiveLeastSquares(forgetting=args.forgetting),
+        "SGD": OnlineSGD(learning_rate=0.01, forgetting=args.forgetting),
+    }
+
+    print(f"Stream of {args.samples:,} samples, w changes from 2 to 3 halfway through (b = -1)")
+    for name, regressor in regressors.items():
+        seen = 0
+        before_drift = None
+        start = time.perf_counter()
+        for x, y in drifting_stream(args.samples, args.batch_size):
+            regressor.update_batch(x, y)
+            seen += len(x)
+            if before_drift is None and seen >= args.samples // 2:
+                before_drift = (regressor.w, regressor.b)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<26} before drift: w={before_drift[0]:.4f} b={before_drift[1]:.4f} | "
+              f"end: w={regressor.w:.4f} b={regressor.b:.4f} running RMSE={regressor.rmse:.4f} "
+              f"({args.samples / elapsed:,.0f} samples/s batched)")
+
+    # Per-sample updates, e.g. for a feed that delivers one measurement at a time
+    regressor = RecursiveLeastSquares(forgetting=args.forgetting)
+    x, y = next(drifting_stream(100_000, 100_000))
+    start = time.perf_counter()
+    for x_val, y_val in zip(x.tolist(), y.tolist()):
+        regressor.update(x_val, y_val)
+    elapsed = time.perf_counter() - start
+    print(f"\nRLS per-sample update: {len(x) / elapsed:,.0f} samples/s (w={regressor.w:.4f} b={regressor.b:.4f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Scalable, headless plots of ground truth vs prediction for the linear regression y = x * w + b.
+#
+# Up to ANNOTATE_LIMIT points the plot looks like the one of 1_ml-manual.py (every point, error lines,
+# annotations). Above that the data is aggregated chunk by chunk into fixed-size histograms:
+#   - 2D histogram of ground truth against prediction
+#   - residual bands over x: mean and ±1/±2 standard deviations per x-bin
+# The figure is rendered from the histograms only, so render time and memory stay constant as the
+# dataset grows. The data itself can be a memory-mapped file (see regression_numpy.generate_file).
+#
+#   python regression_plot.py --samples 10000000 --output regression.png
+#   python regression_plot.py --file data.bin --w 3 --b 1 --output regression.svg
+
+import argparse
+import math
+import os
+import numpy as np
+
+ANNOTATE_LIMIT = 50
+BINS = 200
+CHUNK_SIZE = 1_000_000
+HEADLESS_OUTPUT = "regression.png" # written when there is no display and no output was given
+
+
+def use_backend(output):
+    """Non-interactive backend when writing to a file or when there is no display."""
+    import matplotlib
+    if output or (os.name == "posix" and not os.environ.get("DISPLAY") and os.uname().sysname != "Darwin"):
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _value_range(values, chunk_size):
+    low, high = math.inf, -math.inf
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        low, high = min(low, float(chunk.min())), max(high, float(chunk.max()))
+    return low, high
+
+
+def _edges(low, high, bins):
+    """bins + 1 increasing bin edges over [low, high], widened around constant data."""
+    if high <= low:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+
+def aggregate(x, y, w, b, bins=BINS, chunk_size=CHUNK_SIZE):
+    """Accumulate the histograms in chunks. x and y can be memory-mapped. Two passes over the data."""
+    x_range = _value_range(x, chunk_size)
+    y_range = _value_range(y, chunk_size)
+    # Predictions are linear in x, their range follows from the x range
+    pred_range = tuple(sorted((x_range[0] * w + b, x_range[1] * w + b)))
+    value_range = (min(y_range[0], pred_range[0]), max(y_range[1], pred_range[1]))
+
+    x_edges = _edges(*x_range, bins)
+    value_edges = _edges(*value_range, bins)
+    counts_2d = np.zeros((bins, bins))
+    x_counts = np.zeros(bins)
+    residual_sum = np.zeros(bins)
+    residual_sq_sum = np.zeros(bins)
+    sq_error_sum = 0.0
+
+    for start in range(0, len(x), chunk_size):
+        xc = np.asarray(x[start:start + chunk_size], dtype=np.float64)
+        yc = np.asarray(y[start:start + chunk_size], dtype=np.float64)
+        residuals = xc * w + b - yc
+
+        counts_2d += np.histogram2d(yc, xc * w + b, bins=(value_edges, value_edges))[0]
+        x_bins = np.clip(np.searchsorted(x_edges, xc, side="right") - 1, 0, bins - 1)
+        x_counts += np.bincount(x_bins, minlength=bins)
+        residual_sum += np.bincount(x_bins, weights=residuals, minlength=bins)
+        residual_sq_sum += np.bincount(x_bins, weights=residuals * residuals, minlength=bins)
+        sq_error_sum += float(np.dot(residuals, residuals))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        residual_mean = residual_sum / x_counts
+        residual_std = np.sqrt(np.maximum(residual_sq_sum / x_counts - residual_mean ** 2, 0))
+
+    return {
+        "n": len(x),
+        "value_edges": value_edges,
+        "counts_2d": counts_2d,
+        "x_centers": (x_edges[:-1] + x_edges[1:]) / 2,
+        "residual_mean": residual_mean,
+        "residual_std": residual_std,
+        "rmse": math.sqrt(sq_error_sum / len(x)),
+    }
+
+
+def plot_aggregated(stats, w, b, output=None):
+    plt = use_backend(output)
+    from matplotlib.colors import LogNorm
+
+    fig, (ax_hist, ax_residual) = plt.subplots(1, 2, figsize=(16, 7))
+    edges = stats["value_edges"]
+
+    # Ground truth vs prediction, counts on a log scale. Perfect predictions lie on the diagonal.
+    counts = np.ma.masked_equal(stats["counts_2d"], 0)
+    mesh = ax_hist.pcolormesh(edges, edges, counts.T, cmap='viridis', norm=LogNorm())
+    fig.colorbar(mesh, ax=ax_hist, label='Points per bin')
+    ax_hist.plot(edges[[0, -1]], edges[[0, -1]], color='red', linestyle='--', linewidth=1, label='Prediction = ground truth')
+    ax_hist.set_title('Ground Truth vs Prediction', fontsize=14, fontweight='bold')
+    ax_hist.set_xlabel('Ground truth (y)', fontsize=12)
+    ax_hist.set_ylabel('Prediction', fontsize=12)
+    ax_hist.legend(fontsize=10, loc='lower right')
+
+    # Residual bands over x
+    centers, mean, std = stats["x_centers"], stats["residual_mean"], stats["residual_std"]
+    ax_residual.fill_between(centers, mean - 2 * std, mean + 2 * std, color='green', alpha=0.15, label='±2 std')
+    ax_residual.fill_between(centers, mean - std, mean + std, color='green', alpha=0.3, label='±1 std')
+    ax_residual.plot(centers, mean, color='green', linewidth=2, label='Mean error')
+    ax_residual.axhline(0, color='black', linewidth=0.8)
+    ax_residual.set_title('Error (prediction - ground truth) by input', fontsize=14, fontweight='bold')
+    ax_residual.set_xlabel('Input (x)', fontsize=12)
+    ax_residual.set_ylabel('Error', fontsize=12)
+    ax_residual.grid(True, alpha=0.3, linestyle=':')
+    ax_residual.legend(fontsize=10)
+
+    ax_hist.text(0.02, 0.98, f"Model: y = {w}x + {b}\nRMSE: {stats['rmse']:.2f}\nN = {stats['n']:,}",
+                 transform=ax_hist.transAxes, fontsize=11, verticalalignment='top',
+                 bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.8))
+
+    fig.tight_layout()
+    _finish(plt, output)
+
+
+def plot_points(x, y, w, b, output=None):
+    """Every point with its error, as in 1_ml-manual.py. Only for small datasets."""
+    plt = use_backend(output)
+    x, y = np.asarray(x), np.asarray(y)
+    y_pred = x * w + b
+    errors = y_pred - y
+
+    plt.figure(figsize=(10, 6))
+    plt.scatter(x, y, color='blue', label='Ground Truth', s=100, zorder=3)
+    plt.scatter(x, y_pred, color='red', label='Prediction', s=100, marker='x', zorder=3)
+    plt.vlines(x, y, y_pred, color='green', linestyle='--', alpha=0.7, linewidth=2, label='Error', zorder=1)
+    plt.title('Manual Linear Model: Ground Truth vs Prediction', fontsize=16, fontweight='bold')
+    plt.xlabel('Input (x)', fontsize=12)
+    plt.ylabel('Output (y)', fontsize=12)
+    plt.grid(True, alpha=0.3, linestyle=':')
+    plt.legend(fontsize=12)
+
+    for xi, yi, mid, error in zip(x, y, (y + y_pred) / 2, errors):
+        plt.annotate(f'({xi:g}, {yi:g})', xy=(xi, yi), xytext=(5, 5), textcoords='offset points',
+                     fontsize=9, color='blue',
+                     bbox=dict(boxstyle='round,pad=0.3', facecolor='lightblue', alpha=0.7))
+        plt.annotate(f'err: {error:+.1f}', xy=(xi, mid), xytext=(10, 0), textcoords='offset points',
+                     fontsize=8, color='green', ha='left',
+                     bbox=dict(boxstyle='round,pad=0.2', facecolor='lightgreen', alpha=0.6))
+
+    plt.text(0.02, 0.98, f'Model: y = {w}x + {b}', transform=plt.gca().transAxes, fontsize=12,
+             verticalalignment='top', bbox=dict(boxstyle='round,pad=0.5', facecolor='yellow', alpha=0.8))
+    plt.text(0.02, 0.85, f'RMSE: {math.sqrt(np.mean(errors ** 2)):.2f}', transform=plt.gca().transAxes,
+             fontsize=11, bbox=dict(boxstyle='round,pad=0.3', facecolor='lightcoral', alpha=0.7))
+    plt.tight_layout()
+    _finish(plt, output)
+
+
+def plot_regression(x, y, w, b, output=None, annotate_limit=ANNOTATE_LIMIT, bins=BINS, chunk_size=CHUNK_SIZE):
+    """Pick the per-point plot for small data and the aggregated plot for large data."""
+    if len(x) <= annotate_limit:
+        plot_points(x, y, w, b, output)
+    else:
+        plot_aggregated(aggregate(x, y, w, b, bins, chunk_size), w, b, output)
+
+
+def _finish(plt, output):
+    if not output and plt.get_backend().lower() == "agg":
+        # plt.show() does nothing without a display
+        output = HEADLESS_OUTPUT
+        print("No display available, writing the plot to a file instead")
+    if output:
+        plt.savefig(output, dpi=150) # format from the extension: .png, .svg, ...
+        plt.close()
+        print(f"Plot saved to: {output}")
+    else:
+        plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plot ground truth vs prediction for any dataset size")
+    parser.add_argument("--file", help="file of interleaved float64 (x, y) pairs")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="synthetic samples if no --file")
+    parser.add_argument("--w", type=float, default=3.0)
+    parser.add_argument("--b", type=float, default=1.0)
+    parser.add_argument("--bins", type=int, default=BINS)
+    parser.add_argument("--output", help=f"PNG/SVG file to write (default: show the plot, or write {HEADLESS_OUTPUT} without a display)")
+    args = parser.parse_args()
+
+    if args.file:
+        from regression_numpy import open_memmap
+        x, y = open_memmap(args.file)
+    else:
+        rng = np.random.default_rng(0)
+        x = rng.uniform(-10, 10, args.samples)
+        y = 2 * x - 1 + rng.normal(0, 0.5, args.samples)
+
+    plot_regression(x, y, args.w, args.b, args.output, bins=args.bins)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# Mini-batch version of the GradientTape regression in 2_ml-tf-gradienttape.py.
+# The same linear model and update rule, but:
+#   - data comes as a tf.data stream of mini-batches, generated on the fly or read from a memory-mapped
+#     file (see regression_numpy.generate_file), so millions of samples never sit in Python lists
+#   - the train step can be compiled with tf.function (optionally XLA) instead of running eagerly
+#
+#   python regression_tf.py --samples 5000000 --batch-size 1024
+#   python regression_tf.py --file data.bin
+
+import argparse
+import time
+import numpy as np
+import tensorflow as tf
+
+INITIAL_W = 10.0
+INITIAL_B = 10.0
+LEARNING_RATE = 0.01 # x spans -10..10 here, 0.14 from script 2 would diverge
+BATCH_SIZE = 1024
+MODES = ["eager", "compiled", "xla"]
+
+
+class Model(object):
+    def __init__(self):
+        self.w = tf.Variable(INITIAL_W)
+        self.b = tf.Variable(INITIAL_B)
+
+    def __call__(self, x):
+        return self.w * x + self.b
+
+
+def loss(predicted_y, target_y):
+    return tf.reduce_mean(tf.square(predicted_y - target_y))
+
+
+def train_step(model, inputs, outputs, learning_rate):
+    with tf.GradientTape() as t:
+        current_loss = loss(model(inputs), outputs)
+    dw, db = t.gradient(current_loss, [model.w, model.b])
+    model.w.assign_sub(learning_rate * dw)
+    model.b.assign_sub(learning_rate * db)
+    return current_loss
+
+
+def make_train_step(model, learning_rate=LEARNING_RATE, mode="compiled"):
+    """mode: "eager", "compiled" (tf.function) or "xla" (tf.function with jit_compile)."""
+    step = lambda inputs, outputs: train_step(model, inputs, outputs, learning_rate)
+    if mode == "eager":
+        return step
+    signature = [tf.TensorSpec([None], tf.float32), tf.TensorSpec([None], tf.float32)]
+    return tf.function(step, input_signature=signature, jit_compile=(mode == "xla"))
+
+
+def synthetic_dataset(num_samples, batch_size=BATCH_SIZE, w=2.0, b=-1.0, noise=0.5, seed=0):
+    """Batches of y = x * w + b + noise, generated inside the pipeline. Batch i is the same in every epoch."""
+    def make_batch(i):
+        seeds = tf.stack([tf.cast(i, tf.int32), tf.constant(seed)])
+        x = tf.random.stateless_uniform([batch_size], seed=seeds, minval=-10.0, maxval=10.0)
+        y = x * w + b + tf.random.stateless_normal([batch_size], seed=seeds + 1, stddev=noise)
+        return x, y
+
+    return (tf.data.Dataset.range(num_samples // batch_size)
+            .map(make_batch, num_parallel_calls=tf.data.AUTOTUNE)
+            .prefetch(tf.data.AUTOTUNE))
+
+
+def memmap_dataset(path, batch_size=BATCH_SIZE):
+    """Batches read from a file of interleaved float64 (x, y) pairs without loading it whole."""
+    from regression_numpy import open_memmap
+
+    x, y = open_memmap(path)
+
+    def batches():
+        for start in range(0, len(x), batch_size):
+            yield (x[start:start + batch_size].astype(np.float32),
+                   y[start:start + batch_size].astype(np.float32))
+
+    signature = (tf.TensorSpec([None], tf.float32), tf.TensorSpec([None], tf.float32))
+    return tf.data.Dataset.from_generator(batches, output_signature=signature).prefetch(tf.data.AUTOTUNE)
+
+
+def train(model, dataset, step, epochs=1, verbose=True):
+    """Run mini-batch SGD. Returns mean loss per epoch (floats) and train steps per second."""
+    losses = []
+    steps = 0
+    start = time.perf_counter()
+    for epoch in range(epochs):
+        # Summing tensors keeps the loop asynchronous, the loss is read back once per epoch
+        total_loss = tf.constant(0.0)
+        epoch_steps = 0
+        for inputs, outputs in dataset:
+            total_loss += step(inputs, outputs)
+            epoch_steps += 1
+        losses.append(float(total_loss) / epoch_steps)
+        steps += epoch_steps
+        if verbose:
+            print('Epoch %2d: w=%.4f b=%.4f, loss=%.4f' % (epoch, model.w.numpy(), model.b.numpy(), losses[-1]))
+    return losses, steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eager vs compiled mini-batch training of the linear model")
+    parser.add_argument("--samples", type=int, default=2_000_000, help="synthetic samples per epoch")
+    parser.add_argument("--file", help="train on a file of interleaved float64 (x, y) pairs instead")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--learning-rate", type=float, default=LEARNING_RATE)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--cache", action="store_true",
+                        help="keep the synthetic batches in memory after the first pass (needs RAM for all samples)")
+    args = parser.parse_args()
+
+    if args.file:
+        dataset = memmap_dataset(args.file, args.batch_size)
+    else:
+        dataset = synthetic_dataset(args.samples, args.batch_size)
+        if args.cache:
+            # Filled by one pass here, so the comparison measures the train step, not the data generation
+            dataset = dataset.cache()
+            for _ in dataset:
+                pass
+
+    results = {}
+    for mode in args.modes:
+        print(f"\n=== {mode} ===")
+        model = Model()
+        step = make_train_step(model, args.learning_rate, mode)
+        losses, steps_per_second = train(model, dataset, step, args.epochs)
+        results[mode] = (steps_per_second, model.w.numpy(), model.b.numpy(), losses[-1])
+
+    print(f"\n{'Mode':<10} {'Steps/s':>10} {'Speed-up':>9} {'w':>8} {'b':>8} {'Loss':>8}")
+    baseline = results.get("eager", next(iter(results.values())))[0]
+    for mode, (steps_per_second, w, b, final_loss) in results.items():
+        print(f"{mode:<10} {steps_per_second:>10,.0f} {steps_per_second / baseline:>8.1f}x "
+              f"{w:>8.4f} {b:>8.4f} {final_loss:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
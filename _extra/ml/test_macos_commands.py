@@ -1,60 +1,86 @@
 #!/usr/bin/env python3
 """
-Test various macOS commands that can be triggered by "go" detection.
-This demonstrates different actions you can perform.
+Latency benchmark for actions triggered by "go" detection.
+Compares spawning a new process per action (subprocess.run, as 8_realtime_go_detection_and_action.py
+used to do) with the pre-warmed ActionLauncher helper (see action_launcher.py).
+Measures the time from "detection" to the action's process having started.
+
+Runs on macOS and Linux. Only harmless commands are used by default (`true`, `date`); desktop actions
+(`notify`, `say`, `open_url`, ...) can be added with --actions and open things on screen.
+
+Usage:
+    python test_macos_commands.py
+    python test_macos_commands.py --runs 200 --ballast-mb 1500   # parent as big as a loaded model
+    python test_macos_commands.py --actions notify
 """
 
+import argparse
+import shutil
 import subprocess
 import time
+import numpy as np
+from action_launcher import ActionLauncher, action_command, ACTIONS
+
+RUNS = 100
+
+
+def spawn_per_action(argv):
+    """subprocess.run per action: returns (start latency, completion latency) in ms."""
+    requested_at = time.monotonic()
+    # Popen returns once the child has exec'd, which is when the action starts
+    process = subprocess.Popen(argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    started_at = time.monotonic()
+    process.wait()
+    return (started_at - requested_at) * 1000, (time.monotonic() - requested_at) * 1000
+
+
+def prewarmed(launcher, argv):
+    """ActionLauncher per action: returns (start latency, completion latency) in ms."""
+    handle = launcher.launch(argv)
+    handle.exit_code.result(timeout=10)
+    return handle.start_latency_ms, (time.monotonic() - handle.requested_at) * 1000
+
+
+def summarize(name, results):
+    start = np.array([r[0] for r in results])
+    complete = np.array([r[1] for r in results])
+    print(f"  {name:<22} start p50 {np.percentile(start, 50):7.2f} ms  p99 {np.percentile(start, 99):7.2f} ms"
+          f"  | completed p50 {np.percentile(complete, 50):7.2f} ms")
 
-def test_command(description, command, safe=True):
-    """Test a macOS command."""
-    print(f"\n🧪 Testing: {description}")
-    print(f"Command: {' '.join(command)}")
-
-    if not safe:
-        response = input("This command might open something. Continue? (y/N): ")
-        if response.lower() != 'y':
-            print("⏭️  Skipped")
-            return
-
-    try:
-        result = subprocess.run(command, check=True, capture_output=True, text=True)
-        print(f"✅ Success! Output: {result.stdout.strip()}")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Failed: {e}")
-    except Exception as e:
-        print(f"❌ Error: {e}")
 
 def main():
-    print("macOS Voice Command Test")
+    parser = argparse.ArgumentParser(description="Spawn-per-action vs pre-warmed launcher latency")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--actions", nargs="*", default=[], choices=list(ACTIONS),
+                        help="desktop actions to include (they open things on screen)")
+    parser.add_argument("--ballast-mb", type=int, default=0,
+                        help="allocate and touch this much memory first, like a process with the model loaded")
+    args = parser.parse_args()
+
+    print("Voice Command Latency Benchmark")
     print("=" * 40)
-    print("Testing various commands you can trigger with 'go' detection...")
-
-    # Safe commands (won't open anything)
-    test_command("Text-to-speech", ["say", "Go command detected"], safe=True)
-    test_command("Get current date", ["date"], safe=True)
-    test_command("List Applications", ["ls", "/Applications"], safe=True)
-
-    print("\n" + "=" * 40)
-    print("Interactive commands (will ask permission):")
-
-    # Commands that open things (ask first)
-    test_command("Open Chrome browser", ["open", "-a", "Google Chrome"], safe=False)
-    test_command("Open Finder", ["open", "-a", "Finder"], safe=False)
-    test_command("Open Calculator", ["open", "-a", "Calculator"], safe=False)
-    test_command("Open default browser to Google", ["open", "https://google.com"], safe=False)
-    test_command("Open Applications folder", ["open", "/Applications"], safe=False)
-
-    print("\n" + "=" * 40)
-    print("Other useful commands you can use:")
-    print("• ['open', '-a', 'Spotify'] - Open Spotify")
-    print("• ['open', '-a', 'Terminal'] - Open Terminal")
-    print("• ['open', '-a', 'Visual Studio Code'] - Open VS Code")
-    print("• ['osascript', '-e', 'tell application \"System Events\" to keystroke \"v\" using command down'] - Paste")
-    print("• ['pmset', 'sleepnow'] - Put Mac to sleep")
-    print("• ['say', 'Hello there'] - Text to speech")
-    print("• ['open', 'https://youtube.com'] - Open YouTube")
+
+    # The launcher is started before the ballast, as the spotter starts it before loading the model
+    launcher = ActionLauncher()
+    ballast = np.ones(args.ballast_mb * 1024 * 1024 // 8) if args.ballast_mb else None
+    if ballast is not None:
+        print(f"Parent process ballast: {args.ballast_mb} MB")
+
+    commands = [("true", ["true"]), ("date", ["date"])]
+    for action in args.actions:
+        commands.append((action, action_command(action)))
+
+    for name, argv in commands:
+        if shutil.which(argv[0]) is None:
+            print(f"\n⏭️  {name}: '{argv[0]}' not found, skipped")
+            continue
+        runs = args.runs if name in ("true", "date") else min(args.runs, 3) # do not flood the desktop
+        print(f"\n🧪 {name}: {' '.join(argv)} ({runs} runs)")
+        summarize("spawn per action", [spawn_per_action(argv) for _ in range(runs)])
+        summarize("pre-warmed launcher", [prewarmed(launcher, argv) for _ in range(runs)])
+
+    launcher.close()
+
 
 if __name__ == "__main__":
     main()
@@ -2,13 +2,16 @@
 """
 Simple microphone test for keyword spotting.
 Records a few seconds of audio and processes it through the model.
+
+With --diagnose, measures callback jitter, overflows and CPU use for a range of
+stream blocksizes instead, and recommends a configuration (see audio_diagnostics.py).
 """
 
 import numpy as np
-import torch
-from transformers import Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
 import sounddevice as sd
+import sys
 import time
+from kws_model import load_model
 
 def test_microphone_recording():
     """Test basic microphone recording functionality."""
@@ -43,55 +46,29 @@ def test_model_prediction(audio_data):
     """Test model prediction on recorded audio."""
     print("\nLoading model...")
 
-    model_name = "anton-l/wav2vec2-base-ft-keyword-spotting"
-    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained(model_name)
-    model = Wav2Vec2ForSequenceClassification.from_pretrained(model_name)
-
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
-    model.eval()
+    kws = load_model()
 
-    print(f"Model loaded on: {device}")
-
-    # Get label mappings
-    id2label = model.config.id2label
-    print(f"Available labels: {list(id2label.values())}")
+    print(f"Model loaded on: {kws.device}")
+    print(f"Available labels: {list(kws.labels)}")
 
     # Process audio through model
     print("\nProcessing audio...")
 
     try:
-        # Process the audio
-        inputs = feature_extractor(
-            audio_data,
-            sampling_rate=16000,
-            return_tensors="pt",
-            padding=True
-        )
-        inputs = {k: v.to(device) for k, v in inputs.items()}
-
         # Make prediction
-        with torch.no_grad():
-            outputs = model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-
-        predictions = predictions.cpu().numpy()[0]
+        predictions = kws.predict(audio_data)[0]
 
         # Get top 3 predictions
         top_3_indices = np.argsort(predictions)[-3:][::-1]
 
         print("Top 3 predictions:")
         for i, idx in enumerate(top_3_indices):
-            label = id2label.get(str(idx), f"class_{idx}")
+            label = kws.label(idx)
             confidence = predictions[idx]
             print(f"  {i+1}. {label}: {confidence:.4f}")
 
         # Check specifically for "yes"
-        yes_class_id = None
-        for class_id, label in id2label.items():
-            if label.lower() == "yes":
-                yes_class_id = int(class_id)
-                break
+        yes_class_id = kws.label2id.get("yes")
 
         if yes_class_id is not None:
             yes_confidence = predictions[yes_class_id]
@@ -133,6 +110,12 @@ def main():
     print(devices)
     print()
 
+    # Capture diagnostics and blocksize auto-tuning, with the model running at the same time
+    if "--diagnose" in sys.argv:
+        from audio_diagnostics import run_diagnostics
+        run_diagnostics(with_model=True)
+        return
+
     # Test microphone recording
     try:
         audio_data = test_microphone_recording()
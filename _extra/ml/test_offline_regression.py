@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Offline accuracy and latency regression suite.
+Runs without network access and without a microphone:
+- keyword spotting uses a tiny, randomly initialised Wav2Vec2ForSequenceClassification saved to a
+  temporary directory as a stand-in for the Hugging Face model, and the WAVs in samples/
+- the letters model uses the committed saved_models/ artifacts
+
+Checks that outputs are well formed and consistent (batch vs single clip, replayed realtime windows,
+Keras vs TFLite) and that throughput and latency stay within BUDGETS, so performance regressions
+fail the suite. Exits with status 1 if any check fails.
+
+Usage:
+    python test_offline_regression.py
+    python test_offline_regression.py --budget-scale 2      # slower machine: 2x latency, 1/2 throughput
+    python test_offline_regression.py --only kws
+    python test_offline_regression.py --real-model          # also check the real model from the local HF cache
+"""
+
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from audio_io import read_wav
+
+SAMPLES_DIR = "samples"
+SAMPLE_RATE = 16000
+
+# Budgets for the stand-in model and the committed letters model on one CPU core of a current laptop.
+# Latencies are upper bounds, throughputs lower bounds; --budget-scale relaxes both.
+BUDGETS = {
+    "kws_batch_clips_per_s": 50,       # 1 s clips through the batch classifier, batch of 8
+    "kws_single_p99_ms": 100,          # one 1 s clip, as the realtime scripts call it
+    "kws_replay_realtime_factor": 0.1, # processing time / audio duration of the replayed realtime path
+    "tflite_images_per_s": 20000,      # TFLiteEvaluator, batch 256
+    "tflite_single_p99_ms": 1.0,       # TFLiteEvaluator with batch 1
+}
+
+KEYWORDS = ["yes", "no", "up", "down", "left", "right", "on", "off", "stop", "go", "_silence_", "_unknown_"]
+
+
+class Suite:
+    """Collects check results and prints them as they come in."""
+
+    def __init__(self, budget_scale=1.0):
+        self.budget_scale = budget_scale
+        self.failures = []
+        self.checks = 0
+
+    def check(self, name, passed, detail=""):
+        self.checks += 1
+        print(f"  {'✅' if passed else '❌'} {name}{f' ({detail})' if detail else ''}")
+        if not passed:
+            self.failures.append(name)
+
+    def max_budget(self, name, value, unit):
+        budget = BUDGETS[name] * self.budget_scale
+        self.check(name, value <= budget, f"{value:.3f} {unit}, budget <= {budget:.3f}")
+
+    def min_budget(self, name, value, unit):
+        budget = BUDGETS[name] / self.budget_scale
+        self.check(name, value >= budget, f"{value:,.1f} {unit}, budget >= {budget:,.1f}")
+
+
+def time_calls(fn, runs, warmup=3):
+    """Call fn() warmup + runs times and return the per-call times in ms."""
+    for _ in range(warmup):
+        fn()
+    times = np.empty(runs)
+    for i in range(runs):
+        start = time.perf_counter()
+        fn()
+        times[i] = (time.perf_counter() - start) * 1000
+    return times
+
+
+def load_samples(samples_dir=SAMPLES_DIR):
+    """Return (clips, labels) for samples/<label>/*.wav, clips as a (N, 16000) float32 array."""
+    clips, labels = [], []
+    for path in sorted(glob.glob(os.path.join(samples_dir, "*", "*.wav"))):
+        audio, sr = read_wav(path)
+        if sr != SAMPLE_RATE:
+            raise ValueError(f"{path}: expected {SAMPLE_RATE} Hz, got {sr}")
+        clip = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        clip[:min(len(audio), SAMPLE_RATE)] = audio[:SAMPLE_RATE]
+        clips.append(clip)
+        labels.append(os.path.basename(os.path.dirname(path)))
+    return np.stack(clips), labels
+
+
+def make_standin_model(path):
+    """Save a tiny random wav2vec2 keyword classifier with the real model's labels and preprocessing."""
+    import torch
+    from transformers import Wav2Vec2Config, Wav2Vec2FeatureExtractor, Wav2Vec2ForSequenceClassification
+
+    config = Wav2Vec2Config(
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        conv_dim=(32,) * 7, # same strides and kernels as wav2vec2-base, so the same 20 ms frame rate
+        num_conv_pos_embeddings=16,
+        num_conv_pos_embedding_groups=2,
+        classifier_proj_size=16,
+        num_labels=len(KEYWORDS),
+        id2label={i: label for i, label in enumerate(KEYWORDS)},
+        label2id={label: i for i, label in enumerate(KEYWORDS)},
+    )
+    torch.manual_seed(0)
+    Wav2Vec2ForSequenceClassification(config).save_pretrained(path)
+    Wav2Vec2FeatureExtractor(feature_size=1, sampling_rate=SAMPLE_RATE, padding_value=0.0,
+                             do_normalize=True, return_attention_mask=False).save_pretrained(path)
+
+
+def check_kws(suite, kws, clips, labels, with_budgets=True, min_accuracy=None):
+    from kws_stream import replay, window_ends, windows
+
+    # Batch classifier: shapes, probabilities, determinism, batch == single clip
+    probabilities = kws.predict(clips)
+    suite.check("kws output shape", probabilities.shape == (len(clips), kws.num_labels), str(probabilities.shape))
+    suite.check("kws probabilities sum to 1", np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-4))
+    suite.check("kws labels include yes/no/go",
+                all(label in kws.label2id for label in ("yes", "no", "go")))
+    suite.check("kws deterministic", np.allclose(kws.predict(clips), probabilities, atol=1e-6))
+    single = np.stack([kws.predict(clip)[0] for clip in clips])
+    max_diff = float(np.abs(single - probabilities).max())
+    suite.check("kws batch matches single clip", max_diff < 1e-4, f"max diff {max_diff:.2e}")
+
+    if min_accuracy is not None:
+        predicted = [kws.label(i) for i in probabilities.argmax(axis=1)]
+        accuracy = np.mean([p.lower() == label for p, label in zip(predicted, labels)])
+        suite.check("kws accuracy on samples/", accuracy >= min_accuracy,
+                    f"{accuracy:.2%}, budget >= {min_accuracy:.0%}")
+
+    # Replayed realtime path over all samples back to back, with a second of silence in between
+    gap = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    stream = np.concatenate([part for clip in clips for part in (clip, gap)])
+    start = time.perf_counter()
+    times, posteriors = replay(kws, stream)
+    elapsed = time.perf_counter() - start
+    ends = window_ends(len(stream))
+    suite.check("replay window count", len(times) == len(ends) == len(posteriors), f"{len(times)} windows")
+    direct = kws.predict(windows(stream, ends[:4]))
+    max_diff = float(np.abs(direct - posteriors[:4]).max())
+    suite.check("replay matches direct prediction", max_diff < 1e-4, f"max diff {max_diff:.2e}")
+
+    if not with_budgets:
+        return
+    batch = clips[np.arange(8) % len(clips)]
+    batch_ms = time_calls(lambda: kws.predict(batch), runs=10)
+    suite.min_budget("kws_batch_clips_per_s", len(batch) / (np.median(batch_ms) / 1000), "clips/s")
+    single_ms = time_calls(lambda: kws.predict(clips[0]), runs=30)
+    suite.max_budget("kws_single_p99_ms", float(np.percentile(single_ms, 99)), "ms")
+    suite.max_budget("kws_replay_realtime_factor", elapsed / (len(stream) / SAMPLE_RATE), "x realtime")
+
+
+def run_kws(suite, clips, labels):
+    from kws_model import load_model
+
+    print("\n🎙️  Keyword spotting (stand-in model)")
+    with tempfile.TemporaryDirectory() as path:
+        make_standin_model(path)
+        kws = load_model(path, device="cpu", offline=True)
+        check_kws(suite, kws, clips, labels)
+
+
+def run_real_kws(suite, clips, labels):
+    from kws_model import load_model
+
+    print("\n🎙️  Keyword spotting (real model from the local Hugging Face cache)")
+    try:
+        kws = load_model(device="cpu", offline=True)
+    except OSError as e:
+        suite.check("real model in local cache", False, str(e).splitlines()[0])
+        return
+    # Budgets are for the stand-in, the real model is only checked for accuracy
+    check_kws(suite, kws, clips, labels, with_budgets=False, min_accuracy=0.75)
+
+
+def cached_mnist():
+    """MNIST validation split if it is in the Keras cache, without downloading it."""
+    path = os.path.join(os.path.expanduser("~"), ".keras", "datasets", "mnist.npz")
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return data["x_test"], data["y_test"]
+
+
+def run_letters(suite):
+    import tensorflow as tf
+    from letters_data import to_float32
+    from letters_model import KERAS_PATH, TFLITE_PATH
+    from letters_tflite import TFLiteEvaluator
+
+    print("\n🔤 Letters model (saved_models/)")
+    missing = [path for path in (KERAS_PATH, TFLITE_PATH) if not os.path.exists(path)]
+    suite.check("saved_models artifacts exist", not missing, ", ".join(missing))
+    if missing:
+        return
+
+    model = tf.keras.models.load_model(KERAS_PATH)
+    evaluator = TFLiteEvaluator(TFLITE_PATH, batch_size=256, num_threads=1)
+    single = TFLiteEvaluator(TFLITE_PATH, batch_size=1, num_threads=1)
+    suite.check("tflite output shape", evaluator.output_shape == (256, 10), str(evaluator.output_shape))
+
+    mnist = cached_mnist()
+    if mnist is not None:
+        images, labels = to_float32(mnist[0]), mnist[1]
+    else:
+        print("  ⏭️  MNIST not in ~/.keras/datasets, using random images (no accuracy check)")
+        images = np.random.default_rng(0).random((2048, 28, 28), dtype=np.float32)
+        labels = None
+
+    tflite_outputs = evaluator.predict(images)
+    keras_outputs = model.predict(images, batch_size=256, verbose=0)
+    agreement = float(np.mean(tflite_outputs.argmax(axis=1) == keras_outputs.argmax(axis=1)))
+    suite.check("keras and tflite agree", agreement >= 0.99, f"{agreement:.2%} of argmax")
+    max_diff = float(np.abs(single.predict(images[:32]) - tflite_outputs[:32]).max())
+    suite.check("tflite batch matches single image", max_diff < 1e-5, f"max diff {max_diff:.2e}")
+    if labels is not None:
+        accuracy = float(np.mean(tflite_outputs.argmax(axis=1) == labels))
+        suite.check("tflite accuracy on MNIST", accuracy >= 0.9, f"{accuracy:.2%}, budget >= 90%")
+
+    batch = images[:256 * 8]
+    batch_ms = time_calls(lambda: evaluator.predict(batch), runs=10)
+    suite.min_budget("tflite_images_per_s", len(batch) / (np.median(batch_ms) / 1000), "images/s")
+    single_ms = time_calls(lambda: single.predict(images[:1]), runs=500)
+    suite.max_budget("tflite_single_p99_ms", float(np.percentile(single_ms, 99)), "ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline accuracy and latency regression suite")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply latency budgets and divide throughput budgets by this")
+    parser.add_argument("--only", choices=["kws", "letters"])
+    parser.add_argument("--real-model", action="store_true",
+                        help="also check the real wav2vec2 model (must be in the local Hugging Face cache)")
+    args = parser.parse_args()
+
+    # Measure on one core, so results do not depend on the machine's core count
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    print("Offline Regression Suite")
+    print("=" * 60)
+    suite = Suite(args.budget_scale)
+
+    if args.only in (None, "kws"):
+        clips, labels = load_samples()
+        print(f"Loaded {len(clips)} clips from {SAMPLES_DIR}/ ({', '.join(sorted(set(labels)))})")
+        run_kws(suite, clips, labels)
+        if args.real_model:
+            run_real_kws(suite, clips, labels)
+    if args.only in (None, "letters"):
+        run_letters(suite)
+
+    print("\n" + "=" * 60)
+    if suite.failures:
+        print(f"❌ {len(suite.failures)} of {suite.checks} checks failed: {', '.join(suite.failures)}")
+        sys.exit(1)
+    print(f"✅ All {suite.checks} checks passed")
+
+
+if __name__ == "__main__":
+    main()